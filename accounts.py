@@ -0,0 +1,277 @@
+'''여러 계좌 실행 - 작업 프로세스에 계좌 분배, 토큰과 앱키별 속도 제한은 broker 프로세스 하나가 관리'''
+
+import os
+import asyncio
+import threading
+from datetime import timedelta
+from multiprocessing.managers import BaseManager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from trader import KISTrade, KISTransport, KISAuth, TokenCache, RateLimiter, Domestic
+
+class AuthBroker:
+    '''
+    앱키별 토큰, 요청 속도 제한 (broker 프로세스에서 실행, 작업 프로세스는 BrokerManager 로 접근)
+    같은 앱키를 쓰는 계좌는 토큰 하나, 속도 제한 하나를 공유
+    '''
+
+    def __init__(self) -> None:
+        self.apps = {}
+        self.lock = threading.Lock()
+
+    def register(self, appkey:str, appsecret:str, mode:str='s', rate:float=None, domain:str=None,
+                 token_cache:bool=True) -> None:
+        '''
+        앱키 등록 (이미 등록된 앱키는 무시)
+        rate: 앱키 단위 초당 요청 수 (기본 RateLimiter.RATE[mode])
+        domain: API 도메인 (기본 mode 의 도메인, 가상 서버 테스트용)
+        token_cache: 토큰 파일 캐시 사용 (broker 재시작시 재발급하지 않도록)
+        '''
+        with self.lock:
+            if appkey in self.apps:
+                return
+
+            limiter = RateLimiter('r' if mode in ('r', 'real') else 's', rate)
+            transport = KISTransport(domain, limiter=limiter) if domain else None
+            kis = KISTrade(appkey, appsecret, '', mode, transport=transport, limiter=limiter)
+            auth = KISAuth(kis, token_cache=TokenCache(appkey, kis.mode) if token_cache else None)
+            self.apps[appkey] = {'auth': auth, 'limiter': limiter, 'lock': threading.Lock()}
+
+    def acquire(self, appkey:str, tr_id:str=None) -> float:
+        '''
+        앱키의 속도 제한 안에서 요청 허가 (RateLimiter.acquire)
+        '''
+        return self.apps[appkey]['limiter'].acquire(tr_id)
+
+    def token(self, appkey:str) -> dict:
+        '''
+        유효한 토큰 (/oauth2/tokenP 응답 형식, 없으면 발급)
+        '''
+        app = self.apps[appkey]
+        auth = app['auth']
+        with app['lock']:
+            access_token = auth.getToken()
+        if not access_token:
+            raise RuntimeError(f'{appkey[:4]}... 토큰 발급 실패')
+        return {
+            'access_token': access_token.replace('Bearer ', '', 1),
+            'access_token_token_expired': auth.token_expired_in.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def invalidate(self, appkey:str, token:str) -> None:
+        '''
+        서버가 거부한 토큰 폐기 (다음 token 요청에서 재발급)
+        '''
+        app = self.apps[appkey]
+        with app['lock']:
+            app['auth'].invalidateToken(token)
+
+    def report(self) -> dict:
+        '''
+        앱키별 RateLimiter.report
+        '''
+        return {appkey[:4] + '...': app['limiter'].report() for appkey, app in self.apps.items()}
+
+# broker 프로세스 안의 AuthBroker (프로세스당 하나)
+_broker = None
+
+def _get_broker() -> AuthBroker:
+    global _broker
+    if _broker is None:
+        _broker = AuthBroker()
+    return _broker
+
+class BrokerManager(BaseManager):
+    '''
+    AuthBroker 를 제공하는 로컬 IPC 서버 (multiprocessing manager)
+    '''
+
+BrokerManager.register('broker', callable=_get_broker)
+
+class BrokerLimiter:
+    '''
+    broker 의 앱키별 속도 제한 사용 (KISTransport 의 limiter 로 전달)
+    요청마다 broker 프로세스로 IPC 왕복 한 번 (로컬에서 수십 us, python accounts.py 로 확인)
+    초당 수십 건인 KIS 제한에 비해 작지만 제한 없이 요청하는 가상 서버 벤치마크에서는 보일 수 있음
+    '''
+
+    def __init__(self, broker, appkey:str) -> None:
+        self.broker = broker
+        self.appkey = appkey
+
+    def acquire(self, tr_id:str=None) -> float:
+        return self.broker.acquire(self.appkey, tr_id)
+
+    async def acquire_async(self, tr_id:str=None) -> float:
+        return await asyncio.to_thread(self.acquire, tr_id)
+
+    def report(self) -> dict:
+        return self.broker.report()
+
+class BrokerAuth(KISAuth):
+    '''
+    토큰을 broker 에서 받는 KISAuth (hashkey 는 작업 프로세스에서 발급)
+    '''
+
+    def __init__(self, kis:KISTrade, broker, hashkey_mode:str='cache') -> None:
+        super().__init__(kis, hashkey_mode)
+        self.broker = broker
+
+    def issueToken(self) -> str:
+        return self.setToken(self.broker.token(self.kis.appkey))
+
+    def refreshToken(self, before:timedelta=timedelta(0)) -> str:
+        # broker 가 만료 전에 다시 발급
+        return self.issueToken()
+
+    def invalidateToken(self, token:str) -> None:
+        super().invalidateToken(token)
+        self.broker.invalidate(self.kis.appkey, token)
+
+def account_domestic(broker, account:dict, symbols=None) -> Domestic:
+    '''
+    계좌 하나의 Domestic (토큰, 속도 제한은 broker 공유, HTTP 연결은 작업 프로세스별)
+    account: {'appkey', 'appsecret', 'account', 'mode', 'domain'(선택)}
+    '''
+    limiter = BrokerLimiter(broker, account['appkey'])
+    transport = KISTransport(account['domain'], limiter=limiter) if account.get('domain') else None
+    kis = KISTrade(account['appkey'], account['appsecret'], account['account'], account.get('mode', 's'),
+                   transport=transport, limiter=limiter)
+    return Domestic(kis, BrokerAuth(kis, broker), symbols)
+
+def _run_shard(address, authkey:bytes, accounts:list, task, args:tuple) -> dict:
+    # 작업 프로세스: 계좌마다 Domestic 을 만들고 스레드에서 task 실행
+    manager = BrokerManager(address=address, authkey=authkey)
+    manager.connect()
+    broker = manager.broker()
+
+    domestics = {account['account']: account_domestic(broker, account) for account in accounts}
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(domestics), thread_name_prefix='account') as executor:
+        futures = {name: executor.submit(task, domestic, *args) for name, domestic in domestics.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+
+    for domestic in domestics.values():
+        domestic.kis.transport.close()
+    return results
+
+class AccountRunner:
+    '''
+    여러 계좌 실행
+    broker 프로세스 하나가 앱키별 토큰, 속도 제한을 관리하고
+    작업 프로세스들이 계좌를 나눠서 계좌별 Domestic 으로 task 실행
+
+    ex)
+        def rebalance(domestic, targets):
+            return domestic.order_basket(targets)
+
+        with AccountRunner(accounts, workers=4) as runner:
+            results = runner.run(rebalance, targets)
+    '''
+
+    def __init__(self, accounts:list, workers:int=None, rate:float=None, token_cache:bool=True) -> None:
+        '''
+        accounts: [{'appkey', 'appsecret', 'account', 'mode', 'domain'(선택)}, ...]
+        workers: 작업 프로세스 수 (기본 min(계좌 수, CPU 수))
+        rate: 앱키 단위 초당 요청 수 (기본 RateLimiter.RATE[mode])
+        '''
+        self.accounts = accounts
+        self.workers = workers or min(len(accounts), os.cpu_count() or 1)
+        self.rate = rate
+        self.token_cache = token_cache
+        self.authkey = os.urandom(16)
+        self.manager = None
+        self.broker = None
+        self.executor = None
+
+    def start(self) -> 'AccountRunner':
+        self.manager = BrokerManager(authkey=self.authkey)
+        self.manager.start()
+        self.broker = self.manager.broker()
+        for account in self.accounts:
+            self.broker.register(account['appkey'], account['appsecret'], account.get('mode', 's'),
+                                 self.rate, account.get('domain'), self.token_cache)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def stop(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.manager is not None:
+            self.manager.shutdown()
+
+    def __enter__(self) -> 'AccountRunner':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def shards(self) -> list:
+        '''
+        작업 프로세스별 계좌 (같은 앱키 계좌는 같은 프로세스로 - 토큰, 연결 재사용)
+        앱키별로 묶은 뒤 계좌가 많은 묶음부터 계좌가 가장 적은 프로세스에 배정 (묶음은 나누지 않음)
+        '''
+        groups = {}
+        for account in self.accounts:
+            groups.setdefault(account['appkey'], []).append(account)
+
+        shards = [[] for _ in range(min(self.workers, len(groups)))]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(shards, key=len).extend(group)
+        return shards
+
+    def run(self, task, *args) -> dict:
+        '''
+        계좌마다 task(domestic, *args) 실행 (task, 인자, 반환값은 pickle 가능해야 함)
+        return: {계좌번호: 반환값 또는 예외}
+        '''
+        futures = [self.executor.submit(_run_shard, self.manager.address, self.authkey, shard, task, args)
+                   for shard in self.shards()]
+
+        results = {}
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    def report(self) -> dict:
+        return self.broker.report()
+
+def _order_able_task(domestic:Domestic, count:int) -> int:
+    # 벤치마크용 - 매수가능조회 count 번, 성공 횟수
+    return sum(1 for _ in range(count) if domestic.order_able('005930', 58000))
+
+if __name__ == '__main__':
+    # 벤치마크: python accounts.py (가상 서버, 앱키 2개 x 계좌 2개)
+    import time
+    from fake_kis import FakeKISServer
+
+    # 가상 서버는 앱키별 초당 20건 초과시 EGW00201
+    with FakeKISServer(latency=0.01, rate=20, prices={'005930': 58000}) as server:
+        for apps in (1, 2):
+            accounts = [{'appkey': f'appkey{i % apps}', 'appsecret': 'appsecret', 'account': f'0000000{i}-01',
+                         'mode': 'r', 'domain': server.url} for i in range(4)]
+            with AccountRunner(accounts, workers=2, token_cache=False) as runner:
+                runner.run(_order_able_task, 1)
+                server.counts.clear()
+
+                start = time.perf_counter()
+                results = runner.run(_order_able_task, 30)
+                elapsed = time.perf_counter() - start
+
+                ok = sum(r for r in results.values() if isinstance(r, int))
+                print(f'앱키 {apps}개, 계좌 4개: {ok} / {4 * 30} 성공, {ok / elapsed:6.1f} 건/초, '
+                      f'서버 요청 {sum(server.counts.values())}')
+
+    # BrokerLimiter.acquire 의 IPC 왕복 비용 (속도 제한에 걸리지 않는 rate 로 같은 프로세스 RateLimiter 와 비교)
+    count = 2000
+    accounts = [{'appkey': 'appkey', 'appsecret': 'appsecret', 'account': '00000000-01', 'mode': 'r'}]
+    with AccountRunner(accounts, rate=1_000_000, token_cache=False) as runner:
+        for name, limiter in (('RateLimiter', RateLimiter('r', 1_000_000)), ('BrokerLimiter', BrokerLimiter(runner.broker, 'appkey'))):
+            start = time.perf_counter()
+            for _ in range(count):
+                limiter.acquire()
+            print(f'{name}.acquire: {(time.perf_counter() - start) / count * 1e6:7.1f} us/건')
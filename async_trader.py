@@ -0,0 +1,629 @@
+'''한국투자증권 API asyncio 클라이언트'''
+
+import json
+import time
+import asyncio
+
+import aiohttp
+
+from trader import KISTrade, KISAuth, Domestic, RateLimiter, Metrics, KISError, RetryPolicy, CircuitBreaker, KISTransport
+from models import OpenOrder, Position, Records
+
+# 요청 전송 전 연결 실패 (ConnectionTimeoutError 는 aiohttp 3.10 부터, 이전 버전의 연결 timeout 은 timeout 으로 분류)
+_CONNECT_ERRORS = (aiohttp.ClientConnectorError,) + tuple(
+    getattr(aiohttp, name) for name in ('ConnectionTimeoutError',) if hasattr(aiohttp, name))
+
+class AsyncKISTransport:
+    '''
+    HTTP 연결관리 (aiohttp, keep-alive 연결 풀)
+    재시도, 경로별 차단, 조회 중복 요청은 KISTransport 와 같음
+    '''
+
+    HEDGE_MIN_COUNT = KISTransport.HEDGE_MIN_COUNT
+
+    def __init__(self, domain:str, pool_size:int=100, timeout:float=5.0, limiter:RateLimiter=None,
+                 metrics:Metrics=None, retry:RetryPolicy=None, breaker:CircuitBreaker=None,
+                 hedge:float=None, hedge_min:float=0.01, hedge_ratio:float=0.1) -> None:
+        '''
+        domain: API 도메인
+        pool_size: 동시 연결 수 제한
+        timeout: 요청별 기본 timeout (초)
+        limiter: 요청 속도 제한 (없으면 제한 없음)
+        metrics: 요청 계측 (기본 새 Metrics, KISTransport 와 같은 단계)
+        retry, breaker, hedge, hedge_min, hedge_ratio: KISTransport 참고
+        '''
+        self.domain = domain
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.limiter = limiter
+        self.metrics = metrics or Metrics()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min = hedge_min
+        self.hedge_ratio = hedge_ratio
+        self.hedge_tokens = 1.0
+        self.session = None
+
+    @staticmethod
+    async def _connect_start(session, context, params):
+        context.trace_request_ctx['connect_start'] = time.perf_counter()
+
+    @staticmethod
+    async def _connect_end(session, context, params):
+        timings = context.trace_request_ctx
+        timings['connect'] += time.perf_counter() - timings.pop('connect_start')
+
+    def getSession(self) -> aiohttp.ClientSession:
+        # ClientSession 은 실행중인 event loop 안에서 생성해야 함
+        if self.session is None or self.session.closed:
+            # 새 연결 (TCP + TLS handshake) 시간 측정
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_start.append(self._connect_start)
+            trace.on_connection_create_end.append(self._connect_end)
+
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector, trace_configs=[trace])
+        return self.session
+
+    async def request(self, method:str, path:str, timeout:float=None, **kwargs) -> dict:
+        '''
+        요청 전송 -> 응답 json (KISTransport.request 참고)
+        '''
+        tr = (kwargs.get('headers') or {}).get('tr_id') or path
+        idempotent = self.retry.idempotent(method, path)
+        attempt = 0
+        while True:
+            attempt += 1
+            res_json = None
+            try:
+                if not self.breaker.allow(path):
+                    raise KISError('circuit', path, sent=False)
+                if self.hedge is not None and method == 'GET':
+                    status, res_json = await self._hedged(tr, method, path, timeout, kwargs)
+                else:
+                    status, res_json = await self._request(method, path, timeout, **kwargs)
+                error = self.retry.classify(status, res_json)
+            except KISError as e:
+                error = e
+
+            if error is None:
+                self.breaker.success(path)
+                return res_json
+            if self.breaker.failure(path, error):
+                self.metrics.count(tr, 'circuit_open')
+
+            if not self.retry.should_retry(error, idempotent, attempt):
+                if res_json is not None:
+                    return res_json
+                raise error
+            self.metrics.count(tr, 'retry')
+            await asyncio.sleep(self.retry.backoff(attempt))
+
+    @staticmethod
+    def _classify(e:Exception) -> KISError:
+        # aiohttp 예외 분류 (분류할 수 없으면 None)
+        if isinstance(e, _CONNECT_ERRORS):
+            return KISError('connect', str(e), sent=False)
+        if isinstance(e, asyncio.TimeoutError):
+            return KISError('timeout', str(e) or type(e).__name__)
+        if isinstance(e, aiohttp.ClientError):
+            return KISError('network', str(e) or type(e).__name__)
+        if isinstance(e, ValueError):
+            return KISError('server', f'json 이 아닌 응답: {e}')
+        return None
+
+    def _hedge_delay(self, tr:str) -> float:
+        # 중복 요청까지 대기 (KISTransport._hedge_delay 참고, event loop 안에서만 사용하므로 잠금 없음)
+        delay = self.metrics.quantile(tr, 'total', self.hedge, self.HEDGE_MIN_COUNT)
+        self.hedge_tokens = min(self.hedge_tokens + self.hedge_ratio, 10.0)
+        if delay is None or self.hedge_tokens < 1:
+            return None
+        return max(delay, self.hedge_min)
+
+    async def _hedged(self, tr:str, method:str, path:str, timeout:float, kwargs:dict) -> tuple:
+        '''
+        조회 요청, 응답이 p(hedge) 보다 늦으면 같은 요청을 한 번 더 보내고 먼저 성공한 응답 반환 (늦은 요청은 취소)
+        '''
+        delay = self._hedge_delay(tr)
+        if delay is None:
+            return await self._request(method, path, timeout, **kwargs)
+
+        first = asyncio.ensure_future(self._request(method, path, timeout, **kwargs))
+        done, _ = await asyncio.wait([first], timeout=delay)
+        if done or self.hedge_tokens < 1:
+            return await first
+
+        self.hedge_tokens -= 1
+        self.metrics.count(tr, 'hedge')
+        second = asyncio.ensure_future(self._request(method, path, timeout, **kwargs))
+
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and self.retry.classify(*task.result()) is None:
+                        if task is second:
+                            self.metrics.count(tr, 'hedge_win')
+                        return task.result()
+            # 둘 다 실패하면 먼저 보낸 요청 결과로 재시도 여부 판단
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, method:str, path:str, timeout:float=None, **kwargs) -> tuple:
+        # 요청 1회 (속도 제한 대기, 계측) -> (HTTP status, 응답 json)
+        tr_id = (kwargs.get('headers') or {}).get('tr_id')
+        start = time.perf_counter()
+        queue_wait = 0.0
+        if self.limiter is not None:
+            queue_wait = await self.limiter.acquire_async(tr_id)
+
+        timings = {'queue': queue_wait, 'connect': 0.0}
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        sent = time.perf_counter()
+        try:
+            async with self.getSession().request(method, self.domain + path, timeout=client_timeout,
+                                                 trace_request_ctx=timings, **kwargs) as r:
+                headers_received = time.perf_counter()
+                data = await r.read()
+                received = time.perf_counter()
+                res_json = json.loads(data)
+        except Exception as e:
+            self.metrics.record(tr_id or path, {'queue': queue_wait, 'total': time.perf_counter() - start},
+                                error=type(e).__name__)
+            error = self._classify(e)
+            if error is None:
+                raise
+            raise error from e
+        parsed = time.perf_counter()
+
+        # ttfb = 요청 전송 ~ 응답 헤더 (새 연결 시간 제외)
+        timings['ttfb'] = max(headers_received - sent - timings['connect'], 0.0)
+        timings['read'] = received - headers_received
+        timings['parse'] = parsed - received
+        timings['total'] = parsed - start
+        self.metrics.record(tr_id or path, timings, res_json)
+
+        # 연속조회 여부 (KISTransport 는 Response.headers 로 확인)
+        if isinstance(res_json, dict):
+            res_json['tr_cont'] = r.headers.get('tr_cont', '')
+        return r.status, res_json
+
+    async def get(self, path:str, params:dict=None, headers:dict=None, timeout:float=None) -> dict:
+        return await self.request('GET', path, params=params, headers=headers, timeout=timeout)
+
+    async def post(self, path:str, headers:dict=None, data:str=None, timeout:float=None) -> dict:
+        return await self.request('POST', path, headers=headers, data=data, timeout=timeout)
+
+    async def warmup(self, connections:int=None) -> int:
+        '''
+        연결 미리 열기 (TCP + TLS handshake 선처리)
+        '''
+        n = min(connections or self.pool_size, self.pool_size)
+
+        async def _open():
+            try:
+                async with self.getSession().head(self.domain, timeout=aiohttp.ClientTimeout(total=self.timeout)):
+                    return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+
+        return sum(await asyncio.gather(*[_open() for _ in range(n)]))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+class AsyncKISAuth:
+    '''
+    인증관리 (asyncio)
+    토큰은 sync KISAuth 와 공유
+    '''
+
+    def __init__(self, kis:KISTrade, auth:KISAuth=None, transport:AsyncKISTransport=None) -> None:
+        '''
+        auth: 토큰을 공유할 KISAuth (없으면 새로 생성)
+        transport: 요청에 사용할 AsyncKISTransport (없으면 kis 의 속도 제한, 계측을 공유하여 생성)
+        '''
+        self.kis = kis
+        self.transport = transport or AsyncKISTransport(kis.domain, limiter=kis.limiter, metrics=kis.metrics)
+        self.auth = auth or KISAuth(kis)
+        self.lock = asyncio.Lock()
+
+    async def getToken(self) -> str:
+        if self.auth.tokenValid():
+            return self.auth.access_token
+
+        res_json = None
+        try:
+            # 동시에 만료된 요청들이 한 번만 발급받도록
+            async with self.lock:
+                if self.auth.tokenValid():
+                    return self.auth.access_token
+
+                # 파일 캐시는 프로세스간 잠금이 필요해서 sync KISAuth 로 처리
+                if self.auth.token_cache is not None:
+                    return await asyncio.to_thread(self.auth.getToken)
+
+                data = {
+                    'grant_type': 'client_credentials',
+                    **self.kis.getConfigs(),
+                }
+                res_json = await self.transport.post('/oauth2/tokenP', data=json.dumps(data))
+
+                return self.auth.setToken(res_json)
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            print(res_json)
+            return ''
+
+    async def getHashKey(self, body:dict) -> str:
+        res_json = None
+        try:
+            headers = {
+                **self.kis.getConfigs(),
+            }
+            res_json = await self.transport.post('/uapi/hashkey', headers=headers, data=json.dumps(body))
+
+            return res_json['HASH']
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            print(res_json)
+            return ''
+
+    async def signBody(self, body:dict) -> str:
+        '''
+        주문 body 의 hashkey (KISAuth 의 hashkey_mode, 보관중인 hashkey 공유)
+        발급 실패시 RuntimeError (hashkey 없이 주문하지 않음)
+        '''
+        if self.auth.hashkey_mode == 'skip':
+            return None
+
+        if self.auth.hashkey_mode == 'cache':
+            hashkey = self.auth.cachedHashKey(body)
+            if hashkey is not None:
+                return hashkey
+
+        hashkey = await self.getHashKey(body)
+        if not hashkey:
+            raise RuntimeError('hashkey 발급 실패')
+        if self.auth.hashkey_mode == 'cache':
+            self.auth.storeHashKey(body, hashkey)
+        return hashkey
+
+    async def prepareHashKey(self, body:dict) -> str:
+        '''
+        주문 전에 미리 hashkey 발급 (cache 모드에서 주문시 재사용)
+        '''
+        return await self.signBody(body)
+
+class AsyncDomestic(Domestic):
+    '''
+    국내주식 (asyncio)
+    Domestic 과 같은 메서드를 coroutine 으로 제공
+
+    ex)
+        domestic = AsyncDomestic(kis, AsyncKISAuth(kis, auth))
+        results = await asyncio.gather(*[domestic.order_able(s, p) for s, p in targets])
+    '''
+
+    def __init__(self, kis:KISTrade, auth:AsyncKISAuth, symbols=None, cache=None, journal=None) -> None:
+        super().__init__(kis, auth, symbols, cache, journal)
+        self.transport = auth.transport
+
+    async def _intent(self, order_type:str, body:dict, tag:str=None) -> int:
+        # fsync 대기는 스레드에서 (event loop 를 막지 않음)
+        if self.journal is None:
+            return None
+        return await asyncio.to_thread(self.journal.intent, order_type, body, tag)
+
+    async def _order_headers(self, tr_id:str, body:dict) -> dict:
+        with self.kis.metrics.timer(tr_id, 'sign'):
+            token, hashkey = await asyncio.gather(self.auth.getToken(), self.auth.signBody(body))
+        return self._headers(tr_id, token, hashkey)
+
+    async def _send(self, method:str, path:str, headers:dict, params:dict=None, body:dict=None) -> dict:
+        '''
+        요청 전송 (Domestic._send 참고)
+        '''
+        for retry in (False, True):
+            if method == 'GET':
+                res_json = await self.transport.get(path, params=params, headers=headers)
+            else:
+                res_json = await self.transport.post(path, headers=headers, data=json.dumps(body))
+
+            if retry or res_json.get('msg_cd') not in self.TOKEN_ERRORS:
+                return res_json
+
+            await asyncio.to_thread(self.auth.auth.invalidateToken, headers['authorization'])
+            headers = {**headers, 'authorization': await self.auth.getToken()}
+
+    async def _pages(self, path:str, tr_id:str, params:dict, rows):
+        '''
+        연속조회 응답을 행 단위로 반환 (Domestic._pages 참고)
+        '''
+        async def fetch(params, tr_cont):
+            headers = self._headers(tr_id, await self.auth.getToken())
+            headers['tr_cont'] = tr_cont
+            return await self._send('GET', path, headers, params=params)
+
+        task = asyncio.ensure_future(fetch(params, ''))
+        try:
+            for _ in range(self.MAX_PAGES):
+                res_json = await task
+                if not self._is_success(res_json):
+                    raise RuntimeError(f"{res_json['msg_cd']} {res_json['msg1']}")
+
+                task = None
+                if res_json['tr_cont'] in ('F', 'M'):
+                    params = {
+                        **params,
+                        'CTX_AREA_FK100': res_json['ctx_area_fk100'],
+                        'CTX_AREA_NK100': res_json['ctx_area_nk100'],
+                    }
+                    task = asyncio.ensure_future(fetch(params, 'N'))
+
+                for row in rows(res_json):
+                    yield row
+
+                if task is None:
+                    return
+
+            print(f'연속조회 {self.MAX_PAGES} 페이지 초과')
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def prepare_order(self, stock_id:str, quantity:int, order_division:str='01', price:int=0) -> dict:
+        '''
+        주문 body 를 미리 만들고 hashkey 발급 (Domestic.prepare_order 참고)
+        '''
+        body = self._stock_body(stock_id, quantity, order_division, price)
+        await self.auth.prepareHashKey(body)
+        return body
+
+    async def order_stock(self, stock_id:str, quantity:int, order_division:str='01', price:int=0, order_type='b', tag:str=None):
+        '''
+        주식 주문 (Domestic.order_stock 참고)
+        '''
+        assert len(stock_id) == 6, '주식 종목코드는 6자리입니다.'
+        if order_division != '01':
+            assert price != 0, '시장가가 아닐 경우 price는 필수값입니다.'
+        if not self._check_symbol(stock_id):
+            return False
+
+        try:
+            body = self._stock_body(stock_id, quantity, order_division, price)
+            headers = await self._order_headers(self.TRAIDING_ID[self.kis.mode][order_type], body)
+            entry = await self._intent(order_type, body, tag)
+
+            res_json = await self._send('POST', self.PATH['order'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
+                return False
+
+            return self._record(res_json, body, order_type, entry)
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return False
+
+    async def order_basket(self, orders:list, sell_first:bool=True, tag:str=None) -> dict:
+        '''
+        여러 종목 주문 (Domestic.order_basket 참고)
+        '''
+        legs, failures = self._basket_legs(orders)
+        receipts = [None] * len(orders)
+        if not legs:
+            return {'receipts': receipts, 'failures': failures}
+
+        with self.kis.metrics.timer('basket', 'sign'):
+            token = await self.auth.getToken()
+            hashkeys = await asyncio.gather(*[self.auth.signBody(leg[2]) for leg in legs], return_exceptions=True)
+        legs, hashkeys = self._basket_signed(legs, hashkeys, failures)
+        entries = await asyncio.to_thread(self._basket_intents, legs, tag)
+
+        async def submit(leg, hashkey):
+            index, order_type, body = leg
+            headers = self._headers(self.TRAIDING_ID[self.kis.mode][order_type], token, hashkey)
+            try:
+                res_json = await self._send('POST', self.PATH['order'], headers, body=body)
+            except Exception as e:
+                return index, None, self._basket_failure(index, body['PDNO'], order_type, type(e).__name__, str(e))
+            if not self._is_success(res_json):
+                self._reject(entries.get(index), res_json)
+                return index, None, self._basket_failure(index, body['PDNO'], order_type, res_json['msg_cd'], res_json['msg1'])
+            return index, self._record(res_json, body, order_type, entries.get(index)), None
+
+        with self.kis.metrics.timer('basket', 'total'):
+            for group in self._basket_groups(legs, sell_first):
+                for index, receipt, failure in await asyncio.gather(*[submit(leg, hashkeys[leg[0]]) for leg in group]):
+                    receipts[index] = receipt
+                    if failure is not None:
+                        failures.append(failure)
+
+        failures.sort(key=lambda failure: failure['index'])
+        return {'receipts': receipts, 'failures': failures}
+
+    async def iter_changable(self):
+        '''
+        정정취소가능 주문 조회 - 전체 페이지를 행 단위로 반환 (async generator, 모의투자 미지원)
+        '''
+        assert self.kis.mode == 'r', '정정취소가능 주문 조회는 실전투자만 지원합니다.'
+
+        async for row in self._pages(self.PATH['changable'], self.TRAIDING_ID[self.kis.mode]['changable'],
+                                     self._changable_params(), self._changable_rows):
+            yield row
+
+    async def order_changable(self):
+        '''
+        정정취소가능 주문 조회 (모의투자 미지원)
+        '''
+        assert self.kis.mode == 'r', '정정취소가능 주문 조회는 실전투자만 지원합니다.'
+
+        try:
+            hit, result, generation = self._cache_get('changable')
+            if hit:
+                return result
+
+            result = Records(OpenOrder, [row async for row in self.iter_changable()])
+            self._cache_put('changable', result, generation)
+            return result
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return []
+
+    async def order_change(self, org_id: str, order_id: str, quantity:int=0, price:int=0, order_division:str='00'):
+        '''
+        주문 정정 (Domestic.order_change 참고)
+        '''
+        try:
+            body = self._change_body(org_id, order_id, quantity, price, order_division)
+            headers = await self._order_headers(self.TRAIDING_ID[self.kis.mode]['c'], body)
+            entry = await self._intent('c', body)
+
+            res_json = await self._send('POST', self.PATH['rvsecncl'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
+                return False
+
+            return self._record(res_json, body, 'c', entry)
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return False
+
+    async def order_cancle(self, org_id: str, order_id: str, quantity:int=0):
+        '''
+        주문 취소 (Domestic.order_cancle 참고)
+        '''
+        try:
+            body = self._cancle_body(org_id, order_id, quantity)
+            headers = await self._order_headers(self.TRAIDING_ID[self.kis.mode]['c'], body)
+            entry = await self._intent('c', body)
+
+            res_json = await self._send('POST', self.PATH['rvsecncl'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
+                return False
+
+            return self._record(res_json, body, 'c', entry)
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return False
+
+    async def iter_asset(self):
+        '''
+        주식잔고조회 - 전체 페이지를 행 단위로 반환 (async generator)
+        '''
+        async for row in self._pages(self.PATH['asset'], self.TRAIDING_ID[self.kis.mode]['a'],
+                                     self._asset_params(), self._asset_rows):
+            yield row
+
+    async def order_asset(self):
+        '''
+        주식잔고조회
+        '''
+        try:
+            hit, result, generation = self._cache_get('a')
+            if hit:
+                return result
+
+            result = Records(Position, [row async for row in self.iter_asset()])
+            self._cache_put('a', result, generation)
+            return result
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return []
+
+    async def order_able(self, stock_id: str, target_price: int):
+        '''
+        매수가능조회
+        '''
+        try:
+            hit, result, generation = self._cache_get('able', stock_id, int(target_price))
+            if hit:
+                return result
+
+            params = self._able_params(stock_id, target_price)
+            headers = self._headers(self.TRAIDING_ID[self.kis.mode]['able'], await self.auth.getToken())
+
+            res_json = await self._send('GET', self.PATH['able'], headers, params=params)
+            if not self._is_success(res_json):
+                return False
+
+            result = self._able_result(res_json)
+            self._cache_put('able', result, generation, stock_id, int(target_price))
+            return result
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return False
+
+    async def recover(self) -> dict:
+        '''
+        재시작시 주문 journal 로 미체결 주문 복원 (Domestic.recover 참고)
+        '''
+        assert self.journal is not None, '주문 journal 이 없습니다.'
+
+        state = self.journal.replay()
+        self.book.restore(state['events'])
+
+        rows = None
+        if state['unresolved'] and self.kis.mode == 'r':
+            try:
+                rows = [row async for row in self.iter_changable()]
+            except Exception as e:
+                print(f'정정취소가능 주문 조회 실패: {e}')
+        return self._resolve(state['unresolved'], rows)
+
+    async def reconcile_book(self) -> dict:
+        '''
+        조회 API 로 주문 상태 (self.book) 맞추기 (Domestic.reconcile_book 참고)
+        '''
+        try:
+            diff = {'positions': self.book.reconcile_positions([row async for row in self.iter_asset()])}
+            if self.kis.mode == 'r':
+                diff['orders'] = self.book.reconcile_orders([row async for row in self.iter_changable()])
+            return diff
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return {}
@@ -0,0 +1,642 @@
+'''백테스트 - 기록된 봉 재생, 모의 체결 (SimulatedDomestic), 프로세스 병렬 실행'''
+
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta
+
+import numpy as np
+
+from trader import KISTrade, Domestic, OrderBook
+from runtime import Strategy
+from tick_store import TickStore, BAR_DTYPE
+
+# 모의 체결 오류 (msg_cd, msg1)
+ERRORS = {
+    'cash': ('APBK0952', '주문가능금액을 초과 했습니다'),
+    'quantity': ('APBK0986', '주문가능수량을 초과 했습니다'),
+    'order': ('APBK0904', '원주문 정보가 존재하지 않습니다'),
+    'price': ('APBK0918', '시세가 없는 종목입니다'),
+}
+
+class FeeModel:
+    '''
+    수수료, 세금
+    '''
+
+    def __init__(self, commission:float=0.00015, tax:float=0.0018) -> None:
+        '''
+        commission: 매매 수수료율
+        tax: 매도시 거래세율
+        '''
+        self.commission = commission
+        self.tax = tax
+
+    def fee(self, order_type:str, amount:float) -> float:
+        return amount * (self.commission + (self.tax if order_type == 's' else 0))
+
+class FillModel:
+    '''
+    체결 방식
+    시장가: 주문 다음 봉 시가 +- slippage, 지정가: 봉 안에서 가격에 닿으면 지정가 (시가가 더 유리하면 시가)
+    '''
+
+    def __init__(self, slippage:float=0.0005, volume_limit:float=None) -> None:
+        '''
+        slippage: 시장가 체결 가격 불리한 쪽으로 비율
+        volume_limit: 봉 거래량 중 체결 가능 비율 (없으면 전량 체결)
+        '''
+        self.slippage = slippage
+        self.volume_limit = volume_limit
+
+    def fill(self, order:dict, open_:float, high:float, low:float, volume:int) -> tuple:
+        '''
+        return: (수량, 가격), 체결 안 되면 None
+        '''
+        buy = order['order_type'] == 'b'
+        if order['order_division'] == '01':
+            price = open_ * (1 + self.slippage if buy else 1 - self.slippage)
+        elif buy and low <= order['price']:
+            price = min(open_, order['price'])
+        elif not buy and high >= order['price']:
+            price = max(open_, order['price'])
+        else:
+            return None
+
+        quantity = order['remaining']
+        if self.volume_limit is not None:
+            quantity = min(quantity, int(volume * self.volume_limit))
+        return (quantity, price) if quantity > 0 else None
+
+class SimulatedExchange:
+    '''
+    모의 체결 - 계좌 하나의 예수금, 잔고, 미체결 주문
+    요청은 KIS API 응답 형식(dict) 으로 처리 (SimulatedDomestic, 가상 서버에서 사용)
+    '''
+
+    def __init__(self, cash:float=10_000_000, fill:FillModel=None, fee:FeeModel=None, names:dict=None,
+                 book:OrderBook=None) -> None:
+        '''
+        cash: 예수금
+        names: 종목코드 -> 종목명 (잔고 조회용)
+        book: 체결을 알려줄 주문 상태 (실시간 체결통보 대신)
+        '''
+        self.cash = cash
+        self.fill_model = fill or FillModel()
+        self.fee_model = fee or FeeModel()
+        self.names = names or {}
+        self.book = book
+
+        self.positions = {} # 종목코드 -> {'quantity', 'avg_price'}
+        self.orders = {} # 주문번호 -> 미체결 주문
+        self.fills = []
+        self.fees = 0.0
+        self.seq = 0
+        self.now = datetime.now()
+        self.lock = threading.RLock()
+
+        # 종목별 현재가 (set_universe 로 행 번호 지정, 나머지는 dict)
+        self.index = {}
+        self.last = np.zeros(0)
+        self.last_other = {}
+
+    ######################################## 시세
+
+    def set_universe(self, stocks:list) -> None:
+        self.index = {s: i for i, s in enumerate(stocks)}
+        self.last = np.full(len(stocks), np.nan)
+
+    def price(self, stock_id:str) -> float:
+        row = self.index.get(stock_id)
+        price = self.last_other.get(stock_id, np.nan) if row is None else self.last[row]
+        return None if np.isnan(price) else float(price)
+
+    def set_price(self, stock_id:str, price:float) -> None:
+        row = self.index.get(stock_id)
+        if row is None:
+            self.last_other[stock_id] = price
+        else:
+            self.last[row] = price
+
+    def step(self, now:datetime, rows:np.ndarray, bars:np.ndarray) -> None:
+        '''
+        같은 시각의 봉 (rows: set_universe 행 번호, 오름차순) -> 미체결 주문 체결, 현재가 갱신
+        '''
+        with self.lock:
+            self.now = now
+            if self.orders:
+                results = {}
+                for order in list(self.orders.values()):
+                    row = self.index.get(order['stock_id'])
+                    if row is None or order['ts'] >= now:
+                        continue
+                    i = np.searchsorted(rows, row)
+                    if i < len(rows) and rows[i] == row:
+                        bar = bars[i]
+                        results[order['order_id']] = self.fill_model.fill(
+                            order, float(bar['open']), float(bar['high']), float(bar['low']), int(bar['volume']))
+
+                for order_id, result in results.items():
+                    if result is not None:
+                        self._fill(self.orders[order_id], *result)
+
+            self.last[rows] = bars['close']
+
+    def _fill(self, order:dict, quantity:int, price:float) -> None:
+        amount = quantity * price
+        fee = self.fee_model.fee(order['order_type'], amount)
+        self.fees += fee
+
+        stock_id = order['stock_id']
+        position = self.positions.setdefault(stock_id, {'quantity': 0, 'avg_price': 0.0})
+        if order['order_type'] == 'b':
+            self.cash -= amount + fee
+            held = position['quantity'] + quantity
+            position['avg_price'] = (position['avg_price'] * position['quantity'] + amount) / held
+            position['quantity'] = held
+        else:
+            self.cash += amount - fee
+            position['quantity'] -= quantity
+            if position['quantity'] == 0:
+                del self.positions[stock_id]
+
+        order['filled'] += quantity
+        order['remaining'] -= quantity
+        if order['remaining'] == 0:
+            del self.orders[order['order_id']]
+
+        if self.book is not None:
+            self.book.on_fill(order['order_id'], quantity, price)
+        self.fills.append({
+            'time': self.now,
+            'order_id': order['order_id'],
+            'stock_id': stock_id,
+            'order_type': order['order_type'],
+            'quantity': quantity,
+            'price': price,
+            'fee': fee,
+        })
+
+    ######################################## 계좌
+
+    def _reserved(self) -> float:
+        # 미체결 매수 주문에 묶인 금액
+        total = 0.0
+        for order in self.orders.values():
+            if order['order_type'] == 'b':
+                price = order['price'] or (self.price(order['stock_id']) or 0) * (1 + self.fill_model.slippage)
+                total += order['remaining'] * price * (1 + self.fee_model.commission)
+        return total
+
+    def available_cash(self) -> float:
+        with self.lock:
+            return self.cash - self._reserved()
+
+    def sellable(self, stock_id:str) -> int:
+        with self.lock:
+            held = self.positions.get(stock_id, {'quantity': 0})['quantity']
+            pending = sum(o['remaining'] for o in self.orders.values()
+                          if o['stock_id'] == stock_id and o['order_type'] == 's')
+            return held - pending
+
+    def equity(self) -> float:
+        '''
+        예수금 + 보유종목 평가금액
+        '''
+        value = self.cash
+        for stock_id, position in self.positions.items():
+            price = self.price(stock_id)
+            value += position['quantity'] * (position['avg_price'] if price is None else price)
+        return value
+
+    ######################################## KIS API 응답
+
+    @staticmethod
+    def _error(name:str) -> dict:
+        msg_cd, msg1 = ERRORS[name]
+        return {'rt_cd': '1', 'msg_cd': msg_cd, 'msg1': msg1}
+
+    def _accepted(self, order_id:str) -> dict:
+        return {
+            'rt_cd': '0',
+            'msg_cd': 'APBK0013',
+            'msg1': '주문 전송 완료 되었습니다.',
+            'output': {
+                'KRX_FWDG_ORD_ORGNO': '00950',
+                'ODNO': order_id,
+                'ORD_TMD': self.now.strftime('%H%M%S'),
+            },
+        }
+
+    def order(self, body:dict, order_type:str) -> dict:
+        '''
+        주식 주문 (order-cash)
+        '''
+        with self.lock:
+            stock_id = body['PDNO']
+            quantity = int(body['ORD_QTY'])
+            price = int(body['ORD_UNPR'])
+            order_division = body['ORD_DVSN']
+            if order_division == '01':
+                price = 0
+
+            if order_type == 'b':
+                estimate = price or (self.price(stock_id) or 0) * (1 + self.fill_model.slippage)
+                if estimate == 0:
+                    return self._error('price')
+                if quantity * estimate * (1 + self.fee_model.commission) > self.available_cash():
+                    return self._error('cash')
+            elif quantity > self.sellable(stock_id):
+                return self._error('quantity')
+
+            self.seq += 1
+            order_id = str(self.seq).zfill(10)
+            self.orders[order_id] = {
+                'order_id': order_id,
+                'original_id': '',
+                'stock_id': stock_id,
+                'order_type': order_type,
+                'order_division': order_division,
+                'quantity': quantity,
+                'price': price,
+                'filled': 0,
+                'remaining': quantity,
+                'ts': self.now,
+            }
+            return self._accepted(order_id)
+
+    def revise(self, body:dict) -> dict:
+        '''
+        주문 정정, 취소 (order-rvsecncl)
+        '''
+        with self.lock:
+            origin = self.orders.get(body['ORGN_ODNO'])
+            if origin is None:
+                return self._error('order')
+
+            quantity = origin['remaining'] if body['QTY_ALL_ORD_YN'] == 'Y' else min(int(body['ORD_QTY']), origin['remaining'])
+            origin['remaining'] -= quantity
+            origin['quantity'] -= quantity
+            if origin['remaining'] == 0:
+                del self.orders[origin['order_id']]
+
+            self.seq += 1
+            order_id = str(self.seq).zfill(10)
+            if body['RVSE_CNCL_DVSN_CD'] == '01':
+                self.orders[order_id] = {
+                    **origin,
+                    'order_id': order_id,
+                    'original_id': origin['order_id'],
+                    'order_division': body['ORD_DVSN'],
+                    'quantity': quantity,
+                    'price': 0 if body['ORD_DVSN'] == '01' else int(body['ORD_UNPR']),
+                    'filled': 0,
+                    'remaining': quantity,
+                    'ts': self.now,
+                }
+            return self._accepted(order_id)
+
+    def balance(self) -> dict:
+        '''
+        주식잔고조회 (inquire-balance)
+        '''
+        with self.lock:
+            rows = []
+            for stock_id, position in self.positions.items():
+                price = self.price(stock_id) or position['avg_price']
+                rows.append({
+                    'pdno': stock_id,
+                    'prdt_name': self.names.get(stock_id, stock_id),
+                    'hldg_qty': str(position['quantity']),
+                    'pchs_avg_pric': f"{position['avg_price']:.4f}",
+                    'pchs_amt': str(round(position['quantity'] * position['avg_price'])),
+                    'evlu_amt': str(round(position['quantity'] * price)),
+                })
+            return {
+                'rt_cd': '0', 'msg_cd': 'KIOK0000', 'msg1': '조회가 완료되었습니다',
+                'ctx_area_fk100': '', 'ctx_area_nk100': '',
+                'output1': rows,
+                'output2': [{'dnca_tot_amt': str(round(self.cash)), 'tot_evlu_amt': str(round(self.equity()))}],
+            }
+
+    def changable(self) -> dict:
+        '''
+        정정취소가능 주문 조회 (inquire-psbl-rvsecncl)
+        '''
+        with self.lock:
+            return {
+                'rt_cd': '0', 'msg_cd': 'KIOK0000', 'msg1': '조회가 완료되었습니다',
+                'ctx_area_fk100': '', 'ctx_area_nk100': '',
+                'output': [{
+                    'ord_gno_brno': '00950',
+                    'odno': o['order_id'],
+                    'orgn_odno': o['original_id'],
+                    'ord_dvsn_name': '시장가' if o['order_division'] == '01' else '지정가',
+                    'pdno': o['stock_id'],
+                    'prdt_name': self.names.get(o['stock_id'], o['stock_id']),
+                    'ord_qty': str(o['quantity']),
+                    'ord_unpr': str(o['price']),
+                    'ord_tmd': o['ts'].strftime('%H%M%S'),
+                    'psbl_qty': str(o['remaining']),
+                    'sll_buy_dvsn_cd': '02' if o['order_type'] == 'b' else '01',
+                } for o in self.orders.values()],
+            }
+
+    def able(self, params:dict) -> dict:
+        '''
+        매수가능조회 (inquire-psbl-order)
+        '''
+        price = int(params['ORD_UNPR']) or self.price(params['PDNO']) or 0
+        cash = max(self.available_cash(), 0)
+        quantity = int(cash // (price * (1 + self.fee_model.commission))) if price else 0
+        return {
+            'rt_cd': '0', 'msg_cd': 'KIOK0000', 'msg1': '조회가 완료되었습니다',
+            'output': {
+                'ord_psbl_cash': str(round(cash)),
+                'max_buy_amt': str(round(quantity * price)),
+                'max_buy_qty': str(quantity),
+            },
+        }
+
+    def handle(self, method:str, path:str, tr_id:str, params:dict=None, body:dict=None) -> dict:
+        '''
+        Domestic.PATH, TRAIDING_ID 기준으로 요청 처리
+        '''
+        if path == Domestic.PATH['order']:
+            order_type = 's' if tr_id in (Domestic.TRAIDING_ID['r']['s'], Domestic.TRAIDING_ID['s']['s']) else 'b'
+            return self.order(body, order_type)
+        if path == Domestic.PATH['rvsecncl']:
+            return self.revise(body)
+        if path == Domestic.PATH['asset']:
+            return self.balance()
+        if path == Domestic.PATH['changable']:
+            return self.changable()
+        if path == Domestic.PATH['able']:
+            return self.able(params)
+        raise ValueError(f'{method} {path}: 지원하지 않는 요청입니다.')
+
+class SimulatedAuth:
+    '''
+    모의 체결용 인증 (토큰, hashkey 발급 없음)
+    '''
+
+    def getToken(self) -> str:
+        return 'Bearer simulated'
+
+    def invalidateToken(self, token:str) -> None:
+        pass
+
+    def getTokenAndHashKey(self, body:dict) -> tuple:
+        return self.getToken(), None
+
+    def signBody(self, body:dict) -> str:
+        return None
+
+    def prepareHashKey(self, body:dict) -> str:
+        return None
+
+class SimulatedDomestic(Domestic):
+    '''
+    모의 체결 국내주식 - Domestic 과 같은 메서드, 요청은 SimulatedExchange 가 처리
+    전략 코드는 Domestic 과 그대로 사용 (order_stock, order_able, order_asset, book ...)
+    '''
+
+    def __init__(self, exchange:SimulatedExchange=None, account:str='00000000-01', symbols=None) -> None:
+        # 실전 모드 (정정취소가능 주문 조회 사용)
+        super().__init__(KISTrade('simulated', 'simulated', account, 'r'), SimulatedAuth(), symbols)
+        self.exchange = exchange or SimulatedExchange()
+        self.exchange.book = self.book
+
+    def _send(self, method:str, path:str, headers:dict, params:dict=None, body:dict=None) -> dict:
+        res_json = self.exchange.handle(method, path, headers['tr_id'], params, body)
+        res_json['tr_cont'] = 'D'
+        return res_json
+
+    def _pages(self, path:str, tr_id:str, params:dict, rows):
+        # 한 페이지로 응답 (다음 페이지 미리 요청 스레드 없이)
+        res_json = self._send('GET', path, self._headers(tr_id, self.auth.getToken()), params=params)
+        if not self._is_success(res_json):
+            raise RuntimeError(f"{res_json['msg_cd']} {res_json['msg1']}")
+        yield from rows(res_json)
+
+class Backtest:
+    '''
+    봉 재생 -> 전략 (runtime.Strategy) 실행
+    같은 시각의 봉을 모아서: 미체결 체결 -> 보조지표 갱신 -> on_signal -> on_tick
+
+    ex)
+        result = Backtest(MyStrategy, data, params={'quantity': 10}, indicators={'crossovers': [('sma5', 'sma20')]}).run()
+    '''
+
+    def __init__(self, strategy, data:dict, params:dict=None, cash:float=10_000_000, fill:FillModel=None,
+                 fee:FeeModel=None, indicators:dict=None, symbols=None) -> None:
+        '''
+        strategy: strategy(domestic, **params) -> Strategy
+        data: 종목코드 -> 봉 배열 (tick_store.BAR_DTYPE, 시간순)
+        indicators: IndicatorEngine 인자 (있으면 봉 종가로 갱신, 교차 signal 을 on_signal 로 전달)
+        '''
+        self.data = {s: bars for s, bars in data.items() if len(bars)}
+        self.stocks = list(self.data)
+        self.params = params or {}
+        self.signals = deque()
+
+        self.exchange = SimulatedExchange(cash, fill, fee)
+        self.exchange.set_universe(self.stocks)
+        self.domestic = SimulatedDomestic(self.exchange, symbols=symbols)
+        self.strategy = strategy(self.domestic, **self.params)
+
+        self.indicators = None
+        if indicators is not None:
+            from indicators import IndicatorEngine
+            self.indicators = IndicatorEngine(self.stocks, signals=self.signals, **indicators)
+
+        self.cash = cash
+        self.now = None
+
+    def _merge(self) -> tuple:
+        # 전 종목 봉을 시간순으로 (같은 시각은 종목 행 번호 순)
+        bars = np.concatenate([self.data[s] for s in self.stocks]) if self.stocks else np.zeros(0, dtype=BAR_DTYPE)
+        rows = np.concatenate([np.full(len(self.data[s]), i) for i, s in enumerate(self.stocks)]) if self.stocks else np.zeros(0, dtype=np.int64)
+        order = np.lexsort((rows, bars['ts']))
+        bars, rows = bars[order], rows[order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bars['ts'])) + 1)) if len(bars) else np.zeros(0, dtype=np.int64)
+        ends = np.append(starts[1:], len(bars))
+        return bars, rows, starts, ends
+
+    def _drain(self) -> None:
+        while self.signals:
+            signal = self.signals.popleft()
+            self.strategy.on_signal(self, signal)
+
+    def run(self) -> dict:
+        bars, rows, starts, ends = self._merge()
+        equity = np.zeros(len(starts))
+        day = None
+
+        for g, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            ts = int(bars['ts'][start])
+            self.now = datetime.fromtimestamp(ts / 1e9)
+            if self.now.date() != day:
+                if day is not None:
+                    self.strategy.on_session_close(self)
+                day = self.now.date()
+                if self.indicators is not None:
+                    self.indicators.reset_session()
+                self.strategy.on_session_open(self)
+
+            group, group_rows = bars[start:end], rows[start:end]
+            self.exchange.step(self.now, group_rows, group)
+            if self.indicators is not None:
+                self.indicators.update(group_rows, group['close'], group['volume'], ts)
+                self._drain()
+            self.strategy.on_tick(self, self.now)
+            self._drain()
+
+            equity[g] = self.exchange.equity()
+
+        if day is not None:
+            self.strategy.on_session_close(self)
+        return self._result(bars['ts'][starts], equity)
+
+    def _result(self, ts:np.ndarray, equity:np.ndarray) -> dict:
+        final = float(equity[-1]) if len(equity) else self.cash
+        peak = np.maximum.accumulate(equity) if len(equity) else equity
+        drawdown = float(((peak - equity) / peak).max()) if len(equity) else 0.0
+        return {
+            'params': self.params,
+            'stocks': self.stocks,
+            'bars': sum(len(b) for b in self.data.values()),
+            'final_equity': final,
+            'return': final / self.cash - 1,
+            'max_drawdown': drawdown,
+            'fills': len(self.exchange.fills),
+            'fees': self.exchange.fees,
+            'ts': ts,
+            'equity': equity,
+        }
+
+class StoreLoader:
+    '''
+    TickStore 에서 봉 읽기 (프로세스로 넘길 수 있도록 경로만 보관)
+    '''
+
+    def __init__(self, root:str, days:list, interval:float=60) -> None:
+        self.root = root
+        self.days = [d if isinstance(d, date) else date.fromisoformat(d) for d in days]
+        self.interval = interval
+
+    def __call__(self, stocks:list) -> dict:
+        store = TickStore(self.root)
+        return {s: np.concatenate([store.bars(s, self.interval, day=d) for d in self.days] or
+                                  [np.zeros(0, dtype=BAR_DTYPE)]) for s in stocks}
+
+def _run_job(job:dict) -> dict:
+    data = job['load'](job['stocks'])
+    return Backtest(job['strategy'], data, job.get('params'), **job.get('options', {})).run()
+
+def run_parallel(jobs:list, workers:int=None) -> list:
+    '''
+    여러 백테스트를 프로세스 풀에서 실행 (결과는 jobs 순서)
+    job: {'strategy', 'load': load(stocks) -> data, 'stocks', 'params', 'options': Backtest 인자}
+    strategy, load 는 모듈 최상위에 정의 (pickle 가능)
+    '''
+    if workers == 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_run_job, jobs))
+
+def sweep(strategy, grid:dict, load, stocks:list, workers:int=None, **options) -> list:
+    '''
+    파라미터 조합별 백테스트 ex) sweep(MyStrategy, {'quantity': [1, 10], 'stop': [0.02, 0.05]}, load, stocks)
+    '''
+    names = list(grid)
+    jobs = [{'strategy': strategy, 'load': load, 'stocks': stocks, 'params': dict(zip(names, values)), 'options': options}
+            for values in itertools.product(*grid.values())]
+    return run_parallel(jobs, workers)
+
+def per_symbol(strategy, load, stocks:list, workers:int=None, chunk:int=1, params:dict=None, **options) -> list:
+    '''
+    종목(묶음)별로 나눠서 백테스트 (종목 간 자금 공유 없음)
+    '''
+    jobs = [{'strategy': strategy, 'load': load, 'stocks': stocks[i:i + chunk], 'params': params, 'options': options}
+            for i in range(0, len(stocks), chunk)]
+    return run_parallel(jobs, workers)
+
+class CrossStrategy(Strategy):
+    '''
+    예제 전략 - 이동평균 골든크로스 매수, 데드크로스 매도 (Backtest indicators={'crossovers': [('sma5', 'sma20')]})
+    '''
+
+    def __init__(self, domestic:Domestic, quantity:int=1) -> None:
+        self.domestic = domestic
+        self.quantity = quantity
+
+    def on_signal(self, engine, signal):
+        if signal['type'] != 'cross':
+            return
+        stock_id = signal['stock_id']
+        held = self.domestic.book.position(stock_id)
+        if signal['direction'] == 'up' and held == 0 and not self.domestic.book.open_orders(stock_id):
+            self.domestic.order_stock(stock_id, self.quantity)
+        elif signal['direction'] == 'down' and held > 0:
+            self.domestic.order_stock(stock_id, held, order_type='s')
+
+class _SyntheticLoader:
+    '''
+    벤치마크용 분봉 생성 (종목별 random walk)
+    '''
+
+    def __init__(self, days:int) -> None:
+        self.days = days
+
+    def __call__(self, stocks:list) -> dict:
+        data = {}
+        for stock_id in stocks:
+            rng = np.random.default_rng(int(stock_id))
+            opens = [int((datetime(2023, 1, 2, 9) + timedelta(days=d)).timestamp()) * 1_000_000_000 for d in range(self.days)]
+            ts = (np.array(opens)[:, None] + np.arange(390) * 60_000_000_000).ravel()
+            close = 10000 * np.exp(np.cumsum(rng.normal(0, 0.001, len(ts))))
+            bars = np.zeros(len(ts), dtype=BAR_DTYPE)
+            bars['ts'] = ts
+            bars['open'] = np.r_[close[0], close[:-1]]
+            bars['high'] = np.maximum(bars['open'], close) * 1.001
+            bars['low'] = np.minimum(bars['open'], close) * 0.999
+            bars['close'] = close
+            bars['volume'] = rng.integers(100, 10000, len(ts))
+            bars['count'] = 10
+            data[stock_id] = bars
+        return data
+
+if __name__ == '__main__':
+    # 벤치마크: python backtest.py
+    import os
+    import time
+
+    stocks = [f'{i:06d}' for i in range(1, 101)]
+    days = 20
+    load = _SyntheticLoader(days)
+    options = {'indicators': {'crossovers': [('sma5', 'sma20')]}}
+    total_bars = len(stocks) * days * 390
+
+    start = time.perf_counter()
+    result = run_parallel([{'strategy': CrossStrategy, 'load': load, 'stocks': stocks, 'options': options}], 1)[0]
+    serial = time.perf_counter() - start
+    print(f'all symbols, 1 process   {total_bars:,} bars  {serial:6.2f} s  {total_bars / serial:12,.0f} bars/s  '
+          f'fills {result["fills"]}  return {result["return"]:+.2%}')
+
+    workers = os.cpu_count()
+    start = time.perf_counter()
+    results = per_symbol(CrossStrategy, load, stocks, workers, chunk=25, **options)
+    parallel = time.perf_counter() - start
+    print(f'per 25 symbols, {workers} procs  {total_bars:,} bars  {parallel:6.2f} s  {total_bars / parallel:12,.0f} bars/s  '
+          f'fills {sum(r["fills"] for r in results)}')
+
+    # 1년 (250일) 분봉, 코스피 + 코스닥 2,500 종목 예상 시간
+    year_bars = 2500 * 250 * 390
+    print(f'1 year x 2,500 symbols estimate: {year_bars / (total_bars / parallel) / 60:.1f} min with {workers} procs')
+
+    start = time.perf_counter()
+    results = sweep(CrossStrategy, {'quantity': [1, 5, 10, 20]}, load, stocks[:20], workers, **options)
+    print(f'sweep 4 params x 20 symbols  {time.perf_counter() - start:6.2f} s  '
+          f'returns {[round(r["return"], 4) for r in results]}')
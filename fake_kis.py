@@ -0,0 +1,377 @@
+'''가상 KIS API 서버 (오프라인 테스트, 지연시간 벤치마크)'''
+
+import json
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trader import TokenBucket, Domestic
+from backtest import SimulatedExchange
+
+# 요청 경로 -> Domestic.PATH 항목
+PATH_NAMES = {path: name for name, path in Domestic.PATH.items()}
+
+# 연속조회 응답의 목록 칼럼
+LIST_OUTPUT = {'asset': 'output1', 'changable': 'output'}
+
+class FakeKISServer:
+    '''
+    가상 KIS API 서버
+    토큰, hashkey, 주문 (order-cash, order-rvsecncl), 조회 (잔고, 매수가능, 정정취소가능)
+    주문, 조회는 backtest.SimulatedExchange 가 처리
+
+    ex)
+        with FakeKISServer(latency=0.005, prices={'005930': 58000}) as server:
+            kis = KISTrade(appkey, appsecret, account, 'r', transport=KISTransport(server.url))
+    '''
+
+    def __init__(self, port:int=0, latency:float=0.0, jitter:float=0.0, rate:float=None, page_size:int=None,
+                 errors:dict=None, token_ttl:float=86400, prices:dict=None, cash:float=100_000_000,
+                 seed:int=0, tail:tuple=None) -> None:
+        '''
+        port: 0 이면 빈 포트
+        latency, jitter: 응답 지연 (초), latency 는 {'order': 0.01, ...} 처럼 Domestic.PATH 항목별로도 지정
+        rate: 앱키별 초당 요청 수 제한 (넘으면 EGW00201)
+        page_size: 연속조회 한 페이지 행 수 (없으면 한 페이지)
+        errors: Domestic.PATH 항목(또는 token, hashkey)별 오류 비율 ex) {'order': 0.01}
+        token_ttl: 토큰 유효시간 (초, 지나면 EGW00123)
+        prices: 종목별 현재가 (시장가 주문, 매수가능조회)
+        tail: (비율, 초) 일부 요청만 추가 지연 (느린 응답, 꼬리 지연시간 확인용) ex) (0.05, 0.2)
+        '''
+        self.latency = latency
+        self.jitter = jitter
+        self.tail = tail
+        self.rate = rate
+        self.page_size = page_size
+        self.errors = errors or {}
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+
+        self.exchange = SimulatedExchange(cash)
+        for stock_id, price in (prices or {}).items():
+            self.exchange.set_price(stock_id, price)
+
+        self.tokens = {} # access_token -> 만료 시각 (monotonic)
+        self.buckets = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 헤더, 본문을 따로 쓰면 Nagle + delayed ACK 로 요청마다 40ms 지연
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                # 중복 요청 (hedge) 을 취소한 클라이언트가 연결을 끊는 경우
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+                server._respond(self, 'GET', url.path, params, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('content-length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                server._respond(self, 'POST', urlparse(self.path).path, None, body)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('content-length', '0')
+                self.end_headers()
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def start(self) -> 'FakeKISServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'FakeKISServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    ######################################## 요청 처리
+
+    def _delay(self, name:str) -> None:
+        latency = self.latency.get(name, 0.0) if isinstance(self.latency, dict) else self.latency
+        if self.jitter:
+            latency += self.random.uniform(0, self.jitter)
+        if self.tail is not None:
+            with self.lock:
+                if self.random.random() < self.tail[0]:
+                    latency += self.tail[1]
+        if latency > 0:
+            time.sleep(latency)
+
+    def _limited(self, appkey:str) -> bool:
+        if self.rate is None:
+            return False
+        with self.lock:
+            bucket = self.buckets.get(appkey)
+            if bucket is None:
+                bucket = self.buckets[appkey] = TokenBucket(self.rate, 1)
+            now = time.monotonic()
+            if bucket.delay(now) > 0:
+                return True
+            bucket.consume(now)
+            return False
+
+    def _inject(self, name:str) -> bool:
+        rate = self.errors.get(name, 0)
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def _respond(self, handler:BaseHTTPRequestHandler, method:str, path:str, params:dict, body:dict) -> None:
+        name = {'/oauth2/tokenP': 'token', '/oauth2/Approval': 'approval', '/uapi/hashkey': 'hashkey'}.get(path, PATH_NAMES.get(path))
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+        self._delay(name)
+
+        status, headers, res_json = 200, {}, None
+        if name is None:
+            status, res_json = 404, {'rt_cd': '1', 'msg_cd': 'EGW00003', 'msg1': '존재하지 않는 API 입니다.'}
+        elif self._limited(handler.headers.get('appkey') or (body or {}).get('appkey', '')):
+            status, res_json = 500, {'rt_cd': '1', 'msg_cd': 'EGW00201', 'msg1': '초당 거래건수를 초과하였습니다.'}
+        elif self._inject(name):
+            status, res_json = 500, {'rt_cd': '1', 'msg_cd': 'EGW00500', 'msg1': '서버 오류 (가상 서버 오류 주입)'}
+        elif name == 'token':
+            res_json = self._token()
+        elif name == 'approval':
+            res_json = {'approval_key': hashlib.sha256(str(time.time()).encode()).hexdigest()[:36]}
+        elif name == 'hashkey':
+            res_json = {'BODY': body, 'HASH': hashlib.sha256(json.dumps(body).encode()).hexdigest()}
+        elif not self._token_valid(handler.headers.get('authorization', '')):
+            status, res_json = 500, {'rt_cd': '1', 'msg_cd': 'EGW00123', 'msg1': '기간이 만료된 token 입니다.'}
+        else:
+            res_json = self.exchange.handle(method, path, handler.headers.get('tr_id'), params, body)
+            if name in LIST_OUTPUT:
+                res_json, headers['tr_cont'] = self._page(res_json, LIST_OUTPUT[name], params)
+
+        data = json.dumps(res_json).encode()
+        handler.send_response(status)
+        handler.send_header('content-type', 'application/json; charset=utf-8')
+        handler.send_header('content-length', str(len(data)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _token(self) -> dict:
+        token = hashlib.sha256(f'{time.time()} {self.random.random()}'.encode()).hexdigest()
+        with self.lock:
+            self.tokens[token] = time.monotonic() + self.token_ttl
+        expired = datetime.now() + timedelta(seconds=self.token_ttl)
+        return {
+            'access_token': token,
+            'access_token_token_expired': expired.strftime('%Y-%m-%d %H:%M:%S'),
+            'token_type': 'Bearer',
+            'expires_in': int(self.token_ttl),
+        }
+
+    def _token_valid(self, authorization:str) -> bool:
+        expires = self.tokens.get(authorization.replace('Bearer ', '', 1))
+        return expires is not None and time.monotonic() < expires
+
+    def expire_tokens(self) -> None:
+        '''
+        발급한 토큰 모두 만료 (토큰 재발급 경로 확인용)
+        '''
+        with self.lock:
+            self.tokens.clear()
+
+    def _page(self, res_json:dict, column:str, params:dict) -> tuple:
+        # CTX_AREA_NK100 = 다음 페이지 시작 행
+        rows = res_json[column]
+        if self.page_size is None:
+            return res_json, 'D'
+
+        start = int(params.get('CTX_AREA_NK100') or 0)
+        end = start + self.page_size
+        more = end < len(rows)
+        res_json = {
+            **res_json,
+            column: rows[start:end],
+            'ctx_area_fk100': 'fake' if more else '',
+            'ctx_area_nk100': str(end) if more else '',
+        }
+        return res_json, 'F' if more else 'D'
+
+######################################## 벤치마크
+
+def _percentiles(samples:list) -> dict:
+    import numpy as np
+    ms = np.array(samples) * 1000
+    return {
+        'count': len(samples),
+        'p50': float(np.percentile(ms, 50)),
+        'p99': float(np.percentile(ms, 99)),
+        'max': float(ms.max()),
+        'ops': len(samples) / (ms.sum() / 1000),
+    }
+
+def benchmark(iterations:int=200, latency:float=0.002, page_size:int=20, positions:int=100,
+              concurrency:int=8, seed:int=0) -> dict:
+    '''
+    가상 서버로 KISAuth, Domestic 요청별 지연시간 (p50, p99 ms), 처리량 (ops/s) 측정
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    from trader import KISTrade, KISAuth, KISTransport, RateLimiter
+
+    stocks = [f'{i:06d}' for i in range(1, positions + 1)]
+    server = FakeKISServer(latency=latency, page_size=page_size, prices={s: 10000 for s in stocks}, seed=seed)
+    with server:
+        # 클라이언트 쪽 속도 제한은 크게 (서버 지연과 클라이언트 처리 시간만 측정)
+        limiter = RateLimiter('r', rate=100000, burst=100)
+        kis = KISTrade('appkey', 'appsecret', '00000000-01', 'r',
+                       transport=KISTransport(server.url, pool_size=concurrency, limiter=limiter), limiter=limiter)
+        auth = KISAuth(kis, hashkey_mode='always')
+        domestic = Domestic(kis, auth)
+        kis.warmup()
+
+        # 잔고 (연속조회 페이지 수 = positions / page_size)
+        for stock_id in stocks:
+            domestic.order_stock(stock_id, 1)
+        for order in list(server.exchange.orders.values()):
+            server.exchange._fill(order, order['remaining'], 10000)
+
+        def measure(fn) -> list:
+            samples = []
+            for i in range(iterations):
+                start = time.perf_counter()
+                fn(i)
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        body = domestic._stock_body('005930', 1, '00', 100)
+        results = {
+            'token': measure(lambda i: auth.issueToken()),
+            'hashkey': measure(lambda i: auth.getHashKey(body)),
+            'order_stock': measure(lambda i: domestic.order_stock(stocks[i % positions], 1, '00', 9000)),
+            'order_able': measure(lambda i: domestic.order_able(stocks[i % positions], 10000)),
+            'order_asset': measure(lambda i: domestic.order_asset()),
+            'order_changable': measure(lambda i: domestic.order_changable()),
+        }
+
+        receipts = [r for r in (domestic.order_stock(stocks[i % positions], 2, '00', 9000) for i in range(iterations)) if r]
+        results['order_change'] = measure(lambda i: domestic.order_change(receipts[i]['org_number'], receipts[i]['order_number'], 1, 9100))
+        results['order_cancle'] = measure(lambda i: domestic.order_cancle(receipts[i]['org_number'], receipts[i]['order_number']))
+
+        # 동시 요청 처리량
+        with ThreadPoolExecutor(concurrency) as executor:
+            start = time.perf_counter()
+            list(executor.map(lambda i: domestic.order_able(stocks[i % positions], 10000), range(iterations * 2)))
+            concurrent_ops = iterations * 2 / (time.perf_counter() - start)
+
+        report = {name: _percentiles(samples) for name, samples in results.items()}
+        report['order_able_concurrent'] = {'count': iterations * 2, 'ops': concurrent_ops}
+        kis.transport.close()
+        return report
+
+def hedge_benchmark(iterations:int=400, latency:float=0.005, tail:tuple=(0.03, 0.2), hedge:float=0.95,
+                    seed:int=0) -> dict:
+    '''
+    일부 응답이 느린 서버에서 조회 중복 요청 (KISTransport hedge) 사용 전, 후 order_able, order_asset 지연시간
+    '''
+    from trader import KISTrade, KISAuth, KISTransport, RateLimiter
+
+    report = {}
+    for label, hedge_q in (('no hedge', None), (f'hedge p{hedge * 100:.0f}', hedge)):
+        server = FakeKISServer(latency=latency, tail=tail, prices={'005930': 10000}, seed=seed)
+        with server:
+            limiter = RateLimiter('r', rate=100000, burst=100)
+            transport = KISTransport(server.url, limiter=limiter, hedge=hedge_q)
+            kis = KISTrade('appkey', 'appsecret', '00000000-01', 'r', transport=transport, limiter=limiter)
+            domestic = Domestic(kis, KISAuth(kis, hashkey_mode='skip'))
+            domestic.order_stock('005930', 1)
+            kis.warmup()
+
+            for name, fn in (('order_able', lambda: domestic.order_able('005930', 10000)),
+                             ('order_asset', domestic.order_asset)):
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    fn()
+                    samples.append(time.perf_counter() - start)
+                # 앞부분은 p95 기록이 쌓이기 전 (중복 요청 없음)
+                report[(label, name)] = _percentiles(samples[transport.HEDGE_MIN_COUNT:])
+            report[(label, 'requests')] = sum(server.counts.get(n, 0) for n in ('able', 'asset'))
+            transport.close()
+    return report
+
+if __name__ == '__main__':
+    # 벤치마크: python fake_kis.py [--save baseline.json] [--compare baseline.json] [--hedge]
+    import argparse
+
+    parser = argparse.ArgumentParser(description='가상 KIS 서버 지연시간 벤치마크')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.002, help='서버 응답 지연 (초)')
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--save', help='결과 저장 (json)')
+    parser.add_argument('--compare', help='이전 결과와 비교 (json)')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='p50 허용 증가율')
+    parser.add_argument('--hedge', action='store_true', help='느린 응답이 섞인 서버에서 조회 중복 요청 비교')
+    args = parser.parse_args()
+
+    if args.hedge:
+        report = hedge_benchmark()
+        for (label, name), r in report.items():
+            if name == 'requests':
+                print(f'{label:12s} 서버 조회 요청 {r}')
+            else:
+                print(f'{label:12s} {name:12s} p50 {r["p50"]:7.2f} ms  p99 {r["p99"]:7.2f} ms  max {r["max"]:7.2f} ms')
+        raise SystemExit()
+
+    report = benchmark(args.iterations, args.latency, args.page_size, args.positions)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # p99 는 실행마다 편차가 커서 p50 으로 비교
+    regressions = []
+    print(f'{"endpoint":24s} {"p50 ms":>9s} {"p99 ms":>9s} {"max ms":>9s} {"ops/s":>9s}')
+    for name, r in report.items():
+        if 'p50' in r:
+            line = f'{name:24s} {r["p50"]:9.2f} {r["p99"]:9.2f} {r["max"]:9.2f} {r["ops"]:9.1f}'
+        else:
+            line = f'{name:24s} {"-":>9s} {"-":>9s} {"-":>9s} {r["ops"]:9.1f}'
+        if baseline and name in baseline and 'p50' in r:
+            change = r['p50'] / baseline[name]['p50'] - 1
+            line += f'  p50 {change:+.0%}'
+            if change > args.tolerance:
+                regressions.append(name)
+                line += '  << 느려짐'
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        raise SystemExit(f'p50 {args.tolerance:.0%} 이상 증가: {", ".join(regressions)}')
@@ -0,0 +1,292 @@
+'''보조지표 - 전 종목 배열로 체결마다 증분 계산 (SMA, EMA, RSI, VWAP, 볼린저밴드, 최고/최저가)'''
+
+import numpy as np
+
+class IndicatorEngine:
+    '''
+    종목 universe 전체의 보조지표 (종목당 한 행)
+    체결 묶음(batch)을 받아 바뀐 종목만 갱신, 교차(crossover) 발생시 signals 에 추가
+
+    지표 이름: price, sma{n}, ema{n}, rsi, vwap, bb_mid, bb_upper, bb_lower, high, low
+    데이터가 부족한 동안은 nan
+
+    ex)
+        indicators = IndicatorEngine(symbols.select(block=SymbolIndex.HALTED), signals=signals,
+                                     crossovers=[('sma5', 'sma20'), ('price', 'bb_upper')])
+        indicators.update(['005930', '000660'], [58200, 120000], [10, 3])
+        indicators.get('005930')
+    '''
+
+    def __init__(self, stocks:list, sma:tuple=(5, 20), ema:tuple=(12, 26), rsi:int=14,
+                 bollinger:tuple=(20, 2.0), high_low:int=20, crossovers:list=None, signals=None) -> None:
+        '''
+        stocks: 종목코드 목록
+        sma, ema: 이동평균 기간 (체결 수 기준)
+        rsi: RSI 기간
+        bollinger: (기간, 표준편차 배수)
+        high_low: 최고/최저가 기간
+        crossovers: 교차를 확인할 (빠른 지표, 느린 지표) ex) [('sma5', 'sma20')]
+        signals: 교차 signal 을 넣을 대기열 (Engine.signals)
+        '''
+        self.stocks = list(stocks)
+        self.index = {s: i for i, s in enumerate(self.stocks)}
+        self.sma_periods = tuple(sma)
+        self.ema_periods = tuple(ema)
+        self.rsi_period = rsi
+        self.bb_period, self.bb_width = bollinger
+        self.high_low = high_low
+        self.crossovers = list(crossovers or [])
+        self.signals = signals
+
+        n = len(self.stocks)
+        # 최근 가격 ring (종목, 가장 긴 기간) - 이동합계에서 빠질 값, 최고/최저가
+        self.window = max(self.sma_periods + (self.bb_period, self.high_low, 1))
+        self.ring = np.zeros((n, self.window))
+        self.count = np.zeros(n, dtype=np.int64)
+
+        self.price = np.full(n, np.nan)
+        self.sums = {p: np.zeros(n) for p in set(self.sma_periods + (self.bb_period,))}
+        self.bb_sumsq = np.zeros(n)
+        self.ema = {p: np.full(n, np.nan) for p in self.ema_periods}
+        self.avg_gain = np.zeros(n)
+        self.avg_loss = np.zeros(n)
+        self.pv = np.zeros(n)
+        self.volume = np.zeros(n)
+        # feed: 종목별로 읽은 ring seq
+        self.seen = {}
+
+        for fast, slow in self.crossovers:
+            # 지표 이름 확인
+            self.value(fast), self.value(slow)
+
+    def reset_session(self) -> None:
+        '''
+        장 시작시 VWAP 초기화
+        '''
+        self.pv[:] = 0
+        self.volume[:] = 0
+
+    ######################################## 지표 값
+
+    def value(self, name:str, rows:np.ndarray=None) -> np.ndarray:
+        '''
+        지표 배열 (rows 를 주면 해당 행만)
+        '''
+        rows = slice(None) if rows is None else rows
+        count = self.count[rows]
+
+        if name == 'price':
+            return self.price[rows]
+        if name.startswith('sma'):
+            period = int(name[3:])
+            return np.where(count >= period, self.sums[period][rows] / period, np.nan)
+        if name.startswith('ema'):
+            return self.ema[int(name[3:])][rows]
+        if name == 'rsi':
+            gain, loss = self.avg_gain[rows], self.avg_loss[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+            return np.where(count > self.rsi_period, rsi, np.nan)
+        if name == 'vwap':
+            volume = self.volume[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(volume > 0, self.pv[rows] / volume, np.nan)
+        if name in ('bb_mid', 'bb_upper', 'bb_lower'):
+            period = self.bb_period
+            mean = self.sums[period][rows] / period
+            std = np.sqrt(np.maximum(self.bb_sumsq[rows] / period - mean ** 2, 0))
+            value = mean + {'bb_mid': 0, 'bb_upper': 1, 'bb_lower': -1}[name] * self.bb_width * std
+            return np.where(count >= period, value, np.nan)
+        if name in ('high', 'low'):
+            recent = self._recent(np.arange(len(self.stocks))[rows], self.high_low)
+            value = recent.max(axis=1) if name == 'high' else recent.min(axis=1)
+            return np.where(count >= self.high_low, value, np.nan)
+        raise KeyError(f'{name}: 없는 지표입니다.')
+
+    def names(self) -> list:
+        return (['price'] + [f'sma{p}' for p in self.sma_periods] + [f'ema{p}' for p in self.ema_periods]
+                + ['rsi', 'vwap', 'bb_mid', 'bb_upper', 'bb_lower', 'high', 'low'])
+
+    def get(self, stock_id:str) -> dict:
+        '''
+        종목 하나의 지표 값
+        '''
+        rows = np.array([self.index[stock_id]])
+        return {name: float(self.value(name, rows)[0]) for name in self.names()}
+
+    def _recent(self, rows:np.ndarray, period:int) -> np.ndarray:
+        # 행별 최근 period 개 가격 (종목, period)
+        columns = (self.count[rows, None] - 1 - np.arange(period)) % self.window
+        return self.ring[rows[:, None], columns]
+
+    ######################################## 갱신
+
+    def rows(self, stocks:list) -> np.ndarray:
+        return np.fromiter((self.index[s] for s in stocks), dtype=np.int64, count=len(stocks))
+
+    def update(self, stocks:list, prices, qtys=None, ts=None) -> None:
+        '''
+        체결 묶음 반영 (시간순, 같은 종목이 여러 번 있어도 됨)
+        stocks: 종목코드 목록 (또는 rows 로 구한 행 번호 배열)
+        qtys: 체결 수량 (VWAP, 없으면 VWAP 갱신 안 함)
+        ts: signal 에 넣을 시각
+        '''
+        rows = stocks if isinstance(stocks, np.ndarray) else self.rows(stocks)
+        prices = np.asarray(prices, dtype=np.float64)
+        qtys = None if qtys is None else np.asarray(qtys, dtype=np.float64)
+        if len(rows) == 0:
+            return
+
+        # 행 번호가 증가하는 순서면 종목 중복 없음 (봉 재생 등)
+        if len(rows) == 1 or (rows[1:] > rows[:-1]).all():
+            before = self._cross_state(rows)
+            self._update(rows, prices, qtys)
+            self._emit(rows, before, ts)
+            return
+
+        # 같은 종목이 여러 번 있으면 순서대로 나눠서 반영 (배열 연산은 한 행에 한 번만 반영됨)
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        is_first = np.empty(len(rows), dtype=bool)
+        is_first[0] = True
+        is_first[1:] = sorted_rows[1:] != sorted_rows[:-1]
+        first = np.flatnonzero(is_first)
+        rank = np.empty(len(rows), dtype=np.int64)
+        rank[order] = np.arange(len(rows)) - np.repeat(first, np.diff(np.append(first, len(rows))))
+
+        unique_rows = sorted_rows[first]
+        before = self._cross_state(unique_rows)
+        for r in range(rank.max() + 1):
+            part = rank == r
+            self._update(rows[part], prices[part], None if qtys is None else qtys[part])
+        self._emit(unique_rows, before, ts)
+
+    def _update(self, rows:np.ndarray, prices:np.ndarray, qtys:np.ndarray) -> None:
+        count = self.count[rows]
+        last = self.price[rows]
+        first = count == 0
+
+        # 이동합계: 새 값 더하고 period 전 값 빼기
+        slot = count % self.window
+        for period, sums in self.sums.items():
+            old = np.where(count >= period, self.ring[rows, (count - period) % self.window], 0.0)
+            sums[rows] += prices - old
+        period = self.bb_period
+        old = np.where(count >= period, self.ring[rows, (count - period) % self.window], 0.0)
+        self.bb_sumsq[rows] += prices ** 2 - old ** 2
+        self.ring[rows, slot] = prices
+
+        for period, ema in self.ema.items():
+            alpha = 2 / (period + 1)
+            current = ema[rows]
+            ema[rows] = np.where(first, prices, current + alpha * (prices - current))
+
+        # RSI (Wilder 평활)
+        delta = np.where(first, 0.0, prices - last)
+        n = self.rsi_period
+        weight = np.minimum(count, n) # 초기에는 단순평균
+        weight = np.maximum(weight, 1)
+        self.avg_gain[rows] = np.where(first, 0.0, (self.avg_gain[rows] * (weight - 1) + np.maximum(delta, 0)) / weight)
+        self.avg_loss[rows] = np.where(first, 0.0, (self.avg_loss[rows] * (weight - 1) + np.maximum(-delta, 0)) / weight)
+
+        if qtys is not None:
+            self.pv[rows] += prices * qtys
+            self.volume[rows] += qtys
+
+        self.price[rows] = prices
+        self.count[rows] = count + 1
+
+    def _cross_state(self, rows:np.ndarray) -> list:
+        # 교차 확인용 (빠른 지표 - 느린 지표) 부호
+        return [np.sign(self.value(fast, rows) - self.value(slow, rows)) for fast, slow in self.crossovers]
+
+    def _emit(self, rows:np.ndarray, before:list, ts) -> None:
+        if self.signals is None or not self.crossovers:
+            return
+
+        # 묶음 전후로 비교 (한 묶음 안에서 교차했다가 돌아온 경우는 signal 없음)
+        after = self._cross_state(rows)
+        for (fast, slow), old, new in zip(self.crossovers, before, after):
+            # 아래 -> 위 (up), 위 -> 아래 (down), nan 은 비교 안 함
+            up = (old < 0) & (new > 0)
+            down = (old > 0) & (new < 0)
+            for i in np.flatnonzero(up | down):
+                row = rows[i]
+                self.signals.append({
+                    'type': 'cross',
+                    'stock_id': self.stocks[row],
+                    'fast': fast,
+                    'slow': slow,
+                    'direction': 'up' if up[i] else 'down',
+                    'price': float(self.price[row]),
+                    'ts': ts,
+                })
+
+    def feed(self, rings:dict) -> int:
+        '''
+        realtime.RealtimeClient.rings 에서 마지막 호출 이후 새 체결을 모아 update
+        return: 반영한 체결 수
+        '''
+        stocks, prices, qtys, last_ts = [], [], [], None
+        for stock_id, ring in list(rings.items()):
+            row = self.index.get(stock_id)
+            if row is None:
+                continue
+            # 읽는 동안 수신 스레드가 더 쓰더라도 [seen, seq) 만 반영 (나머지는 다음 호출)
+            seq = ring.seq
+            start = self.seen.get(stock_id, 0)
+            if seq <= start:
+                continue
+            self.seen[stock_id] = seq
+
+            ticks = ring.range(start, seq)
+            if not len(ticks):
+                continue
+            stocks.append(np.full(len(ticks), row))
+            prices.append(ticks['price'])
+            qtys.append(ticks['qty'])
+            last_ts = max(last_ts or 0, int(ticks['ts'][-1]))
+
+        if not stocks:
+            return 0
+        self.update(np.concatenate(stocks), np.concatenate(prices), np.concatenate(qtys), last_ts)
+        return sum(len(s) for s in stocks)
+
+if __name__ == '__main__':
+    # 벤치마크 (코스피 + 코스닥 규모 universe): python indicators.py
+    import time
+    from collections import deque
+
+    universe = 2500
+    stocks = [f'{i:06d}' for i in range(universe)]
+    signals = deque(maxlen=100000)
+    engine = IndicatorEngine(stocks, crossovers=[('sma5', 'sma20'), ('price', 'bb_upper'), ('price', 'bb_lower')],
+                             signals=signals)
+
+    rng = np.random.default_rng(0)
+    prices = 10000 + rng.random(universe) * 1000
+    rows = np.arange(universe)
+
+    def bench(label, batch_rows, repeat=200):
+        global prices
+        for _ in range(30):
+            # 초기값 채우기
+            prices = prices * (1 + rng.normal(0, 0.002, universe))
+            engine.update(rows, prices, np.ones(universe))
+
+        batches = []
+        for _ in range(repeat):
+            prices = prices * (1 + rng.normal(0, 0.002, universe))
+            batches.append((batch_rows, prices[batch_rows], rng.integers(1, 100, len(batch_rows))))
+
+        start = time.perf_counter()
+        for r, p, q in batches:
+            engine.update(r, p, q)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f'{label:36s} {len(batch_rows):6d} ticks  {elapsed * 1000:7.3f} ms/batch  '
+              f'{elapsed / len(batch_rows) * 1e9:7.0f} ns/tick')
+
+    bench('full universe (1 tick per symbol)', rows)
+    bench('500 active symbols', rng.choice(universe, 500, replace=False))
+    bench('full universe, 4 ticks per symbol', np.tile(rows, 4), repeat=50)
+    print(f'crossover signals: {len(signals)}')
@@ -0,0 +1,296 @@
+'''주문 journal - 주문 전송 전 의도, 접수 결과, 체결을 추가만 하는 파일에 기록 (group commit fsync, 재시작시 replay)'''
+
+import os
+import json
+import zlib
+import time
+import threading
+from itertools import groupby
+from datetime import date, datetime
+
+from models import Receipt
+
+class OrderJournal:
+    '''
+    주문 write-ahead journal (거래일별 파일 하나, 날짜가 바뀌면 새 파일에 이어씀)
+
+    주문 전송 전에 intent 를 기록하고 (fsync 까지 대기), 결과는 receipt / reject 로 기록 (대기하지 않음)
+    쓰기 스레드 하나가 쌓인 기록을 한 번에 쓰고 fsync (동시에 들어온 주문은 fsync 한 번으로 처리)
+    비정상 종료로 마지막 줄이 잘린 경우 읽을 때 잘라내고 이어씀
+
+    한 줄: crc32(8자리 hex) + ' ' + json
+        {'seq', 't': 'intent', 'order_type', 'body', 'tag'} 주문 전송 전 (seq 가 주문 id)
+        {'seq', 't': 'receipt', 'id', 'org_number', 'order_number', 'order_date'} 접수
+        {'seq', 't': 'reject', 'id', 'msg_cd', 'msg1'} 접수 거부
+        {'seq', 't': 'resolved', 'id', 'status'} 재시작시 확인 결과 (ex. unmatched - 접수 여부를 여전히 모름)
+        {'seq', 't': 'fill', 'order_id', 'quantity', 'price'} 체결
+    receipt, reject 가 없는 intent 는 전송 결과를 모르는 주문 (unresolved, resolved 기록이 있어도 다음 재시작에 다시 확인)
+
+    ex)
+        journal = OrderJournal('journal')
+        domestic = Domestic(kis, auth, symbols, journal=journal)
+        domestic.recover()
+    '''
+
+    def __init__(self, directory:str='journal', trading_date:date=None, commit_delay:float=0) -> None:
+        '''
+        trading_date: 거래일 (주문번호가 매일 새로 매겨지므로 파일도 날짜별, 없으면 기록할 때의 날짜 - 자정을 넘기면 새 파일)
+        commit_delay: fsync 전에 기록을 더 모으는 시간 (초, 기본 0 - fsync 하는 동안 들어온 기록이 다음 batch)
+        '''
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.trading_date = trading_date
+        self.path = self._path()
+        self.commit_delay = commit_delay
+
+        # 열 때 읽은 기록 (replay 용, 이후 추가한 기록은 파일에만)
+        self.records = self._load()
+        self.seq = self.records[-1]['seq'] if self.records else 0
+        self.tags = {r['tag'] for r in self.records if r['t'] == 'intent' and r['tag'] is not None}
+        self.durable = self.seq # fsync 가 끝난 마지막 seq
+        self.pending = []
+        self.error = None
+        self.closed = False
+        self.cond = threading.Condition()
+
+        self.file = open(self.path, 'ab')
+        self.thread = threading.Thread(target=self._run, name='OrderJournal', daemon=True)
+        self.thread.start()
+
+    def _path(self) -> str:
+        trading_date = self.trading_date or date.today()
+        return os.path.join(self.directory, f'orders-{trading_date:%Y%m%d}.log')
+
+    def _load(self) -> list:
+        # 기존 기록 읽기, 잘린 줄이나 crc 가 맞지 않는 줄부터는 잘라냄
+        if not os.path.exists(self.path):
+            return []
+
+        payloads, valid = [], 0
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n') or len(line) < 10 or line[8:9] != b' ':
+                break
+            payload = line[9:-1]
+            if b'%08x' % zlib.crc32(payload) != line[:8]:
+                break
+            payloads.append(payload)
+            valid += len(line)
+
+        # 줄마다 json.loads 를 부르지 않고 한 번에 파싱 (재시작 시간)
+        records = json.loads(b'[' + b','.join(payloads) + b']')
+        if valid != len(data):
+            print(f'{self.path}: 손상된 기록 {len(data) - valid} bytes 잘라냄')
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid)
+        return records
+
+    @staticmethod
+    def _encode(record:dict) -> bytes:
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode()
+        return f'{zlib.crc32(payload):08x} '.encode() + payload + b'\n'
+
+    ######################################## 쓰기
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+
+            with self.cond:
+                batch, self.pending = self.pending, []
+                seq = self.seq
+
+            try:
+                # batch 는 날짜 (파일) 순서대로, 날짜가 바뀐 기록부터 새 파일에
+                for path, lines in groupby(batch, key=lambda item: item[0]):
+                    if path != self.file.name:
+                        self.file.close()
+                        self.file = open(path, 'ab')
+                    self.file.write(b''.join(line for _, line in lines))
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+            except OSError as e:
+                with self.cond:
+                    self.error = e
+                    self.cond.notify_all()
+                return
+
+            with self.cond:
+                self.durable = seq
+                self.cond.notify_all()
+
+    def append(self, records:list, wait:bool=False) -> int:
+        '''
+        기록 추가 -> 마지막 기록의 seq
+        wait: fsync 까지 대기
+        '''
+        with self.cond:
+            if self.error is not None:
+                raise self.error
+            if self.closed:
+                raise ValueError('닫힌 journal 입니다.')
+            path = self._path()
+            if path != self.path:
+                # 새 거래일 - fired 는 그날 주문한 tag 만
+                self.path = path
+                self.tags = set()
+            for record in records:
+                self.seq += 1
+                record = {'seq': self.seq, **record}
+                if record.get('tag') is not None:
+                    self.tags.add(record['tag'])
+                self.pending.append((path, self._encode(record)))
+            seq = self.seq
+            self.cond.notify_all()
+
+        if wait:
+            self.wait(seq)
+        return seq
+
+    def wait(self, seq:int) -> None:
+        '''
+        seq 까지 fsync 될 때까지 대기
+        '''
+        with self.cond:
+            while self.durable < seq:
+                if self.error is not None:
+                    raise self.error
+                self.cond.wait()
+
+    def intent(self, order_type:str, body:dict, tag:str=None, wait:bool=True) -> int:
+        '''
+        주문 전송 전 기록 -> 주문 id
+        order_type: b, s, c (정정, 취소)
+        tag: 전략에서 붙이는 이름 (재시작 후 fired 로 이미 주문했는지 확인)
+        '''
+        return self.append([{'t': 'intent', 'order_type': order_type, 'body': body, 'tag': tag}], wait)
+
+    def intents(self, orders:list, tag:str=None) -> list:
+        '''
+        여러 주문 전송 전 기록 (fsync 한 번) -> 주문 id 목록
+        orders: [(order_type, body), ...]
+        '''
+        last = self.append([{'t': 'intent', 'order_type': order_type, 'body': body, 'tag': tag}
+                            for order_type, body in orders], wait=True)
+        return list(range(last - len(orders) + 1, last + 1))
+
+    def receipt(self, entry:int, receipt:Receipt) -> None:
+        self.append([{'t': 'receipt', 'id': entry, 'org_number': receipt.org_number,
+                      'order_number': receipt.order_number, 'order_date': receipt.order_date.strftime('%H%M%S')}])
+
+    def reject(self, entry:int, msg_cd:str, msg1:str) -> None:
+        self.append([{'t': 'reject', 'id': entry, 'msg_cd': msg_cd, 'msg1': msg1}])
+
+    def resolve(self, entry:int, status:str) -> None:
+        self.append([{'t': 'resolved', 'id': entry, 'status': status}])
+
+    def fill(self, order_id:str, quantity:int, price:float) -> None:
+        self.append([{'t': 'fill', 'order_id': order_id, 'quantity': quantity, 'price': price}])
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        self.file.close()
+
+    def __enter__(self) -> 'OrderJournal':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    ######################################## 읽기
+
+    def replay(self) -> dict:
+        '''
+        열 때 읽은 기록으로 주문 상태 복원용 이벤트 (OrderBook.restore 입력)
+
+        return: {
+            'events': [('order', order_type, Receipt) 또는 ('fill', order_id, quantity, price), ...],
+            'unresolved': [intent 기록, ...] 전송 결과를 모르는 주문 (이전 재시작에서 확인한 결과는 'status'),
+        }
+        '''
+        intents, events, times = {}, [], {}
+        for record in self.records:
+            kind = record['t']
+            if kind == 'intent':
+                intents[record['seq']] = record
+            elif kind == 'fill':
+                events.append(('fill', record['order_id'], record['quantity'], record['price']))
+            elif kind == 'resolved':
+                # 확인했지만 접수 여부를 모르는 주문 (unmatched) 은 계속 unresolved
+                if record['id'] in intents:
+                    intents[record['id']]['status'] = record['status']
+            else:
+                intent = intents.pop(record['id'], None)
+                if kind == 'receipt' and intent is not None:
+                    order_date = times.get(record['order_date'])
+                    if order_date is None:
+                        order_date = times[record['order_date']] = datetime.strptime(record['order_date'], '%H%M%S')
+                    receipt = Receipt(True, record['org_number'], record['order_number'], order_date, intent['body'])
+                    events.append(('order', intent['order_type'], receipt))
+
+        return {'events': events, 'unresolved': list(intents.values())}
+
+    def fired(self, tag:str) -> bool:
+        '''
+        tag 로 주문한 적이 있는지 (ex. 하루 1회 매수 신호)
+        '''
+        return tag in self.tags
+
+if __name__ == '__main__':
+    # 벤치마크: python journal.py (group commit, 재시작 replay 시간)
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from trader import OrderBook
+
+    def body(i):
+        return {'CANO': '00000000', 'ACNT_PRDT_CD': '01', 'PDNO': f'{i % 2000:06d}', 'ORD_DVSN': '00',
+                'ORD_QTY': '10', 'ORD_UNPR': str(10000 + i % 100)}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 주문 스레드 8개가 동시에 intent 기록 (fsync 대기)
+        for threads in (1, 8):
+            with OrderJournal(os.path.join(tmp_dir, f'bench{threads}')) as journal:
+                count = 400
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    list(executor.map(lambda i: journal.intent('b', body(i)), range(count)))
+                elapsed = time.perf_counter() - start
+                print(f'intent 기록 (fsync 대기) 스레드 {threads}개: {elapsed / count * 1e6:7.1f} us/건, '
+                      f'{count / elapsed:8.0f} 건/초')
+
+        # 바쁜 하루: 주문 20,000 건 (접수, 체결 2회), 마지막 10 건은 결과 없음
+        directory = os.path.join(tmp_dir, 'day')
+        with OrderJournal(directory) as journal:
+            for i in range(20000):
+                entry = journal.intent('b', body(i), wait=False)
+                if i >= 19990:
+                    continue
+                receipt = Receipt(True, '00950', f'{i:010d}', datetime.now(), body(i))
+                journal.receipt(entry, receipt)
+                journal.fill(receipt.order_number, 4, 10000)
+                journal.fill(receipt.order_number, 6 if i % 2 else 3, 10000)
+
+        start = time.perf_counter()
+        journal = OrderJournal(directory)
+        loaded = time.perf_counter()
+        state = journal.replay()
+        book = OrderBook()
+        book.restore(state['events'])
+        restored = time.perf_counter()
+        journal.close()
+
+        print(f'재시작: 기록 {len(journal.records)} 줄 읽기 {(loaded - start) * 1000:6.1f} ms, '
+              f'복원 {(restored - loaded) * 1000:6.1f} ms, 미체결 {len(book.orders)}, '
+              f'결과 확인 필요 {len(state["unresolved"])}')
@@ -0,0 +1,225 @@
+'''조회, 주문 응답 모델 - API 문자열을 받을 때 한 번만 int/Decimal 로 변환 (__slots__ 로 메모리 절약)'''
+
+from decimal import Decimal
+from datetime import datetime
+
+class Record:
+    '''
+    응답 레코드 기본 클래스
+    기존 dict 응답과 같이 row['holding_quantity'], row.get(...), dict(row.items()) 로도 사용 가능
+    생성은 문자열 dict 보다 느림 (int/Decimal 변환 비용을 조회할 때 한 번 치르고 이후 계산에서 다시 파싱하지 않음)
+    '''
+
+    __slots__ = ()
+
+    # dict 와 같게 취급하고 값을 바꿀 수 있으므로 hash 하지 않음 (set, dict key 로 쓰지 않음)
+    __hash__ = None
+
+    def __getitem__(self, key:str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key:str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key:str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self) -> tuple:
+        return self.__slots__
+
+    def items(self) -> list:
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.items() == other.items()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({", ".join(f"{k}={v!r}" for k, v in self.items())})'
+
+class Position(Record):
+    '''
+    주식잔고조회 (inquire-balance output1) 한 종목
+    '''
+
+    __slots__ = ('stock_number', 'stock_name', 'holding_quantity', 'avg_price', 'purchase_amount', 'eval_amount')
+
+    def __init__(self, stock_number:str, stock_name:str, holding_quantity:int, avg_price:Decimal,
+                 purchase_amount:int, eval_amount:int) -> None:
+        self.stock_number = stock_number
+        self.stock_name = stock_name
+        self.holding_quantity = holding_quantity
+        self.avg_price = avg_price
+        self.purchase_amount = purchase_amount
+        self.eval_amount = eval_amount
+
+    @classmethod
+    def from_api(cls, row:dict) -> 'Position':
+        return cls(row['pdno'], row['prdt_name'], int(row['hldg_qty']), Decimal(row['pchs_avg_pric']),
+                   int(row['pchs_amt']), int(row['evlu_amt']))
+
+class OpenOrder(Record):
+    '''
+    정정취소가능 주문 조회 (inquire-psbl-rvsecncl output) 한 주문
+    '''
+
+    __slots__ = ('org_id', 'order_id', 'original_id', 'order_name', 'stock_id', 'stock_name', 'quantity', 'price',
+                 'order_date', 'change_quantity', 'buy_or_sell')
+
+    def __init__(self, org_id:str, order_id:str, original_id:str, order_name:str, stock_id:str, stock_name:str,
+                 quantity:int, price:int, order_date:str, change_quantity:int, buy_or_sell:bool) -> None:
+        self.org_id = org_id
+        self.order_id = order_id
+        self.original_id = original_id
+        self.order_name = order_name
+        self.stock_id = stock_id
+        self.stock_name = stock_name
+        self.quantity = quantity
+        self.price = price
+        self.order_date = order_date
+        self.change_quantity = change_quantity
+        self.buy_or_sell = buy_or_sell # buy True, sell False
+
+    @classmethod
+    def from_api(cls, row:dict) -> 'OpenOrder':
+        return cls(row['ord_gno_brno'], row['odno'], row['orgn_odno'], row['ord_dvsn_name'], row['pdno'],
+                   row['prdt_name'], int(row['ord_qty']), int(float(row['ord_unpr'])), row['ord_tmd'],
+                   int(row['psbl_qty']), row['sll_buy_dvsn_cd'] == '02')
+
+class BuyingPower(Record):
+    '''
+    매수가능조회 (inquire-psbl-order output)
+    '''
+
+    __slots__ = ('max_amount', 'max_quantity')
+
+    def __init__(self, max_amount:int, max_quantity:int) -> None:
+        self.max_amount = max_amount
+        self.max_quantity = max_quantity
+
+    @classmethod
+    def from_api(cls, output:dict) -> 'BuyingPower':
+        return cls(int(output['max_buy_amt']), int(output['max_buy_qty']))
+
+class Receipt(Record):
+    '''
+    주문 접수 결과 (order-cash, order-rvsecncl)
+    요청 body 값(PDNO, ORD_QTY ...)은 보낸 그대로 receipt['PDNO'] 로 조회
+    '''
+
+    __slots__ = ('status', 'org_number', 'order_number', 'order_date', 'body')
+
+    def __init__(self, status:bool, org_number:str, order_number:str, order_date:datetime, body:dict) -> None:
+        self.status = status
+        self.org_number = org_number
+        self.order_number = order_number
+        self.order_date = order_date
+        self.body = body
+
+    @classmethod
+    def from_api(cls, res_json:dict, body:dict) -> 'Receipt':
+        output = res_json['output']
+        return cls(res_json['rt_cd'] == '0', output['KRX_FWDG_ORD_ORGNO'], output['ODNO'],
+                   datetime.strptime(output['ORD_TMD'], '%H%M%S'), body)
+
+    def __getitem__(self, key:str):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return self.body[key]
+
+    def __contains__(self, key:str) -> bool:
+        return key in self.__slots__ or key in self.body
+
+    def get(self, key:str, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return self.body.get(key, default)
+
+    def keys(self) -> tuple:
+        return self.__slots__[:-1] + tuple(self.body)
+
+    def items(self) -> list:
+        return [(key, self[key]) for key in self.keys()]
+
+class Records(list):
+    '''
+    같은 종류 레코드 목록 (list 그대로 사용)
+    to_frame 은 변환된 값으로 칼럼을 만들어 문자열을 다시 파싱하지 않음
+    '''
+
+    def __init__(self, record_type:type, rows=()) -> None:
+        super().__init__(rows)
+        self.record_type = record_type
+
+    def column(self, name:str) -> list:
+        return [getattr(row, name) for row in self]
+
+    def to_frame(self):
+        import pandas as pd
+        fields = self.record_type.__slots__
+        return pd.DataFrame({name: self.column(name) for name in fields}, columns=list(fields))
+
+if __name__ == '__main__':
+    # 메모리, 계산 비교: python models.py
+    import json
+    import time
+    import tracemalloc
+
+    text = json.dumps({'output1': [{
+        'pdno': f'{i:06d}', 'prdt_name': f'종목{i}', 'hldg_qty': str(i % 500 + 1), 'pchs_avg_pric': '58200.0000',
+        'pchs_amt': str((i % 500 + 1) * 58200), 'evlu_amt': str((i % 500 + 1) * 58300),
+    } for i in range(10000)]})
+
+    def dict_rows(rows):
+        return [{
+            'stock_number': l['pdno'],
+            'stock_name': l['prdt_name'],
+            'holding_quantity': l['hldg_qty'],
+            'avg_price': l['pchs_avg_pric'],
+            'purchase_amount': l['pchs_amt'],
+            'eval_amount': l['evlu_amt']
+        } for l in rows]
+
+    def converted_rows(rows):
+        return [{
+            'stock_number': l['pdno'],
+            'stock_name': l['prdt_name'],
+            'holding_quantity': int(l['hldg_qty']),
+            'avg_price': Decimal(l['pchs_avg_pric']),
+            'purchase_amount': int(l['pchs_amt']),
+            'eval_amount': int(l['evlu_amt'])
+        } for l in rows]
+
+    for label, build, value in (
+        ('dict (문자열)', dict_rows, lambda r: int(r['holding_quantity']) * float(r['avg_price'])),
+        ('dict (변환)', converted_rows, lambda r: r['holding_quantity'] * r['avg_price']),
+        ('Position', lambda rows: Records(Position, map(Position.from_api, rows)), lambda r: r.holding_quantity * r.avg_price),
+    ):
+        # 생성 시간 (tracemalloc 없이), 응답 json 은 버리고 남는 메모리
+        rows = json.loads(text)['output1']
+        start = time.perf_counter()
+        result = build(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        del result, rows
+        tracemalloc.start()
+        rows = json.loads(text)['output1']
+        result = build(rows)
+        del rows
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(10):
+            sum(value(r) for r in result)
+        sum_ms = (time.perf_counter() - start) * 100
+        print(f'{label:14s} {len(result)} 행  생성 {build_ms:6.1f} ms  {memory / 1024:8.0f} KiB  평가금액 합 {sum_ms:6.2f} ms')
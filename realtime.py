@@ -0,0 +1,481 @@
+'''실시간 시세 (WebSocket) - 체결가, 호가, 체결통보'''
+
+import json
+import time
+import asyncio
+import threading
+from base64 import b64decode
+from datetime import datetime
+
+import aiohttp
+import numpy as np
+
+from trader import KISTrade, KISError, OrderBook, my_print
+from async_trader import AsyncKISTransport
+from tick_store import TICK_DTYPE, TickStore
+
+# 체결구분 (1: 매수, 3: 장전, 5: 매도)
+SIDE = {'1': 1, '3': 0, '5': -1}
+
+class TickRing:
+    '''
+    종목별 체결 ring buffer
+    쓰는 쪽은 수신 스레드 하나, 읽는 쪽은 잠금 없이 seq 로 덮어쓰기 확인
+    '''
+
+    def __init__(self, capacity:int=4096) -> None:
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=TICK_DTYPE)
+        # 지금까지 쓴 개수 (기록을 다 쓴 뒤에 증가)
+        self.seq = 0
+
+    def __len__(self) -> int:
+        return min(self.seq, self.capacity)
+
+    def append(self, ts:int, price:float, qty:int, side:int) -> None:
+        self.data[self.seq % self.capacity] = (ts, price, qty, side)
+        self.seq += 1
+
+    def latest(self, n:int=None) -> np.ndarray:
+        '''
+        최근 n 개 체결 (오래된 순, 복사본)
+        '''
+        seq = self.seq
+        return self.range(seq - min(n or self.capacity, seq, self.capacity), seq)
+
+    def range(self, start:int, stop:int) -> np.ndarray:
+        '''
+        seq start 부터 stop 전까지 체결 (오래된 순, 복사본, stop 은 읽은 self.seq 이하)
+        이미 덮어써진 앞쪽은 제외
+        '''
+        while True:
+            start = max(start, self.seq - self.capacity)
+            result = self.data[np.arange(start, stop) % self.capacity]
+            # 복사하는 동안 앞쪽이 덮어써졌으면 다시 읽기
+            if self.seq - start <= self.capacity:
+                return result
+
+    def last(self) -> np.void:
+        '''
+        마지막 체결 (없으면 None)
+        '''
+        seq = self.seq
+        return None if seq == 0 else self.data[(seq - 1) % self.capacity].copy()
+
+def parse_frame(message:str) -> tuple:
+    '''
+    실시간 데이터 '0|H0STCNT0|001|005930^...' -> (암호화 여부, tr_id, 건수, 데이터)
+    '''
+    encrypted, tr_id, count, data = message.split('|', 3)
+    return encrypted == '1', tr_id, int(count), data
+
+def decrypt(data:str, key:str, iv:str) -> str:
+    '''
+    체결통보 복호화 (AES-256-CBC, base64)
+    '''
+    # pycryptodome - 체결통보 구독시에만 필요
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import unpad
+
+    cipher = AES.new(key.encode('utf-8'), AES.MODE_CBC, iv.encode('utf-8'))
+    return unpad(cipher.decrypt(b64decode(data)), AES.block_size).decode('utf-8')
+
+def _int(value:str) -> int:
+    return int(value) if value.strip() else 0
+
+def decode_price(data:str, count:int) -> list:
+    '''
+    주식체결가 (H0STCNT0) -> [(종목코드, 체결시간 HHMMSS, 가격, 수량, 매수/매도)]
+    '''
+    values = data.split('^')
+    size = len(values) // count
+    return [
+        (values[i], values[i + 1], float(values[i + 2]), int(values[i + 12]), SIDE.get(values[i + 21], 0))
+        for i in range(0, size * count, size)
+    ]
+
+def decode_quote(data:str, count:int) -> list:
+    '''
+    주식호가 (H0STASP0) -> [{'stock_id', 'time', 'asks', 'bids', 'ask_sizes', 'bid_sizes'}] (1~10호가)
+    '''
+    values = data.split('^')
+    size = len(values) // count
+    return [{
+        'stock_id': values[i],
+        'time': values[i + 1],
+        'asks': [int(v) for v in values[i + 3:i + 13]],
+        'bids': [int(v) for v in values[i + 13:i + 23]],
+        'ask_sizes': [int(v) for v in values[i + 23:i + 33]],
+        'bid_sizes': [int(v) for v in values[i + 33:i + 43]],
+    } for i in range(0, size * count, size)]
+
+def decode_notice(data:str) -> list:
+    '''
+    체결통보 (H0STCNI0, H0STCNI9, 복호화된 데이터)
+    '''
+    values = data.split('^')
+    return [{
+        'order_id': values[2],
+        'original_id': values[3],
+        'order_type': 's' if values[4] == '01' else 'b',
+        'stock_id': values[8],
+        'quantity': _int(values[9]), # 체결수량 (접수는 주문수량)
+        'price': _int(values[10]), # 체결단가 (접수는 주문단가)
+        'time': values[11],
+        'rejected': values[12] == '1',
+        'filled': values[13] == '2', # 1: 접수, 정정, 취소, 거부 / 2: 체결
+        'org_id': values[15],
+        'order_quantity': _int(values[16]),
+    }]
+
+class RealtimeClient:
+    '''
+    실시간 시세 수신
+    체결가는 종목별 TickRing 에 저장, 체결통보는 signals 대기열과 OrderBook 에도 전달
+    체결가 signal 은 price_signals=True 일 때만 (체결마다 하나씩 쌓이므로 보통은 ring, IndicatorEngine 으로 확인)
+
+    ex)
+        realtime = RealtimeClient(kis, hts_id, signals=signals, book=domestic.book)
+        realtime.subscribe('price', '005930')
+        realtime.subscribe('notice')
+        realtime.start()
+        realtime.ring('005930').latest(100)
+    '''
+
+    WS_DOMAIN = {
+        'r': 'ws://ops.koreainvestment.com:21000', # 실전
+        's': 'ws://ops.koreainvestment.com:31000', # 모의
+    }
+
+    REALTIME_ID = {
+        'r': { # 실전
+            'price': 'H0STCNT0', # 주식 체결가
+            'quote': 'H0STASP0', # 주식 호가
+            'notice': 'H0STCNI0', # 체결통보
+        },
+        's': { # 모의
+            'price': 'H0STCNT0', # 주식 체결가
+            'quote': 'H0STASP0', # 주식 호가
+            'notice': 'H0STCNI9', # 체결통보
+        }
+    }
+
+    # 세션당 등록 가능한 실시간 데이터 수
+    MAX_SUBSCRIPTIONS = 41
+
+    # 연결이 끊겼을 때 재연결 대기 (초)
+    RECONNECT = 3
+
+    def __init__(self, kis:KISTrade, hts_id:str=None, capacity:int=4096, signals=None,
+                 book:OrderBook=None, store:TickStore=None, transport:AsyncKISTransport=None,
+                 ws_domain:str=None, price_signals:bool=False) -> None:
+        '''
+        hts_id: HTS ID (체결통보 구독시 필요)
+        capacity: 종목별 체결 보관 수
+        signals: 체결통보 (price_signals 이면 체결도) 를 넣을 대기열 (Engine.signals)
+        book: 체결통보로 갱신할 주문 상태 (Domestic.book)
+        store: 체결가, 내 주문 체결을 기록할 저장소
+        transport: 접속키 발급에 사용할 AsyncKISTransport
+        ws_domain: WebSocket 주소 (기본 WS_DOMAIN)
+        price_signals: 체결가도 signals 에 전달 (구독 종목이 적은 경우)
+        '''
+        self.kis = kis
+        self.hts_id = hts_id
+        self.capacity = capacity
+        self.signals = signals
+        self.book = book
+        self.store = store
+        self.transport = transport or AsyncKISTransport(kis.domain, limiter=kis.limiter)
+        self.ws_domain = ws_domain or self.WS_DOMAIN[kis.mode]
+        self.price_signals = price_signals
+
+        self.approval_key = None
+        self.subscriptions = {} # (tr_id, tr_key) -> 등록 순서 유지
+        self.rings = {}
+        self.quotes = {}
+        self.keys = {} # tr_id -> (key, iv) 체결통보 복호화
+        self.counters = {'messages': 0, 'price': 0, 'quote': 0, 'notice': 0, 'errors': 0}
+
+        self.ws = None
+        self.loop = None
+        self.thread = None
+        self.stopped = False
+
+        self.day_ns = 0
+        self.day_end = 0
+        self.last_time = None
+        self.last_ts = 0
+
+    async def getApprovalKey(self) -> str:
+        data = {
+            'grant_type': 'client_credentials',
+            'appkey': self.kis.appkey,
+            'secretkey': self.kis.appsecret,
+        }
+        res_json = await self.transport.post('/oauth2/Approval', data=json.dumps(data))
+        self.approval_key = res_json['approval_key']
+        return self.approval_key
+
+    ######################################## 구독
+
+    def _message(self, tr_id:str, tr_key:str, tr_type:str) -> str:
+        return json.dumps({
+            'header': {
+                'approval_key': self.approval_key,
+                'custtype': 'P',
+                'tr_type': tr_type, # 1: 등록, 2: 해제
+                'content-type': 'utf-8',
+            },
+            'body': {
+                'input': {
+                    'tr_id': tr_id,
+                    'tr_key': tr_key,
+                }
+            }
+        })
+
+    def _send(self, message:str) -> None:
+        # 다른 스레드에서 호출해도 수신 loop 에서 전송
+        if self.ws is not None and not self.ws.closed:
+            asyncio.run_coroutine_threadsafe(self.ws.send_str(message), self.loop)
+
+    def subscribe(self, kind:str, tr_key:str=None) -> None:
+        '''
+        kind: price(체결가), quote(호가), notice(체결통보)
+        tr_key: 종목코드 (체결통보는 HTS ID)
+        '''
+        tr_id = self.REALTIME_ID[self.kis.mode][kind]
+        key = (tr_id, tr_key or self.hts_id)
+        assert key[1], '체결통보는 HTS ID가 필요합니다.'
+        if key in self.subscriptions:
+            return
+        assert len(self.subscriptions) < self.MAX_SUBSCRIPTIONS, f'실시간 등록은 {self.MAX_SUBSCRIPTIONS}건까지 가능합니다.'
+
+        self.subscriptions[key] = True
+        self._send(self._message(*key, '1'))
+
+    def unsubscribe(self, kind:str, tr_key:str=None) -> None:
+        key = (self.REALTIME_ID[self.kis.mode][kind], tr_key or self.hts_id)
+        if self.subscriptions.pop(key, None):
+            self._send(self._message(*key, '2'))
+
+    ######################################## 수신 데이터 처리
+
+    def ring(self, stock_id:str) -> TickRing:
+        ring = self.rings.get(stock_id)
+        if ring is None:
+            ring = self.rings[stock_id] = TickRing(self.capacity)
+        return ring
+
+    def _timestamp(self, hhmmss:str) -> int:
+        # 체결시간 HHMMSS -> 오늘 기준 ns (같은 초에 들어온 체결은 다시 계산하지 않음)
+        if hhmmss != self.last_time:
+            if time.time() >= self.day_end:
+                midnight = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+                self.day_ns = int(midnight) * 1_000_000_000
+                self.day_end = midnight + 86400
+            seconds = int(hhmmss[0:2]) * 3600 + int(hhmmss[2:4]) * 60 + int(hhmmss[4:6])
+            self.last_time = hhmmss
+            self.last_ts = self.day_ns + seconds * 1_000_000_000
+        return self.last_ts
+
+    def _on_price(self, data:str, count:int) -> None:
+        for stock_id, hhmmss, price, qty, side in decode_price(data, count):
+            ts = self._timestamp(hhmmss)
+            self.ring(stock_id).append(ts, price, qty, side)
+            if self.store is not None:
+                self.store.append(stock_id, ts, price, qty, side)
+            if self.price_signals and self.signals is not None:
+                self.signals.append({'type': 'price', 'stock_id': stock_id, 'ts': ts,
+                                     'price': price, 'qty': qty, 'side': side})
+
+    def _on_quote(self, data:str, count:int) -> None:
+        for quote in decode_quote(data, count):
+            self.quotes[quote['stock_id']] = quote
+
+    def _on_notice(self, data:str) -> None:
+        for notice in decode_notice(data):
+            if notice['filled'] and self.book is not None:
+                self.book.on_fill(notice['order_id'], notice['quantity'], notice['price'])
+            if notice['filled'] and self.store is not None:
+                self.store.append(notice['stock_id'], self._timestamp(notice['time']), notice['price'],
+                                  notice['quantity'], 1 if notice['order_type'] == 'b' else -1, 'fills')
+            if self.signals is not None:
+                self.signals.append({'type': 'notice', **notice})
+
+    def _on_control(self, message:str) -> str:
+        res_json = json.loads(message)
+        tr_id = res_json['header']['tr_id']
+        if tr_id == 'PINGPONG':
+            # 연결 유지 - 그대로 돌려보냄
+            return message
+
+        body = res_json.get('body', {})
+        if body.get('rt_cd') not in (None, '0'):
+            # 구독 거부 (접속키 만료 등) - 연결을 끊고 새 접속키로 다시 연결
+            print(body.get('msg_cd'), body.get('msg1'))
+            self.approval_key = None
+        output = body.get('output')
+        if output and output.get('key'):
+            self.keys[tr_id] = (output['key'], output['iv'])
+        return None
+
+    def handle(self, message:str) -> str:
+        '''
+        수신 메시지 처리, 서버로 돌려보낼 메시지 반환 (PINGPONG)
+        '''
+        self.counters['messages'] += 1
+        try:
+            if message[0] not in '01':
+                return self._on_control(message)
+
+            encrypted, tr_id, count, data = parse_frame(message)
+            if encrypted:
+                data = decrypt(data, *self.keys[tr_id])
+
+            kind = 'notice' if tr_id.startswith('H0STCNI') else 'quote' if tr_id == 'H0STASP0' else 'price'
+            if kind == 'price':
+                self._on_price(data, count)
+            elif kind == 'quote':
+                self._on_quote(data, count)
+            else:
+                self._on_notice(data)
+            self.counters[kind] += count
+
+        except:
+            # 한 메시지 오류로 수신이 멈추지 않도록
+            self.counters['errors'] += 1
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+        return None
+
+    ######################################## 연결
+
+    async def _receive(self) -> None:
+        async with self.transport.getSession().ws_connect(self.ws_domain, heartbeat=None) as ws:
+            self.ws = ws
+            for key in list(self.subscriptions):
+                await ws.send_str(self._message(*key, '1'))
+
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                reply = self.handle(msg.data)
+                if reply is not None:
+                    await ws.send_str(reply)
+                if self.approval_key is None:
+                    break
+
+    async def run(self) -> None:
+        '''
+        stop() 이 호출될 때까지 수신 (끊기면 재연결, 구독 다시 등록, 연결 실패나 구독 거부 후에는 접속키 다시 발급)
+        '''
+        self.loop = asyncio.get_running_loop()
+        self.stopped = False
+        try:
+            while not self.stopped:
+                try:
+                    if self.approval_key is None:
+                        await self.getApprovalKey()
+                    await self._receive()
+                except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, KISError) as e:
+                    # 접속키 발급 실패 (KISError: 연결 실패, 서버 오류) 도 재시도, 접속키는 다시 발급
+                    my_print('실시간 연결 오류', repr(e))
+                    self.approval_key = None
+                finally:
+                    self.ws = None
+
+                if not self.stopped:
+                    await asyncio.sleep(self.RECONNECT)
+        finally:
+            await self.transport.close()
+
+    def start(self) -> threading.Thread:
+        '''
+        별도 스레드에서 수신 시작
+        '''
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self) -> None:
+        self.stopped = True
+        if self.ws is not None and self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop)
+
+def _price_frame(stock_id:str, hhmmss:str, price:int, qty:int, count:int=1) -> str:
+    '''
+    벤치마크용 주식체결가 메시지 (46 필드)
+    '''
+    record = [stock_id, hhmmss, str(price)] + ['0'] * 9 + [str(qty)] + ['0'] * 8 + ['1'] + ['0'] * 24
+    return f'0|H0STCNT0|{count:03d}|' + '^'.join(record * count)
+
+async def _fake_server(port:int, frames:int, count:int):
+    '''
+    벤치마크용 WebSocket 서버 - 체결가 구독시 frames 개 메시지 전송
+    '''
+    from aiohttp import web
+
+    async def approval(request):
+        return web.json_response({'approval_key': 'fake-approval-key'})
+
+    async def stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            request = json.loads(msg.data)
+            if 'body' not in request:
+                # PINGPONG 응답
+                continue
+            tr_key = request['body']['input']['tr_key']
+            await ws.send_str(json.dumps({'header': {'tr_id': 'PINGPONG', 'datetime': '20230101090000'}}))
+            for i in range(frames):
+                await ws.send_str(_price_frame(tr_key, '090000', 58000 + i % 100, 1 + i % 10, count))
+        return ws
+
+    app = web.Application()
+    app.router.add_post('/oauth2/Approval', approval)
+    app.router.add_get('/', stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+if __name__ == '__main__':
+    # 벤치마크 (디코딩, 로컬 WebSocket 수신): python realtime.py
+    from collections import deque
+
+    frames, count, port = 200000, 1, 18765
+    kis = KISTrade('appkey', 'appsecret', '00000000-00')
+
+    # 디코딩만
+    client = RealtimeClient(kis, signals=deque(maxlen=10000))
+    message = _price_frame('005930', '090000', 58000, 1, count)
+    start = time.perf_counter()
+    for _ in range(frames):
+        client.handle(message)
+    elapsed = time.perf_counter() - start
+    print(f'decode        {frames / elapsed:12,.0f} msg/s  {elapsed / frames * 1e6:6.2f} us/msg')
+
+    # 로컬 서버 -> WebSocket -> ring buffer
+    async def bench():
+        runner = await _fake_server(port, frames, count)
+        client = RealtimeClient(kis, signals=deque(maxlen=10000),
+                                transport=AsyncKISTransport(f'http://127.0.0.1:{port}'),
+                                ws_domain=f'ws://127.0.0.1:{port}/')
+        client.subscribe('price', '005930')
+
+        task = asyncio.create_task(client.run())
+        start = time.perf_counter()
+        while client.counters['price'] < frames * count:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        client.stop()
+        await task
+        await runner.cleanup()
+        print(f'websocket     {frames / elapsed:12,.0f} msg/s  ring {len(client.ring("005930"))} ticks, '
+              f'errors {client.counters["errors"]}')
+
+    asyncio.run(bench())
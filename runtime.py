@@ -0,0 +1,260 @@
+'''매매 실행 엔진 - KRX 거래일/장 시간 스케줄링, 주기 작업, 전략 callback'''
+
+import heapq
+import threading
+import time
+import traceback
+
+from collections import deque
+from datetime import date, datetime, timedelta
+
+from trader import marketTime, my_print
+
+# KRX 휴장일 (주말 제외, 매년 KRX 공지 확인 후 갱신)
+KRX_HOLIDAYS = {
+    # 2023
+    '2023-01-23', '2023-01-24', '2023-03-01', '2023-05-01', '2023-05-05', '2023-05-29',
+    '2023-06-06', '2023-08-15', '2023-09-28', '2023-09-29', '2023-10-02', '2023-10-03',
+    '2023-10-09', '2023-12-25', '2023-12-29',
+    # 2024
+    '2024-01-01', '2024-02-09', '2024-02-12', '2024-03-01', '2024-04-10', '2024-05-01',
+    '2024-05-06', '2024-05-15', '2024-06-06', '2024-08-15', '2024-09-16', '2024-09-17',
+    '2024-09-18', '2024-10-01', '2024-10-03', '2024-10-09', '2024-12-25', '2024-12-31',
+    # 2025
+    '2025-01-01', '2025-01-27', '2025-01-28', '2025-01-29', '2025-01-30', '2025-03-03',
+    '2025-05-01', '2025-05-05', '2025-05-06', '2025-06-03', '2025-06-06', '2025-08-15',
+    '2025-10-03', '2025-10-06', '2025-10-07', '2025-10-08', '2025-10-09', '2025-12-25',
+    '2025-12-31',
+    # 2026
+    '2026-01-01', '2026-02-16', '2026-02-17', '2026-02-18', '2026-03-02', '2026-05-01',
+    '2026-05-05', '2026-05-25', '2026-06-03', '2026-08-17', '2026-09-24', '2026-09-25',
+    '2026-10-05', '2026-10-09', '2026-12-25', '2026-12-31',
+}
+
+# 대학수학능력시험일 - 개장, 폐장 1시간 늦춤
+KRX_LATE_OPEN = {
+    '2023-11-16', '2024-11-14', '2025-11-13', '2026-11-19',
+}
+
+class TradingCalendar:
+    '''
+    KRX 거래일, 장 시간
+    '''
+
+    def __init__(self, holidays:set=None, late_open:set=None, market_time:dict=None) -> None:
+        '''
+        holidays: 휴장일 'YYYY-MM-DD' (기본 KRX_HOLIDAYS)
+        late_open: 1시간 늦게 여는 날 'YYYY-MM-DD' (기본 KRX_LATE_OPEN)
+        market_time: 장 시작, 종료 시간 (기본 trader.marketTime)
+        '''
+        self.holidays = {date.fromisoformat(d) for d in (KRX_HOLIDAYS if holidays is None else holidays)}
+        self.late_open = {date.fromisoformat(d) for d in (KRX_LATE_OPEN if late_open is None else late_open)}
+        self.market_time = market_time or marketTime
+
+    def is_trading_day(self, day:date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day:date) -> tuple:
+        '''
+        (장 시작, 장 종료) datetime, 휴장일은 None
+        '''
+        if not self.is_trading_day(day):
+            return None
+
+        open_dt = datetime.combine(day, datetime.min.time()).replace(**self.market_time['open'])
+        close_dt = datetime.combine(day, datetime.min.time()).replace(**self.market_time['close'])
+        if day in self.late_open:
+            open_dt += timedelta(hours=1)
+            close_dt += timedelta(hours=1)
+        return open_dt, close_dt
+
+    def in_session(self, now:datetime=None) -> bool:
+        now = now or datetime.now()
+        session = self.session(now.date())
+        return session is not None and session[0] <= now <= session[1]
+
+    def next_session(self, now:datetime=None) -> tuple:
+        '''
+        진행중이거나 다음에 열리는 장의 (장 시작, 장 종료)
+        '''
+        now = now or datetime.now()
+        day = now.date()
+        for _ in range(366):
+            session = self.session(day)
+            if session is not None and now <= session[1]:
+                return session
+            day += timedelta(days=1)
+        raise ValueError('1년 안에 거래일이 없습니다. 휴장일 설정을 확인하세요.')
+
+    def last_trading_date(self, now:datetime=None) -> date:
+        '''
+        가장 최근 거래일 (오늘 포함)
+        '''
+        day = (now or datetime.now()).date()
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+class SignalQueue(deque):
+    '''
+    signal 대기열 - append 하면 기다리는 Engine 을 깨움 (RealtimeClient, IndicatorEngine 의 signals 로 전달)
+    '''
+
+    def __init__(self, iterable=(), maxlen:int=None) -> None:
+        super().__init__(iterable, maxlen)
+        self.event = threading.Event()
+
+    def append(self, signal) -> None:
+        super().append(signal)
+        self.event.set()
+
+    def extend(self, signals) -> None:
+        super().extend(signals)
+        self.event.set()
+
+    def wait(self, timeout:float) -> None:
+        '''
+        signal 이 있거나 들어올 때까지 최대 timeout 초 대기
+        '''
+        # clear 후 확인 -> 그 사이 들어온 signal 은 set 으로 깨움
+        self.event.clear()
+        if not self:
+            self.event.wait(timeout)
+
+class Strategy:
+    '''
+    전략 callback (필요한 메서드만 구현)
+    '''
+
+    def on_session_open(self, engine:'Engine') -> None:
+        pass
+
+    def on_tick(self, engine:'Engine', now:datetime) -> None:
+        pass
+
+    def on_signal(self, engine:'Engine', signal) -> None:
+        pass
+
+    def on_session_close(self, engine:'Engine') -> None:
+        pass
+
+class Engine:
+    '''
+    매매 실행 엔진
+    장 시간에만 tick_interval 간격으로 전략 실행, 장 밖에서는 다음 장 시작까지 대기
+    signal 은 들어오는 즉시 on_signal 로 전달 (tick 간격은 그대로)
+
+    ex)
+        engine = Engine()
+        realtime = RealtimeClient(kis, hts_id, signals=engine.signals, book=domestic.book)
+        engine.add_strategy(MyStrategy())
+        engine.every(600, lambda: my_print(domestic.order_asset()))
+        engine.run()
+    '''
+
+    def __init__(self, calendar:TradingCalendar=None, tick_interval:float=0.5, signals:deque=None) -> None:
+        '''
+        tick_interval: on_tick 호출 간격 (초)
+        signals: 전략에 전달할 signal 대기열 (다른 스레드에서 append, 기본 SignalQueue - 일반 deque 는 tick 마다 확인)
+        '''
+        self.calendar = calendar or TradingCalendar()
+        self.tick_interval = tick_interval
+        self.signals = SignalQueue() if signals is None else signals
+        self.strategies = []
+        self.jobs = []
+        self.job_seq = 0
+        self.stopped = threading.Event()
+        # tick 이 간격을 넘겨서 밀린 횟수
+        self.overruns = 0
+
+    def add_strategy(self, strategy:Strategy) -> Strategy:
+        self.strategies.append(strategy)
+        return strategy
+
+    def every(self, seconds:float, callback, name:str=None) -> None:
+        '''
+        장 시간 동안 seconds 간격으로 callback() 실행 (ex. 10분마다 잔고조회)
+        '''
+        self.job_seq += 1
+        heapq.heappush(self.jobs, [0.0, self.job_seq, seconds, callback, name or getattr(callback, '__name__', 'job')])
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if isinstance(self.signals, SignalQueue):
+            self.signals.event.set()
+
+    def _call(self, fn, *args) -> None:
+        # 전략 오류로 엔진이 멈추지 않도록
+        try:
+            fn(*args)
+        except:
+            my_print('########## 에러 발생 ##########')
+            traceback.print_exc()
+
+    def _run_jobs(self, now:float) -> None:
+        while self.jobs and self.jobs[0][0] <= now:
+            job = heapq.heappop(self.jobs)
+            self._call(job[3])
+            # 밀린 실행은 건너뛰고 다음 주기로
+            job[0] = max(job[0] + job[2], now)
+            heapq.heappush(self.jobs, job)
+
+    def _run_session(self, close_dt:datetime) -> None:
+        my_print('장 시작')
+        for strategy in self.strategies:
+            self._call(strategy.on_session_open, self)
+
+        start = time.monotonic()
+        for job in self.jobs:
+            job[0] = start
+        heapq.heapify(self.jobs)
+
+        next_tick = start
+        while not self.stopped.is_set():
+            now = datetime.now()
+            if now > close_dt:
+                break
+
+            while self.signals:
+                signal = self.signals.popleft()
+                for strategy in self.strategies:
+                    self._call(strategy.on_signal, self, signal)
+
+            if time.monotonic() >= next_tick:
+                for strategy in self.strategies:
+                    self._call(strategy.on_tick, self, now)
+
+                self._run_jobs(time.monotonic())
+
+                # 시작 시각 기준으로 간격 유지 (처리 시간만큼 밀리지 않도록)
+                next_tick += self.tick_interval
+                if next_tick < time.monotonic():
+                    self.overruns += 1
+                    next_tick = time.monotonic()
+
+            # 다음 tick 까지 대기, signal 이 들어오면 바로 깨어나 처리
+            delay = max(next_tick - time.monotonic(), 0)
+            if isinstance(self.signals, SignalQueue):
+                self.signals.wait(delay)
+            else:
+                self.stopped.wait(delay)
+
+        for strategy in self.strategies:
+            self._call(strategy.on_session_close, self)
+        my_print('장 종료')
+
+    def run(self) -> None:
+        '''
+        stop() 이 호출될 때까지 실행
+        '''
+        while not self.stopped.is_set():
+            now = datetime.now()
+            open_dt, close_dt = self.calendar.next_session(now)
+
+            if now < open_dt:
+                my_print(f'다음 장 시작 대기: {open_dt}')
+                # 시스템 시간 변경, 절전 등에 대비해 최대 1시간마다 다시 확인
+                self.stopped.wait(min((open_dt - now).total_seconds(), 3600))
+                continue
+
+            self._run_session(close_dt)
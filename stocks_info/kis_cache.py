@@ -0,0 +1,159 @@
+'''종목정보 DataFrame 캐시 - 칼럼별 .npy 파일 (memory-map 으로 필요한 칼럼만 읽음)'''
+
+import os
+import json
+import shutil
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+META_FILE = 'meta.json'
+
+# runtime.TradingCalendar (처음 사용할 때 생성)
+_calendar = None
+
+def last_trading_date(now:datetime=None) -> date:
+    '''
+    가장 최근 거래일 (주말, KRX 휴장일 제외 - runtime.TradingCalendar 와 같은 휴장일)
+    '''
+    global _calendar
+    if _calendar is None:
+        # runtime 이 trader 를 import 하므로 사용할 때 import
+        from runtime import TradingCalendar
+        _calendar = TradingCalendar()
+    return _calendar.last_trading_date(now)
+
+def read_meta(path:str) -> dict:
+    '''
+    캐시 정보 (없거나 깨진 경우 None)
+    '''
+    try:
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_fresh(path:str, now:datetime=None) -> bool:
+    '''
+    캐시가 최근 거래일 기준으로 만들어졌는지
+    '''
+    meta = read_meta(path)
+    return meta is not None and meta.get('trading_date') == last_trading_date(now).isoformat()
+
+def save_columns(df:pd.DataFrame, path:str, trading_date:date=None, extra:dict=None,
+                 keep_previous:bool=False) -> None:
+    '''
+    DataFrame -> 칼럼별 .npy + meta.json (dtype, category 값, 기준 거래일)
+    extra: meta.json 에 같이 저장할 값 (ex. 다운로드 ETag, Last-Modified)
+    keep_previous: 기존 캐시를 path.prev 로 보관 (변경 내역 비교용)
+    '''
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    os.makedirs(tmp_path, exist_ok=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        column = {'name': name, 'file': f'{i}.npy'}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            column['kind'] = 'category'
+            column['categories'] = [str(c) for c in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        elif series.dtype.kind in 'iufb':
+            column['kind'] = 'number'
+            values = series.to_numpy()
+        else:
+            column['kind'] = 'str'
+            values = series.astype(str).to_numpy(dtype=str)
+
+        np.save(os.path.join(tmp_path, column['file']), values, allow_pickle=False)
+        columns.append(column)
+
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'trading_date': (trading_date or last_trading_date()).isoformat(),
+            'rows': len(df),
+            'columns': columns,
+            **(extra or {}),
+        }, f, ensure_ascii=False)
+
+    # 새 캐시로 교체 (읽는 쪽이 반쯤 쓰인 캐시를 보지 않도록)
+    old_path = f'{path}.{os.getpid()}.old'
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+
+    if keep_previous and os.path.exists(old_path):
+        shutil.rmtree(previous_path(path), ignore_errors=True)
+        os.replace(old_path, previous_path(path))
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def previous_path(path:str) -> str:
+    '''
+    save_columns(keep_previous=True) 로 보관한 이전 캐시 위치
+    '''
+    return path + '.prev'
+
+def touch(path:str, trading_date:date=None) -> None:
+    '''
+    내용은 그대로 두고 기준 거래일만 갱신 (원본이 바뀌지 않은 경우)
+    '''
+    meta = read_meta(path)
+    meta['trading_date'] = (trading_date or last_trading_date()).isoformat()
+
+    meta_path = os.path.join(path, META_FILE)
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def load_columns(path:str, columns:list=None) -> pd.DataFrame:
+    '''
+    캐시 -> DataFrame
+    columns: 읽을 칼럼 (기본 전체), 나머지 칼럼 파일은 열지 않음
+    '''
+    meta = read_meta(path)
+    wanted = meta['columns'] if columns is None else [c for c in meta['columns'] if c['name'] in columns]
+
+    data = {}
+    for column in wanted:
+        values = np.load(os.path.join(path, column['file']), mmap_mode='r', allow_pickle=False)
+        if column['kind'] == 'category':
+            data[column['name']] = pd.Categorical.from_codes(values, column['categories'])
+        elif column['kind'] == 'str':
+            data[column['name']] = pd.Series(values.astype(object), dtype=object)
+        else:
+            data[column['name']] = values
+
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+
+if __name__ == '__main__':
+    # 벤치마크 (xlsx 캐시 vs 칼럼 캐시): python -m stocks_info.kis_cache
+    import time
+    import tempfile
+
+    from stocks_info import kis_master
+    from stocks_info import kis_kospi_code_mst as kospi
+
+    rows = 2500
+    df = kospi.parse_kospi_master(kis_master._sample_master(
+        rows, kospi.field_specs, kospi.part2_columns, kospi.int_columns + kospi.float_columns, kospi.TAIL))
+
+    def timeit(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = os.path.join(tmp_dir, 'kospi_code.xlsx')
+        cache_path = os.path.join(tmp_dir, 'kospi_code.cache')
+
+        _, xlsx_write = timeit(lambda: df.to_excel(xlsx_path, index=False))
+        _, xlsx_read = timeit(lambda: pd.read_excel(xlsx_path))
+        _, cache_write = timeit(lambda: save_columns(df, cache_path))
+        _, cache_read = timeit(lambda: load_columns(cache_path))
+        _, cache_read_cols = timeit(lambda: load_columns(cache_path, ['단축코드', '한글명', '거래정지']))
+
+        print(f'{rows} rows')
+        print(f'xlsx          write {xlsx_write:9.1f} ms  read {xlsx_read:9.1f} ms')
+        print(f'column cache  write {cache_write:9.1f} ms  read {cache_read:9.1f} ms  (3 columns {cache_read_cols:.1f} ms)')
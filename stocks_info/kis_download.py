@@ -0,0 +1,158 @@
+'''종목 마스터파일 조건부 다운로드 (ETag, Last-Modified) 와 이전 스냅샷과의 행 단위 비교'''
+
+import io
+import ssl
+import zipfile
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+MASTER_URLS = {
+    'KOSPI': 'https://new.real.download.dws.co.kr/common/master/kospi_code.mst.zip',
+    'KOSDAQ': 'https://new.real.download.dws.co.kr/common/master/kosdaq_code.mst.zip',
+}
+
+def fetch_master(url:str, validators:dict=None, timeout:float=30) -> tuple:
+    '''
+    마스터파일 zip 조건부 다운로드 -> .mst 내용 (파일로 풀지 않음)
+
+    validators: 이전 응답의 {'etag', 'last_modified'} (If-None-Match, If-Modified-Since)
+    return: (.mst bytes, 새 validators), 바뀌지 않았으면 (None, validators)
+    '''
+    validators = validators or {}
+    request = urllib.request.Request(url)
+    if validators.get('etag'):
+        request.add_header('If-None-Match', validators['etag'])
+    if validators.get('last_modified'):
+        request.add_header('If-Modified-Since', validators['last_modified'])
+
+    try:
+        context = ssl._create_unverified_context() if url.startswith('https') else None
+        with urllib.request.urlopen(request, timeout=timeout, context=context) as r:
+            # zip 목록(central directory)은 파일 끝에 있어서 메모리로 받은 뒤 바로 압축 해제
+            data = r.read()
+            validators = {'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, validators
+        raise
+
+    with zipfile.ZipFile(io.BytesIO(data)) as master_zip:
+        name = next(n for n in master_zip.namelist() if n.endswith('.mst'))
+        return master_zip.read(name), validators
+
+def diff_master(old:pd.DataFrame, new:pd.DataFrame, key:str, columns:list) -> dict:
+    '''
+    이전, 새 마스터 행 단위 비교 (key 칼럼 기준)
+    columns: 비교할 칼럼 (ex. 종목명, 거래정지, 정리매매 ... - 기준가, 거래량처럼 매일 바뀌는 칼럼은 제외)
+
+    return: {
+        'listed': [{칼럼: 값}, ...] 신규 상장,
+        'delisted': [key, ...] 상장 폐지,
+        'changed': [{'key', 'changes': {칼럼: (이전, 새)}, 'row': {칼럼: 새 값}}, ...],
+    }
+    값은 공백을 제거한 문자열
+    '''
+    columns = [c for c in columns if c != key]
+
+    def normalize(df):
+        values = {c: df[c].astype(str).str.strip().to_numpy() for c in [key] + columns}
+        return pd.DataFrame(values).drop_duplicates(key).set_index(key)
+
+    old, new = normalize(old), normalize(new)
+    listed = new.index.difference(old.index, sort=False)
+    delisted = old.index.difference(new.index, sort=False)
+
+    # 남아있는 종목은 한 번에 배열 비교
+    common = new.index.intersection(old.index, sort=False)
+    before = old.loc[common].to_numpy()
+    after = new.loc[common].to_numpy()
+    mask = before != after
+
+    changed = []
+    for i in np.flatnonzero(mask.any(axis=1)):
+        changed.append({
+            'key': common[i],
+            'changes': {columns[j]: (before[i, j], after[i, j]) for j in np.flatnonzero(mask[i])},
+            'row': {key: common[i], **dict(zip(columns, after[i]))},
+        })
+
+    return {
+        'listed': [{key: code, **dict(zip(columns, row))} for code, row in zip(listed, new.loc[listed].to_numpy())],
+        'delisted': list(delisted),
+        'changed': changed,
+    }
+
+if __name__ == '__main__':
+    # 로컬 HTTP 서버로 확인: python -m stocks_info.kis_download
+    import tempfile
+    import threading
+    from email.utils import formatdate
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from trader import StockInfo
+    from stocks_info import kis_master
+    from stocks_info import kis_kospi_code_mst as kospi
+    from stocks_info.kis_symbol import SymbolIndex
+
+    def sample(rows:int) -> bytes:
+        return kis_master._sample_master(rows, kospi.field_specs, kospi.part2_columns,
+                                         kospi.int_columns + kospi.float_columns, kospi.TAIL)
+
+    def to_zip(data:bytes) -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as master_zip:
+            master_zip.writestr('kospi_code.mst', data)
+        return buffer.getvalue()
+
+    # 마스터파일 제공 서버 (ETag, Last-Modified, 304)
+    files = {'version': 1, 'zip': to_zip(sample(2500))}
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            etag = f'"v{files["version"]}"'
+            requests_seen.append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(usegmt=True))
+            self.send_header('Content-Length', str(len(files['zip'])))
+            self.end_headers()
+            self.wfile.write(files['zip'])
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/kospi_code.mst.zip'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stock_info = StockInfo(tmp_dir, urls={'KOSPI': url})
+        symbols = SymbolIndex({'KOSPI': stock_info.kospi()})
+        print('처음 다운로드', len(symbols), stock_info.changes.get('KOSPI'))
+
+        # 바뀌지 않은 경우 304
+        print('변경 없음', stock_info.refresh('KOSPI'), requests_seen)
+
+        # 신규 상장 1, 상장 폐지 1 (첫 줄), 거래정지 1 (두 번째 줄)
+        lines = sample(2501).splitlines(keepends=True)
+        start = len(lines[1]) - kospi.TAIL + sum(kospi.field_specs[:kospi.part2_columns.index('거래정지')])
+        halted = lines[1][:start] + (b'N' if lines[1][start:start + 1] == b'Y' else b'Y') + lines[1][start + 1:]
+        files.update(version=2, zip=to_zip(b''.join([halted] + lines[2:])))
+
+        diff = stock_info.refresh('KOSPI')
+        print('신규 상장', [row['단축코드'] for row in diff['listed']])
+        print('상장 폐지', diff['delisted'])
+        print('변경', [(row['key'], row['changes']) for row in diff['changed']])
+
+        symbols.apply('KOSPI', diff)
+        print('인덱스 반영', len(symbols.select()), symbols.get('000000'), symbols.flags('000001'), '002500' in symbols)
+
+    server.shutdown()
@@ -0,0 +1,166 @@
+'''종목코드 마스터파일(.mst) 파서 - 코스피, 코스닥 공용'''
+
+import numpy as np
+import pandas as pd
+
+def _line_bounds(buf:np.ndarray):
+    '''
+    각 줄의 시작, 끝 위치 (끝 = 줄바꿈 문자 제외)
+    '''
+    ends = np.flatnonzero(buf == ord('\n'))
+    if len(buf) and buf[-1] != ord('\n'):
+        # 마지막 줄에 줄바꿈이 없는 경우
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # \r\n 줄바꿈 처리
+    has_cr = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == ord('\r'))
+    ends = ends - has_cr
+
+    # 빈 줄 제외
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+def _to_int(block:np.ndarray) -> np.ndarray:
+    '''
+    (행, 자리수) 숫자 문자 배열 -> int64 (공백은 무시, 빈 값은 0)
+    '''
+    digits = block.astype(np.int64) - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    values = np.zeros(len(block), dtype=np.int64)
+    for i in range(block.shape[1]):
+        values = np.where(is_digit[:, i], values * 10 + digits[:, i], values)
+
+    negative = (block == ord('-')).any(axis=1)
+    return np.where(negative, -values, values)
+
+def _to_str(block:np.ndarray) -> np.ndarray:
+    '''
+    (행, 자리수) 문자 배열 -> 공백 제거한 문자열 배열
+    '''
+    width = block.shape[1]
+    raw = np.ascontiguousarray(block).view(f'S{width}').ravel()
+    return np.char.strip(raw.astype(f'U{width}'))
+
+def _to_category(block:np.ndarray) -> pd.Categorical:
+    '''
+    (행, 자리수) 문자 배열 -> category (고유값만 디코딩)
+    '''
+    width = block.shape[1]
+    raw = np.ascontiguousarray(block).view(f'S{width}').ravel()
+    categories, codes = np.unique(raw, return_inverse=True)
+
+    # 공백 제거 후 같아지는 값 합치기
+    labels, remap = np.unique([c.decode('cp949').strip() for c in categories], return_inverse=True)
+    return pd.Categorical.from_codes(remap[codes.ravel()], labels.tolist())
+
+def parse_master(data:bytes, part1_columns:list, field_specs:list, part2_columns:list,
+                 tail:int, int_columns:tuple=(), float_columns:tuple=()) -> pd.DataFrame:
+    '''
+    .mst 파일 내용 -> DataFrame (임시파일 없이 한 번에 처리)
+
+    data: .mst 파일 bytes (cp949)
+    part1_columns: 단축코드, 표준코드, 한글명 칼럼명
+    field_specs, part2_columns: 뒤쪽 고정폭 칼럼 자리수, 칼럼명
+    tail: 줄 끝에서부터 고정폭 영역 길이 (줄바꿈 포함)
+    int_columns, float_columns: 숫자로 변환할 칼럼 (나머지 고정폭 칼럼은 category)
+    '''
+    buf = np.frombuffer(data, dtype=np.uint8)
+    starts, ends = _line_bounds(buf)
+
+    # 고정폭 영역 (행, tail - 1) 배열 - 줄바꿈 문자 제외
+    width = tail - 1
+    tail_starts = ends - width
+    fixed = buf[tail_starts[:, None] + np.arange(width)]
+
+    # 앞쪽: 단축코드(9), 표준코드(12), 한글명(가변) - 한글명만 cp949 디코딩
+    head = buf[starts[:, None] + np.arange(21)]
+    columns = {
+        part1_columns[0]: pd.Series(_to_str(head[:, :9]), dtype=object),
+        part1_columns[1]: pd.Series(_to_str(head[:, 9:21]), dtype=object),
+        part1_columns[2]: pd.Series([
+            data[s + 21:e].decode('cp949').strip() for s, e in zip(starts.tolist(), tail_starts.tolist())
+        ], dtype=object),
+    }
+
+    offset = 0
+    for name, size in zip(part2_columns, field_specs):
+        block = fixed[:, offset:offset + size]
+        offset += size
+
+        if name in int_columns:
+            columns[name] = pd.Series(_to_int(block))
+        elif name in float_columns:
+            columns[name] = pd.to_numeric(pd.Series(_to_str(block)), errors='coerce')
+        else:
+            columns[name] = pd.Series(_to_category(block))
+
+    return pd.DataFrame(columns)
+
+def _sample_master(rows:int, field_specs:list, part2_columns:list, numeric_columns:list, tail:int) -> bytes:
+    '''
+    벤치마크용 .mst 파일 내용 생성 (숫자 칼럼 외에는 코드값 몇 개만 사용)
+    '''
+    rng = np.random.default_rng(0)
+    names = ['삼성전자', '카카오', 'SK하이닉스', '현대자동차우선주', 'LG에너지솔루션']
+    lines = []
+    for i in range(rows):
+        code = f'{i:06d}'.ljust(9)
+        std = f'KR7{i:06d}00'.ljust(12)
+        name = names[i % len(names)]
+        fields = ''.join(
+            str(rng.integers(0, 10 ** min(size, 12))).rjust(size) if name in numeric_columns else
+            ('Y' if rng.random() < 0.1 else 'N') if size == 1 else
+            str(rng.integers(0, 5)).zfill(size)
+            for name, size in zip(part2_columns, field_specs)
+        ).ljust(tail - 1)
+        lines.append((code + std + name + ' ' * 20).encode('cp949') + fields.encode('cp949') + b'\n')
+    return b''.join(lines)
+
+def _legacy_parse(path:str, part1_columns:list, field_specs:list, part2_columns:list, tail:int) -> pd.DataFrame:
+    '''
+    이전 방식 (줄 단위 임시파일 작성 + read_csv / read_fwf) - 벤치마크 비교용
+    '''
+    tmp_fil1 = path + '.part1.tmp'
+    tmp_fil2 = path + '.part2.tmp'
+    with open(tmp_fil1, mode='w') as wf1, open(tmp_fil2, mode='w') as wf2:
+        with open(path, mode='r', encoding='cp949') as f:
+            for row in f:
+                rf1 = row[0:len(row) - tail]
+                wf1.write(rf1[0:9].rstrip() + ',' + rf1[9:21].rstrip() + ',' + rf1[21:].strip() + '\n')
+                wf2.write(row[-tail:])
+
+    df1 = pd.read_csv(tmp_fil1, header=None, names=part1_columns, encoding='utf-8')
+    df2 = pd.read_fwf(tmp_fil2, widths=field_specs, names=part2_columns)
+    return pd.merge(df1, df2, how='outer', left_index=True, right_index=True)
+
+if __name__ == '__main__':
+    # 벤치마크: python -m stocks_info.kis_master
+    import os
+    import time
+    import tempfile
+
+    from stocks_info import kis_kospi_code_mst as kospi
+
+    rows = 2500
+    data = _sample_master(rows, kospi.field_specs, kospi.part2_columns,
+                          kospi.int_columns + kospi.float_columns, kospi.TAIL)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'kospi_code.mst')
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        for label, parse in (
+            ('legacy (tmp file + read_fwf)', lambda: _legacy_parse(path, kospi.part1_columns, kospi.field_specs,
+                                                                  kospi.part2_columns, kospi.TAIL)),
+            ('parse_master (numpy)', lambda: kospi.parse_kospi_master(data)),
+        ):
+            parse()
+            repeat = 5
+            start = time.perf_counter()
+            for _ in range(repeat):
+                df = parse()
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f'{label:32s} {rows} rows  {elapsed * 1000:8.1f} ms  {df.memory_usage(deep=True).sum() / 1024:8.0f} KiB')
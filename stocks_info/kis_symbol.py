@@ -0,0 +1,259 @@
+'''종목 검색 인덱스 - 코스피, 코스닥 통합 (코드 조회, 종목명 검색, 거래 제한 상태)'''
+
+import bisect
+
+import numpy as np
+
+# 시장별 칼럼명 (단축코드, 표준코드, 한글명, 거래정지, 정리매매, 관리종목, 시장경고, 단기과열)
+MARKET_COLUMNS = {
+    'KOSPI': ['단축코드', '표준코드', '한글명',
+              '거래정지', '정리매매', '관리종목', '시장경고', '단기과열'],
+    'KOSDAQ': ['단축코드', '표준코드', '한글종목명',
+               '거래정지 여부', '정리매매 여부', '관리 종목 여부', '시장 경고 구분 코드', '단기과열종목구분코드'],
+}
+
+class SymbolIndex:
+    '''
+    종목 검색 인덱스
+    한 번 만들어 두고 주문 경로에서 조회 (네트워크, DataFrame 필터링 없음)
+    '''
+
+    # 거래 제한 상태 bit
+    HALTED = 1 # 거래정지
+    LIQUIDATION = 2 # 정리매매
+    ADMINISTRATIVE = 4 # 관리종목
+    WARNING = 8 # 시장경고 (투자주의, 경고, 위험)
+    OVERHEATED = 16 # 단기과열
+    DELISTED = 32 # 상장 폐지 (apply 로 반영, 조회, 검색에서 제외)
+
+    # 정상 상태 코드값
+    NORMAL_VALUES = ('', 'N', '0', '00', 'nan')
+
+    def __init__(self, markets:dict) -> None:
+        '''
+        markets: {'KOSPI': kospi DataFrame, 'KOSDAQ': kosdaq DataFrame}
+        '''
+        codes, standard_codes, names, market_names, flags = [], [], [], [], []
+        for market, df in markets.items():
+            code, standard, name, halted, liquidation, administrative, warning, overheated = MARKET_COLUMNS[market]
+
+            codes += df[code].astype(str).tolist()
+            standard_codes += df[standard].astype(str).tolist()
+            names += df[name].astype(str).tolist()
+            market_names += [market] * len(df)
+
+            # 코드값 '0', '00', 'N', 공백 -> 정상
+            def is_set(column):
+                values = df[column].astype(str).str.strip()
+                return ~values.isin(self.NORMAL_VALUES).to_numpy()
+
+            flags.append(
+                is_set(halted) * self.HALTED
+                | is_set(liquidation) * self.LIQUIDATION
+                | is_set(administrative) * self.ADMINISTRATIVE
+                | is_set(warning) * self.WARNING
+                | is_set(overheated) * self.OVERHEATED
+            )
+
+        self.codes = codes
+        self.standard_codes = standard_codes
+        self.names = names
+        self.market_names = market_names
+        self.markets = np.array(market_names)
+        self.flag_bits = np.concatenate(flags).astype(np.uint8) if flags else np.zeros(0, dtype=np.uint8)
+
+        # 코드 -> 행 번호
+        self.code_index = {c: i for i, c in enumerate(codes)}
+        self.standard_index = {c: i for i, c in enumerate(standard_codes)}
+        self.name_index = {n: i for i, n in enumerate(names)}
+        self._build_name_search()
+
+    def _build_name_search(self) -> None:
+        names = self.names
+
+        # 종목명 prefix 검색용 정렬 배열
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self.sorted_names = [names[i] for i in order]
+        self.sorted_rows = order
+
+        # 종목명 substring 검색용 (한 문자열에서 find, 위치 -> 행 번호)
+        self.name_text = '\n'.join(names)
+        self.name_offsets = []
+        offset = 0
+        for n in names:
+            self.name_offsets.append(offset)
+            offset += len(n) + 1
+
+    def _row_flags(self, market:str, row:dict) -> int:
+        _, _, _, halted, liquidation, administrative, warning, overheated = MARKET_COLUMNS[market]
+
+        def is_set(column):
+            return str(row[column]).strip() not in self.NORMAL_VALUES
+
+        return (is_set(halted) * self.HALTED
+                | is_set(liquidation) * self.LIQUIDATION
+                | is_set(administrative) * self.ADMINISTRATIVE
+                | is_set(warning) * self.WARNING
+                | is_set(overheated) * self.OVERHEATED)
+
+    def apply(self, market:str, changes:dict) -> None:
+        '''
+        마스터파일 변경 내역 반영 (StockInfo.refresh, 전체를 다시 만들지 않음)
+        상태 변경은 행 단위로 갱신, 신규 상장은 행 추가, 상장 폐지는 DELISTED 로 표시
+        '''
+        code, standard, name = MARKET_COLUMNS[market][:3]
+        rename = False
+
+        for stock_id in changes['delisted']:
+            row = self.code_index.pop(stock_id, None)
+            if row is None:
+                continue
+            self.standard_index.pop(self.standard_codes[row], None)
+            if self.name_index.get(self.names[row]) == row:
+                del self.name_index[self.names[row]]
+            self.flag_bits[row] |= self.DELISTED
+
+        for item in changes['changed']:
+            row = self.code_index.get(item['key'])
+            if row is None:
+                continue
+            values = item['row']
+            self.flag_bits[row] = self._row_flags(market, values)
+            if standard in item['changes']:
+                self.standard_index.pop(self.standard_codes[row], None)
+                self.standard_codes[row] = values[standard]
+                self.standard_index[values[standard]] = row
+            if name in item['changes']:
+                if self.name_index.get(self.names[row]) == row:
+                    del self.name_index[self.names[row]]
+                self.names[row] = values[name]
+                self.name_index[values[name]] = row
+                rename = True
+
+        listed = [values for values in changes['listed'] if values[code] not in self.code_index]
+        if listed:
+            start = len(self.codes)
+            for row, values in enumerate(listed, start):
+                self.codes.append(values[code])
+                self.standard_codes.append(values[standard])
+                self.names.append(values[name])
+                self.market_names.append(market)
+                self.code_index[values[code]] = row
+                self.standard_index[values[standard]] = row
+                self.name_index.setdefault(values[name], row)
+
+            self.markets = np.array(self.market_names)
+            self.flag_bits = np.append(self.flag_bits, np.array([self._row_flags(market, values) for values in listed],
+                                                                dtype=np.uint8))
+
+        if rename or listed:
+            self._build_name_search()
+
+    @classmethod
+    def from_stock_info(cls, stock_info) -> 'SymbolIndex':
+        '''
+        StockInfo 로 생성 (필요한 칼럼만 읽음)
+        '''
+        return cls({
+            'KOSPI': stock_info.kospi(MARKET_COLUMNS['KOSPI']),
+            'KOSDAQ': stock_info.kosdaq(MARKET_COLUMNS['KOSDAQ']),
+        })
+
+    def __len__(self) -> int:
+        return len(self.code_index)
+
+    def __contains__(self, code:str) -> bool:
+        return code in self.code_index
+
+    def get(self, code:str) -> dict:
+        '''
+        종목 정보 (없으면 None)
+        code: 단축코드 또는 표준코드
+        '''
+        row = self.code_index.get(code)
+        if row is None:
+            row = self.standard_index.get(code)
+        if row is None:
+            return None
+
+        return {
+            'stock_id': self.codes[row],
+            'standard_code': self.standard_codes[row],
+            'name': self.names[row],
+            'market': self.market_names[row],
+            'flags': int(self.flag_bits[row]),
+        }
+
+    def standard_code(self, code:str) -> str:
+        return self.standard_codes[self.code_index[code]]
+
+    def short_code(self, standard_code:str) -> str:
+        return self.codes[self.standard_index[standard_code]]
+
+    def name(self, code:str) -> str:
+        return self.names[self.code_index[code]]
+
+    def market(self, code:str) -> str:
+        return self.market_names[self.code_index[code]]
+
+    def by_name(self, name:str) -> str:
+        '''
+        종목명 -> 단축코드 (정확히 일치, 없으면 None)
+        '''
+        row = self.name_index.get(name)
+        return None if row is None else self.codes[row]
+
+    def search_prefix(self, prefix:str, limit:int=None) -> list:
+        '''
+        종목명이 prefix 로 시작하는 종목의 단축코드 (종목명 순)
+        '''
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        result = []
+        for i in range(start, len(self.sorted_names)):
+            if not self.sorted_names[i].startswith(prefix) or (limit is not None and len(result) >= limit):
+                break
+            if not self.flag_bits[self.sorted_rows[i]] & self.DELISTED:
+                result.append(self.codes[self.sorted_rows[i]])
+        return result
+
+    def search(self, text:str, limit:int=None) -> list:
+        '''
+        종목명에 text 가 포함된 종목의 단축코드
+        '''
+        result = []
+        if not text or '\n' in text:
+            return result
+
+        position = self.name_text.find(text)
+        while position != -1 and (limit is None or len(result) < limit):
+            row = bisect.bisect_right(self.name_offsets, position) - 1
+            if not self.flag_bits[row] & self.DELISTED:
+                result.append(self.codes[row])
+            # 같은 종목명 안에서 다시 찾지 않도록 다음 종목명으로
+            next_offset = self.name_offsets[row + 1] if row + 1 < len(self.name_offsets) else len(self.name_text)
+            position = self.name_text.find(text, next_offset)
+        return result
+
+    def flags(self, code:str) -> int:
+        '''
+        거래 제한 상태 bit (HALTED | LIQUIDATION | ...)
+        '''
+        return int(self.flag_bits[self.code_index[code]])
+
+    def is_tradable(self, code:str, block:int=HALTED | LIQUIDATION) -> bool:
+        '''
+        주문 가능 여부 (block 에 해당하는 상태가 없는 종목)
+        '''
+        row = self.code_index.get(code)
+        return row is not None and not int(self.flag_bits[row]) & block
+
+    def select(self, market:str=None, block:int=0) -> list:
+        '''
+        조건에 맞는 종목 단축코드
+        market: KOSPI, KOSDAQ (기본 전체)
+        block: 제외할 상태 bit
+        '''
+        mask = (self.flag_bits & (block | self.DELISTED)) == 0
+        if market is not None:
+            mask &= self.markets == market
+        return [self.codes[i] for i in np.flatnonzero(mask)]
@@ -0,0 +1,15 @@
+from accounts import AccountRunner
+
+def _accounts(appkeys):
+    return [{'appkey': appkey, 'appsecret': 'appsecret', 'account': f'{i:08d}-01', 'mode': 'r'}
+            for i, appkey in enumerate(appkeys)]
+
+def test_shards_keep_appkey_groups_together():
+    # 앱키 a 3 계좌, b 2 계좌, c 1 계좌 -> 작업 프로세스 2개: [a], [b, c]
+    runner = AccountRunner(_accounts('aaabbc'), workers=2)
+    shards = runner.shards()
+    assert sorted(''.join(account['appkey'] for account in shard) for shard in shards) == ['aaa', 'bbc']
+
+def test_shards_not_more_than_appkeys():
+    runner = AccountRunner(_accounts('aaaa'), workers=3)
+    assert [len(shard) for shard in runner.shards()] == [4]
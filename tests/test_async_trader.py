@@ -0,0 +1,97 @@
+import asyncio
+
+from fake_kis import FakeKISServer
+from trader import KISTrade, KISAuth, KISTransport, RetryPolicy, CircuitBreaker, RateLimiter
+from async_trader import AsyncKISTransport, AsyncKISAuth, AsyncDomestic
+
+STOCKS = [f'{i:06d}' for i in range(1, 26)]
+
+def _run(server, test, hashkey_mode='skip', **transport_kwargs):
+    # sync KISAuth 와 토큰을 공유하는 AsyncDomestic 으로 test(domestic, auth) 실행
+    async def run():
+        limiter = RateLimiter('r', rate=100000, burst=100)
+        kis = KISTrade('appkey', 'appsecret', '00000000-01', 'r',
+                       transport=KISTransport(server.url, limiter=limiter), limiter=limiter)
+        auth = KISAuth(kis, hashkey_mode=hashkey_mode)
+        domestic = AsyncDomestic(kis, AsyncKISAuth(kis, auth, AsyncKISTransport(server.url, limiter=limiter, **transport_kwargs)))
+        try:
+            return await test(domestic, auth)
+        finally:
+            await domestic.transport.close()
+            kis.transport.close()
+
+    return asyncio.run(run())
+
+def _fill_positions(server, domestic):
+    # 종목마다 1 주씩 보유
+    async def order():
+        return await asyncio.gather(*[domestic.order_stock(stock_id, 1) for stock_id in STOCKS])
+
+    return order()
+
+def test_token_shared_with_sync_auth():
+    async def test(domestic, auth):
+        # 동시에 토큰이 필요해도 발급은 한 번, sync KISAuth 도 같은 토큰 사용
+        results = await asyncio.gather(*[domestic.order_able(stock_id, 1000) for stock_id in STOCKS])
+        assert all(results)
+        assert auth.getToken() == await domestic.auth.getToken()
+
+    with FakeKISServer(prices={s: 1000 for s in STOCKS}) as server:
+        _run(server, test)
+        assert server.counts['token'] == 1
+
+def test_pages_follow_continuation():
+    async def test(domestic, auth):
+        assert all(await _fill_positions(server, domestic))
+        for order in list(server.exchange.orders.values()):
+            server.exchange._fill(order, order['remaining'], 1000)
+
+        positions = await domestic.order_asset()
+        assert sorted(p.stock_number for p in positions) == STOCKS
+
+    with FakeKISServer(page_size=7, prices={s: 1000 for s in STOCKS}) as server:
+        _run(server, test)
+        assert server.counts['asset'] == 4
+
+def test_token_reissued_after_expiry():
+    async def test(domestic, auth):
+        await domestic.auth.getToken()
+        server.expire_tokens()
+        assert await domestic.order_able(STOCKS[0], 1000)
+        assert await domestic.order_stock(STOCKS[0], 1, '00', 900)
+
+    with FakeKISServer(prices={s: 1000 for s in STOCKS}) as server:
+        _run(server, test)
+        assert server.counts['token'] == 2
+        assert len(server.exchange.orders) == 1
+
+def test_business_error_returns_false():
+    async def test(domestic, auth):
+        # 가격이 없는 종목 시장가 주문, 없는 주문 취소
+        assert await domestic.order_stock('999999', 1) is False
+        assert await domestic.order_cancle('00950', '9999999999') is False
+
+    with FakeKISServer(prices={s: 1000 for s in STOCKS}) as server:
+        _run(server, test)
+        assert server.exchange.orders == {}
+
+def test_injected_errors():
+    async def test(domestic, auth):
+        # 조회는 재시도해서 성공, 주문은 재전송하지 않고 실패
+        assert all(await asyncio.gather(*[domestic.order_able(stock_id, 1000) for stock_id in STOCKS]))
+        assert await domestic.order_stock(STOCKS[0], 1, '00', 900) is False
+
+    with FakeKISServer(errors={'able': 0.3, 'order': 1.0}, prices={s: 1000 for s in STOCKS}, seed=1) as server:
+        _run(server, test, retry=RetryPolicy(attempts=8, base=0.001), breaker=CircuitBreaker(failures=50))
+        assert server.counts['able'] > len(STOCKS)
+        assert server.counts['order'] == 1
+
+def test_order_not_sent_without_hashkey():
+    async def test(domestic, auth):
+        assert await domestic.order_stock(STOCKS[0], 1, '00', 900) is False
+        result = await domestic.order_basket([(STOCKS[0], 1, 'b', '00', 900), (STOCKS[1], 1, 'b', '00', 900)])
+        assert result['receipts'] == [None, None] and len(result['failures']) == 2
+
+    with FakeKISServer(errors={'hashkey': 1.0}, prices={s: 1000 for s in STOCKS}) as server:
+        _run(server, test, hashkey_mode='always', retry=RetryPolicy(attempts=1))
+        assert 'order' not in server.counts
@@ -0,0 +1,27 @@
+from trader import ResponseCache
+
+def test_hit_and_invalidate():
+    cache = ResponseCache()
+    hit, _, generation = cache.get('a', 'acc')
+    assert not hit
+    cache.put('a', 'acc', ['row'], generation)
+    assert cache.get('a', 'acc')[:2] == (True, ['row'])
+
+    cache.invalidate('acc')
+    assert not cache.get('a', 'acc')[0]
+
+def test_result_fetched_before_invalidate_is_dropped():
+    # 잔고 조회중에 주문이 들어가면 (invalidate) 주문 전 응답은 저장하지 않음
+    cache = ResponseCache()
+    hit, _, generation = cache.get('a', 'acc')
+    assert not hit
+    cache.invalidate('acc')
+    cache.put('a', 'acc', ['stale'], generation)
+    assert cache.get('a', 'acc')[0] is False
+
+def test_other_account_not_affected():
+    cache = ResponseCache()
+    _, _, generation = cache.get('able', 'acc1', ('005930', 1000))
+    cache.invalidate('acc2')
+    cache.put('able', 'acc1', 'value', generation, ('005930', 1000))
+    assert cache.get('able', 'acc1', ('005930', 1000))[:2] == (True, 'value')
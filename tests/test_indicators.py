@@ -0,0 +1,36 @@
+import numpy as np
+
+from indicators import IndicatorEngine
+from realtime import TickRing
+
+class RacingRing(TickRing):
+    # feed 가 seq 를 읽은 뒤 복사하기 전에 수신 스레드가 체결을 더 쓰는 경우
+    def __init__(self, capacity:int, extra:list) -> None:
+        super().__init__(capacity)
+        self.extra = extra
+
+    def range(self, start:int, stop:int) -> np.ndarray:
+        for price in self.extra:
+            self.append(0, price, 1, 1)
+        self.extra = []
+        return super().range(start, stop)
+
+def test_range_skips_overwritten():
+    ring = TickRing(4)
+    for price in range(10):
+        ring.append(0, price, 1, 1)
+    assert ring.range(7, 10)['price'].tolist() == [7, 8, 9]
+    assert ring.range(2, 10)['price'].tolist() == [6, 7, 8, 9]
+    assert ring.latest(2)['price'].tolist() == [8, 9]
+
+def test_feed_reads_captured_range():
+    ring = RacingRing(64, extra=[6.0, 7.0, 8.0])
+    for price in (1.0, 2.0, 3.0, 4.0, 5.0):
+        ring.append(0, price, 1, 1)
+    engine = IndicatorEngine(['005930'])
+
+    assert engine.feed({'005930': ring}) == 5
+    assert engine.price[0] == 5.0
+    assert engine.feed({'005930': ring}) == 3
+    assert engine.count[0] == 8 and engine.price[0] == 8.0
+    assert engine.value('sma5', np.array([0]))[0] == np.mean([4.0, 5.0, 6.0, 7.0, 8.0])
@@ -0,0 +1,89 @@
+import os
+from datetime import date, datetime
+
+import journal as journal_module
+from journal import OrderJournal
+from models import Receipt
+
+DAY = date(2024, 1, 2)
+
+def _body(stock_id='005930', quantity=10, price=70000):
+    return {'CANO': '00000000', 'ACNT_PRDT_CD': '01', 'PDNO': stock_id, 'ORD_DVSN': '00',
+            'ORD_QTY': str(quantity), 'ORD_UNPR': str(price)}
+
+def _write_day(directory):
+    # 접수 + 체결, 거부, 결과 없음 주문 하나씩
+    with OrderJournal(directory, DAY) as journal:
+        entry = journal.intent('b', _body(), tag='signal')
+        journal.receipt(entry, Receipt(True, '00950', '0000000001', datetime(1900, 1, 1, 9, 0, 1), _body()))
+        journal.fill('0000000001', 4, 70000)
+        journal.reject(journal.intent('s', _body('000660')), 'APBK0918', '잔고 부족')
+        journal.intent('b', _body('035420'))
+        return journal.path
+
+def test_replay(tmp_path):
+    _write_day(tmp_path)
+    with OrderJournal(tmp_path, DAY) as journal:
+        state = journal.replay()
+        assert journal.fired('signal') and not journal.fired('other')
+
+    (kind, order_type, receipt), fill = state['events']
+    assert (kind, order_type, receipt.order_number, receipt.body['PDNO']) == ('order', 'b', '0000000001', '005930')
+    assert fill == ('fill', '0000000001', 4, 70000)
+    assert [intent['body']['PDNO'] for intent in state['unresolved']] == ['035420']
+
+def test_unmatched_stays_unresolved(tmp_path):
+    _write_day(tmp_path)
+    with OrderJournal(tmp_path, DAY) as journal:
+        journal.resolve(journal.replay()['unresolved'][0]['seq'], 'unmatched')
+
+    with OrderJournal(tmp_path, DAY) as journal:
+        unresolved = journal.replay()['unresolved']
+    assert [(intent['body']['PDNO'], intent['status']) for intent in unresolved] == [('035420', 'unmatched')]
+
+def test_torn_tail_truncated(tmp_path):
+    path = _write_day(tmp_path)
+    size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(b'0badc0de {"seq":7,"t":"fi')
+
+    with OrderJournal(tmp_path, DAY) as journal:
+        assert len(journal.records) == 6 and os.path.getsize(path) == size
+        journal.fill('0000000001', 6, 70000)
+
+    with OrderJournal(tmp_path, DAY) as journal:
+        assert [record['seq'] for record in journal.records] == [1, 2, 3, 4, 5, 6, 7]
+        assert journal.replay()['events'][-1] == ('fill', '0000000001', 6, 70000)
+
+def test_crc_mismatch_rejected(tmp_path):
+    path = _write_day(tmp_path)
+    with open(path, 'rb') as f:
+        lines = f.readlines()
+    # 세 번째 줄 (체결) 의 수량을 바꿈 -> crc 불일치, 그 줄부터 잘라냄
+    lines[2] = lines[2].replace(b'"quantity":4', b'"quantity":9')
+    with open(path, 'wb') as f:
+        f.writelines(lines)
+
+    with OrderJournal(tmp_path, DAY) as journal:
+        assert [record['t'] for record in journal.records] == ['intent', 'receipt']
+        assert os.path.getsize(path) == len(lines[0]) + len(lines[1])
+
+def test_date_rollover(tmp_path, monkeypatch):
+    today = [DAY]
+
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return today[0]
+
+    monkeypatch.setattr(journal_module, 'date', FakeDate)
+    with OrderJournal(tmp_path) as journal:
+        journal.intent('b', _body(), tag='signal')
+        today[0] = date(2024, 1, 3)
+        journal.intent('b', _body('000660'))
+        assert not journal.fired('signal')
+
+    with OrderJournal(tmp_path, DAY) as journal:
+        assert [record['body']['PDNO'] for record in journal.records] == ['005930']
+    with OrderJournal(tmp_path, date(2024, 1, 3)) as journal:
+        assert [record['body']['PDNO'] for record in journal.records] == ['000660']
@@ -0,0 +1,21 @@
+import json
+from datetime import date, datetime
+
+import pandas as pd
+
+from stocks_info import kis_cache
+
+def test_last_trading_date_skips_holidays():
+    # 2024-09-16 ~ 18 추석 휴장 -> 직전 금요일
+    assert kis_cache.last_trading_date(datetime(2024, 9, 18, 10)) == date(2024, 9, 13)
+    assert kis_cache.last_trading_date(datetime(2024, 9, 22, 10)) == date(2024, 9, 20)
+
+def test_is_fresh(tmp_path):
+    path = str(tmp_path / 'kospi')
+    kis_cache.save_columns(pd.DataFrame({'code': ['005930']}), path, trading_date=date(2024, 9, 13))
+    assert kis_cache.is_fresh(path, datetime(2024, 9, 18, 10))
+    assert not kis_cache.is_fresh(path, datetime(2024, 9, 19, 10))
+
+def test_is_fresh_without_trading_date(tmp_path):
+    (tmp_path / kis_cache.META_FILE).write_text(json.dumps({'rows': 0, 'columns': []}))
+    assert not kis_cache.is_fresh(str(tmp_path))
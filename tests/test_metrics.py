@@ -0,0 +1,18 @@
+from trader import Metrics
+
+def test_snapshot_matches_quantile():
+    metrics = Metrics()
+    for i in range(100):
+        metrics.observe('tr', 'total', 0.001 + i * 0.0004)
+
+    latency = metrics.snapshot()['latency']['tr']['total']
+    assert latency['p50'] == metrics.quantile('tr', 'total', 0.5)
+    assert latency['p99'] == metrics.quantile('tr', 'total', 0.99)
+    # 중간값 0.021 은 0.01 ~ 0.025 구간 안에서 보간, 최대값을 넘지 않음
+    assert 0.01 < latency['p50'] < 0.025 < latency['p99'] <= latency['max']
+
+def test_quantile_min_count():
+    metrics = Metrics()
+    metrics.observe('tr', 'total', 0.003)
+    assert metrics.quantile('tr', 'total', 0.5, min_count=2) is None
+    assert metrics.quantile('tr', 'total', 0.5) == metrics.snapshot()['latency']['tr']['total']['p50'] <= 0.003
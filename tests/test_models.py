@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+import pytest
+
+from models import Position
+
+ROW = {'pdno': '005930', 'prdt_name': '삼성전자', 'hldg_qty': '10', 'pchs_avg_pric': '58200.0000',
+       'pchs_amt': '582000', 'evlu_amt': '583000'}
+
+def test_position_from_api():
+    position = Position.from_api(ROW)
+    assert position['holding_quantity'] == 10 and position.avg_price == Decimal('58200')
+    assert position == position.to_dict() == Position.from_api(dict(ROW))
+
+def test_record_unhashable():
+    # dict 와 같게 비교하므로 dict 처럼 hash 하지 않음
+    with pytest.raises(TypeError):
+        hash(Position.from_api(ROW))
@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+from journal import OrderJournal
+from models import Receipt
+from trader import OrderBook
+
+def _receipt(order_number='0000000001', quantity=10):
+    body = {'CANO': '00000000', 'ACNT_PRDT_CD': '01', 'PDNO': '005930', 'ORD_DVSN': '00',
+            'ORD_QTY': str(quantity), 'ORD_UNPR': '70000'}
+    return Receipt(True, '00950', order_number, datetime(1900, 1, 1, 9, 0, 1), body)
+
+def test_fill_capped_at_remaining(tmp_path):
+    with OrderJournal(tmp_path, date(2024, 1, 2)) as journal:
+        book = OrderBook(journal)
+        book.on_order(_receipt(), 'b')
+        book.on_fill('0000000001', 6, 70000)
+        # 잔량 4 를 넘는 통보, 이미 전량 체결된 주문의 중복 통보
+        book.on_fill('0000000001', 6, 70000)
+        book.on_fill('0000000001', 6, 70000)
+        assert book.position('005930') == 10 and book.orders == {}
+
+    with OrderJournal(tmp_path, date(2024, 1, 2)) as journal:
+        fills = [record['quantity'] for record in journal.records if record['t'] == 'fill']
+    assert fills == [6, 4]
+
+def test_fill_unknown_order_ignored():
+    book = OrderBook()
+    book.on_fill('9999999999', 5, 70000)
+    assert book.holdings() == {}
@@ -0,0 +1,85 @@
+import json
+import asyncio
+
+from aiohttp import web
+
+from trader import KISTrade, RetryPolicy
+from async_trader import AsyncKISTransport
+from realtime import RealtimeClient, _price_frame
+
+async def _server(approval_failures:int=0, rejected_keys:tuple=()):
+    # 접속키 발급이 approval_failures 번 실패한 뒤 성공, 체결가 구독시 메시지 1개 전송
+    # rejected_keys 의 접속키로 구독하면 거부 (만료된 접속키)
+    state = {'approvals': 0}
+
+    async def approval(request):
+        state['approvals'] += 1
+        if state['approvals'] <= approval_failures:
+            return web.Response(status=503, text='service unavailable')
+        return web.json_response({'approval_key': f'key{state["approvals"]}'})
+
+    async def stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            request = json.loads(msg.data)
+            tr_id, tr_key = request['body']['input']['tr_id'], request['body']['input']['tr_key']
+            if request['header']['approval_key'] in rejected_keys:
+                await ws.send_str(json.dumps({'header': {'tr_id': tr_id, 'tr_key': tr_key},
+                                              'body': {'rt_cd': '1', 'msg_cd': 'OPSP0011', 'msg1': 'invalid approval'}}))
+                continue
+            await ws.send_str(_price_frame(tr_key, '090000', 58000, 1))
+        return ws
+
+    app = web.Application()
+    app.router.add_post('/oauth2/Approval', approval)
+    app.router.add_get('/', stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1], state
+
+def _run_until_price(server_kwargs:dict) -> dict:
+    # 체결가 1건을 받을 때까지 실행 -> 서버 state
+    async def run():
+        runner, port, state = await _server(**server_kwargs)
+        kis = KISTrade('appkey', 'appsecret', '00000000-01')
+        client = RealtimeClient(kis, transport=AsyncKISTransport(f'http://127.0.0.1:{port}', retry=RetryPolicy(attempts=1)),
+                                ws_domain=f'ws://127.0.0.1:{port}/')
+        client.RECONNECT = 0.05
+        client.subscribe('price', '005930')
+
+        task = asyncio.create_task(client.run())
+        try:
+            for _ in range(200):
+                if client.counters['price'] or task.done():
+                    break
+                await asyncio.sleep(0.01)
+            assert not task.done()
+            assert client.counters['price'] == 1
+        finally:
+            client.stop()
+            await asyncio.wait_for(task, 5)
+            await runner.cleanup()
+        assert client.transport.session is None or client.transport.session.closed
+        return state
+
+    return asyncio.run(run())
+
+def test_reconnect_after_approval_failure():
+    assert _run_until_price({'approval_failures': 1})['approvals'] == 2
+
+def test_new_approval_key_after_rejection():
+    assert _run_until_price({'rejected_keys': ('key1',)})['approvals'] == 2
+
+def test_price_signals_opt_in():
+    from collections import deque
+
+    kis = KISTrade('appkey', 'appsecret', '00000000-01')
+    message = _price_frame('005930', '090000', 58000, 1, 3)
+    for price_signals, expected in ((False, 0), (True, 3)):
+        signals = deque()
+        client = RealtimeClient(kis, signals=signals, price_signals=price_signals)
+        client.handle(message)
+        assert len(client.ring('005930')) == 3 and len(signals) == expected
@@ -0,0 +1,107 @@
+import time
+import socket
+import asyncio
+
+import pytest
+
+from fake_kis import FakeKISServer
+from trader import KISTrade, KISAuth, KISTransport, KISError, RetryPolicy, CircuitBreaker, RateLimiter, Domestic
+from async_trader import AsyncKISTransport
+
+def _domestic(server, **transport_kwargs) -> Domestic:
+    limiter = RateLimiter('r', rate=100000, burst=100)
+    transport = KISTransport(server.url, limiter=limiter, **transport_kwargs)
+    kis = KISTrade('appkey', 'appsecret', '00000000-01', 'r', transport=transport, limiter=limiter)
+    return Domestic(kis, KISAuth(kis, hashkey_mode='skip'))
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def test_order_not_resent_after_server_error():
+    # 서버 오류 (처리됐을 수 있음) -> 주문은 재시도하지 않음
+    with FakeKISServer(errors={'order': 1.0}, prices={'005930': 1000}) as server:
+        domestic = _domestic(server, retry=RetryPolicy(attempts=5, base=0.001))
+        assert domestic.order_stock('005930', 1, '00', 900) is False
+        assert server.counts['order'] == 1
+
+def test_order_not_resent_after_timeout():
+    # 응답 timeout (서버는 주문을 처리함) -> 다시 보내지 않아야 중복 주문이 없음
+    with FakeKISServer(latency={'order': 0.5}, prices={'005930': 1000}) as server:
+        domestic = _domestic(server, timeout=0.1, retry=RetryPolicy(attempts=5, base=0.001))
+        domestic.auth.getToken()
+        assert domestic.order_stock('005930', 1, '00', 900) is False
+        time.sleep(0.6)
+        assert server.counts['order'] == 1
+        assert len(server.exchange.orders) == 1
+
+def test_order_resent_once_after_token_rejection():
+    # 만료 토큰은 처리 전에 거부 (EGW00123) -> 새 토큰으로 1회 재전송, 주문은 하나만 접수
+    with FakeKISServer(prices={'005930': 1000}) as server:
+        domestic = _domestic(server)
+        domestic.auth.getToken()
+        server.expire_tokens()
+        assert domestic.order_stock('005930', 1, '00', 900)
+        assert server.counts['order'] == 2
+        assert len(server.exchange.orders) == 1
+
+def test_order_retried_after_rate_limit():
+    # EGW00201 은 처리 전에 거부 -> 주문도 재시도
+    with FakeKISServer(rate=5, prices={'005930': 1000}) as server:
+        domestic = _domestic(server, retry=RetryPolicy(attempts=6, base=0.2, cap=1.0))
+        domestic.auth.getToken()
+        time.sleep(1)
+        receipts = [domestic.order_stock('005930', 1, '00', 900) for _ in range(8)]
+        assert all(receipts)
+        assert len(server.exchange.orders) == 8
+
+def test_inquiry_retried_after_server_error():
+    with FakeKISServer(errors={'able': 0.3}, prices={'005930': 1000}, seed=1) as server:
+        # 연속 실패로 circuit 이 열리지 않도록 breaker 여유
+        domestic = _domestic(server, retry=RetryPolicy(attempts=8, base=0.001), breaker=CircuitBreaker(failures=50))
+        assert all(domestic.order_able('005930', 1000) for _ in range(20))
+        assert server.counts['able'] > 20
+
+def test_circuit_breaker_fails_fast():
+    transport = KISTransport(f'http://127.0.0.1:{_closed_port()}', retry=RetryPolicy(attempts=1),
+                             breaker=CircuitBreaker(failures=2, reset=60))
+    kinds = []
+    for _ in range(4):
+        with pytest.raises(KISError) as e:
+            transport.get('/x')
+        kinds.append(e.value.kind)
+    assert kinds == ['connect', 'connect', 'circuit', 'circuit']
+    assert not e.value.sent
+
+def test_async_connect_error_classified():
+    async def run():
+        transport = AsyncKISTransport(f'http://127.0.0.1:{_closed_port()}', retry=RetryPolicy(attempts=1))
+        try:
+            await transport.get('/x')
+        finally:
+            await transport.close()
+
+    with pytest.raises(KISError) as e:
+        asyncio.run(run())
+    assert e.value.kind == 'connect' and not e.value.sent
+
+def test_order_not_sent_without_hashkey():
+    # hashkey 발급 실패 -> 빈 hashkey 로 주문하지 않음
+    with FakeKISServer(errors={'hashkey': 1.0}, prices={'005930': 1000, '000660': 1000}) as server:
+        domestic = _domestic(server, retry=RetryPolicy(attempts=1))
+        domestic.auth.hashkey_mode = 'always'
+        assert domestic.order_stock('005930', 1, '00', 900) is False
+
+        result = domestic.order_basket([('005930', 1, 'b', '00', 900), ('000660', 1, 'b', '00', 900)])
+        assert result['receipts'] == [None, None]
+        assert [failure['msg_cd'] for failure in result['failures']] == ['RuntimeError', 'RuntimeError']
+        assert 'order' not in server.counts
+
+def test_rate_limiter_rejects_unknown_tr():
+    # 정정취소가능 주문 조회는 실전투자만 제공
+    RateLimiter('r', tr_rate={'changable': 1})
+    with pytest.raises(ValueError, match='changable'):
+        RateLimiter('s', tr_rate={'changable': 1})
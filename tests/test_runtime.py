@@ -0,0 +1,46 @@
+import time
+import threading
+from datetime import datetime, timedelta
+
+from runtime import Engine, SignalQueue, Strategy
+
+class Recorder(Strategy):
+    def __init__(self) -> None:
+        self.ticks = 0
+        self.signals = []
+
+    def on_tick(self, engine, now):
+        self.ticks += 1
+
+    def on_signal(self, engine, signal):
+        self.signals.append((signal, time.monotonic()))
+
+def test_signal_handled_on_arrival():
+    engine = Engine(tick_interval=1.0)
+    recorder = engine.add_strategy(Recorder())
+    thread = threading.Thread(target=engine._run_session, args=(datetime.now() + timedelta(minutes=1),))
+    thread.start()
+    try:
+        time.sleep(0.2)
+        sent = time.monotonic()
+        engine.signals.append('signal')
+        for _ in range(100):
+            if recorder.signals:
+                break
+            time.sleep(0.01)
+    finally:
+        engine.stop()
+        thread.join(2)
+
+    assert not thread.is_alive()
+    (signal, handled), = recorder.signals
+    # tick 간격 (1초) 을 기다리지 않고 처리, tick 은 시작할 때 한 번만
+    assert signal == 'signal' and handled - sent < 0.2
+    assert recorder.ticks == 1
+
+def test_signal_queue_wait():
+    signals = SignalQueue()
+    start = time.monotonic()
+    threading.Timer(0.05, signals.append, args=('signal',)).start()
+    signals.wait(2)
+    assert signals and time.monotonic() - start < 1
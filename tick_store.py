@@ -0,0 +1,266 @@
+'''체결 저장소 - 종목, 날짜별 고정폭 레코드 파일 (추가만, 읽을 때 memory-map)'''
+
+import os
+import json
+import bisect
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+# 체결 기록 (시각 ns, 가격, 수량, 매수/매도 1/-1, 장전 등 0)
+TICK_DTYPE = np.dtype([('ts', '<i8'), ('price', '<f8'), ('qty', '<i8'), ('side', 'i1')])
+
+# 봉 (구간 시작 시각 ns, 시가, 고가, 저가, 종가, 거래량, 체결 수)
+BAR_DTYPE = np.dtype([('ts', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                      ('volume', '<i8'), ('count', '<i8')])
+
+META_FILE = 'symbols.json'
+
+def _day_range(ts:int) -> tuple:
+    # ts 가 속한 날짜, 그 날의 시작, 끝 ns
+    day = datetime.fromtimestamp(ts / 1e9).date()
+    start = int(datetime.combine(day, datetime.min.time()).timestamp()) * 1_000_000_000
+    return day, start, start + 86400 * 1_000_000_000
+
+class TickWriter:
+    '''
+    한 종목, 하루치 파일에 레코드 추가 (batch 단위로 쓰기)
+    '''
+
+    def __init__(self, path:str, batch:int=256) -> None:
+        self.path = path
+        self.buffer = np.zeros(batch, dtype=TICK_DTYPE)
+        self.size = 0
+
+        self.file = open(path, 'ab')
+        # 비정상 종료로 마지막 레코드가 잘린 경우 잘라내고 이어쓰기
+        length = self.file.seek(0, os.SEEK_END)
+        if length % TICK_DTYPE.itemsize:
+            self.file.truncate(length - length % TICK_DTYPE.itemsize)
+
+    def append(self, ts:int, price:float, qty:int, side:int) -> None:
+        self.buffer[self.size] = (ts, price, qty, side)
+        self.size += 1
+        if self.size == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.size:
+            self.file.write(self.buffer[:self.size].tobytes())
+            self.size = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+class TickStore:
+    '''
+    체결 저장소
+    root/YYYYMMDD/종목코드.ticks (시세 체결), 종목코드.fills (내 주문 체결)
+    파일 = TICK_DTYPE 레코드 배열 (헤더 없음) -> 읽을 때 파싱 없이 memory-map
+
+    ex)
+        store = TickStore('ticks', symbols)
+        store.append('005930', ts, 58200, 10, 1)
+        store.window('005930', start_ts, end_ts)
+        store.bars('005930', 60)
+    '''
+
+    def __init__(self, root:str='ticks', symbols=None, batch:int=256) -> None:
+        '''
+        root: 저장 디렉토리
+        symbols: 종목 검색 인덱스 (stocks_info.kis_symbol.SymbolIndex), 날짜별 종목정보 기록
+        batch: 파일에 쓰기 전 모아둘 레코드 수 (flush 전에는 읽히지 않음)
+        '''
+        self.root = root
+        self.symbols = symbols
+        self.batch = batch
+        self.writers = {}
+        self.lock = threading.Lock()
+
+        # 마지막으로 쓴 날짜 (날짜 계산 생략)
+        self.day = None
+        self.day_start = 0
+        self.day_end = 0
+
+    def _path(self, day:date, stock_id:str, kind:str) -> str:
+        return os.path.join(self.root, day.strftime('%Y%m%d'), f'{stock_id}.{kind}')
+
+    ######################################## 쓰기
+
+    def _writer(self, day:date, stock_id:str, kind:str) -> TickWriter:
+        key = (day, stock_id, kind)
+        writer = self.writers.get(key)
+        if writer is None:
+            path = self._path(day, stock_id, kind)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer = self.writers[key] = TickWriter(path, self.batch)
+            self._write_meta(day, stock_id)
+        return writer
+
+    def _write_meta(self, day:date, stock_id:str) -> None:
+        # 종목정보는 마스터파일 기준 (종목명, 시장, 표준코드 - 상장폐지, 코드 변경 후에도 확인 가능)
+        if self.symbols is None:
+            return
+
+        meta = self.meta(day)
+        if stock_id in meta or stock_id not in self.symbols:
+            return
+        meta[stock_id] = self.symbols.get(stock_id)
+
+        path = os.path.join(self.root, day.strftime('%Y%m%d'), META_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def append(self, stock_id:str, ts:int, price:float, qty:int, side:int=0, kind:str='ticks') -> None:
+        '''
+        ts: 체결 시각 (epoch ns)
+        side: 매수 1, 매도 -1
+        kind: ticks(시세 체결), fills(내 주문 체결)
+        '''
+        with self.lock:
+            if not self.day_start <= ts < self.day_end:
+                self.day, self.day_start, self.day_end = _day_range(ts)
+                self._close_before(self.day)
+            self._writer(self.day, stock_id, kind).append(ts, price, qty, side)
+
+    def _close_before(self, day:date) -> None:
+        # 지난 날짜 파일 닫기
+        for key in [k for k in self.writers if k[0] < day]:
+            self.writers.pop(key).close()
+
+    def flush(self) -> None:
+        with self.lock:
+            for writer in self.writers.values():
+                writer.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            for writer in self.writers.values():
+                writer.close()
+            self.writers.clear()
+
+    ######################################## 읽기
+
+    def meta(self, day:date) -> dict:
+        '''
+        날짜별 종목정보 {종목코드: SymbolIndex.get}
+        '''
+        try:
+            with open(os.path.join(self.root, day.strftime('%Y%m%d'), META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def days(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(datetime.strptime(d, '%Y%m%d').date() for d in os.listdir(self.root) if d.isdigit())
+
+    def stocks(self, day:date, kind:str='ticks') -> list:
+        directory = os.path.join(self.root, day.strftime('%Y%m%d'))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(f[:-len(kind) - 1] for f in os.listdir(directory) if f.endswith('.' + kind))
+
+    def read(self, stock_id:str, day:date=None, kind:str='ticks') -> np.ndarray:
+        '''
+        하루치 체결 (memory-map, 읽기 전용) - 없으면 빈 배열
+        '''
+        path = self._path(day or date.today(), stock_id, kind)
+        try:
+            size = os.path.getsize(path) // TICK_DTYPE.itemsize
+        except OSError:
+            size = 0
+        if size == 0:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(size,))
+
+    def window(self, stock_id:str, start:int=None, end:int=None, day:date=None, kind:str='ticks') -> np.ndarray:
+        '''
+        start <= ts < end 체결 (복사 없이 slice)
+        start, end: epoch ns (기본 하루 전체), day 를 주지 않으면 start 기준 날짜
+        '''
+        if day is None:
+            day = date.today() if start is None else _day_range(start)[0]
+        ticks = self.read(stock_id, day, kind)
+
+        # 칼럼이 strided view 라 np.searchsorted 는 전체를 복사 -> bisect 로 필요한 위치만 읽음
+        ts = ticks['ts']
+        lo = 0 if start is None else bisect.bisect_left(ts, start)
+        hi = len(ts) if end is None else bisect.bisect_left(ts, end)
+        return ticks[lo:hi]
+
+    def bars(self, stock_id:str, interval:float, start:int=None, end:int=None, day:date=None) -> np.ndarray:
+        '''
+        interval 초 단위 OHLCV (체결이 없는 구간은 제외)
+        '''
+        return to_bars(self.window(stock_id, start, end, day), interval)
+
+def to_bars(ticks:np.ndarray, interval:float) -> np.ndarray:
+    '''
+    체결 (시간순) -> interval 초 봉
+    '''
+    if len(ticks) == 0:
+        return np.zeros(0, dtype=BAR_DTYPE)
+
+    step = int(interval * 1_000_000_000)
+    bucket = ticks['ts'] // step
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(ticks))
+
+    price = ticks['price']
+    bars = np.empty(len(starts), dtype=BAR_DTYPE)
+    bars['ts'] = bucket[starts] * step
+    bars['open'] = price[starts]
+    bars['high'] = np.maximum.reduceat(price, starts)
+    bars['low'] = np.minimum.reduceat(price, starts)
+    bars['close'] = price[ends - 1]
+    bars['volume'] = np.add.reduceat(ticks['qty'], starts)
+    bars['count'] = ends - starts
+    return bars
+
+if __name__ == '__main__':
+    # 벤치마크: python tick_store.py
+    import time
+    import tempfile
+
+    rows = 1_000_000
+    day_start = int(datetime.combine(date.today(), datetime.min.time()).timestamp()) * 1_000_000_000
+    open_ns = day_start + 9 * 3600 * 1_000_000_000
+
+    rng = np.random.default_rng(0)
+    ts = open_ns + np.sort(rng.integers(0, 6 * 3600 * 1_000_000_000, rows))
+    price = 58000 + np.cumsum(rng.integers(-1, 2, rows)) * 100
+    qty = rng.integers(1, 100, rows)
+    side = rng.choice([-1, 1], rows)
+
+    def timeit(fn, repeat=1):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return result, (time.perf_counter() - start) / repeat * 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = TickStore(tmp_dir)
+
+        def write():
+            for row in zip(ts.tolist(), price.tolist(), qty.tolist(), side.tolist()):
+                store.append('005930', *row)
+            store.flush()
+        _, write_ms = timeit(write)
+
+        _, read_ms = timeit(lambda: store.read('005930'), 100)
+        window, window_ms = timeit(lambda: store.window('005930', open_ns + 3600 * 1_000_000_000,
+                                                       open_ns + 3900 * 1_000_000_000), 100)
+        bars, bars_ms = timeit(lambda: store.bars('005930', 60), 10)
+        store.close()
+
+        print(f'{rows} ticks, {os.path.getsize(store._path(date.today(), "005930", "ticks")) / 2 ** 20:.1f} MiB')
+        print(f'append         {write_ms / rows * 1e6:8.2f} ns/tick')
+        print(f'read (mmap)    {read_ms:8.3f} ms')
+        print(f'window (5 min) {window_ms:8.3f} ms  {len(window)} ticks')
+        print(f'1 min bars     {bars_ms:8.3f} ms  {len(bars)} bars')
@@ -1,20 +1,732 @@
 import os
 import json
+import time
+import bisect
+import asyncio
+import threading
+import random
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from datetime import datetime, timedelta, time as dt_time
+from typing import TYPE_CHECKING
+
+from models import Receipt, OpenOrder, Position, BuyingPower, Records
+
+# pandas 는 종목정보를 읽을 때 import (KISTrade 만 쓰는 도구의 import 시간 절약)
+if TYPE_CHECKING:
+    import pandas as pd
+
+class TokenBucket:
+    '''
+    token bucket (초당 rate 개 충전, 최대 burst 개 보관)
+    '''
+
+    def __init__(self, rate:float, burst:float=1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now:float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now:float) -> float:
+        '''
+        토큰 1개를 쓸 수 있을 때까지 남은 시간 (초)
+        '''
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now:float):
+        self._refill(now)
+        self.tokens -= 1
+
+class RateLimiter:
+    '''
+    요청 속도 제한 (앱키 단위 + TR 별 token bucket, 주문 TR 우선 처리)
+
+    모든 요청은 대기열에 들어가고, 별도 스레드가 우선순위 순서대로 내보냄
+    대기한 시간(초)은 acquire 의 반환값과 report() 로 확인
+    '''
+
+    # 앱키 단위 초당 요청 수 (실전 20건, 모의 2건 제한에 여유분)
+    RATE = {'r': 18, 's': 1.8}
+    # TRAIDING_ID 항목별 초당 요청 수 (없으면 앱키 단위 제한만 적용)
+    TR_RATE = {'r': {}, 's': {}}
+    # 우선 처리할 TRAIDING_ID 항목 (주문)
+    PRIORITY = ('b', 's', 'c')
+
+    def __init__(self, mode:str='s', rate:float=None, tr_rate:dict=None, burst:float=1) -> None:
+        '''
+        mode: real(r), simulate(s)
+        rate: 앱키 단위 초당 요청 수 (기본 RATE[mode])
+        tr_rate: TRAIDING_ID 항목별 초당 요청 수 ex) {'able': 5, 'a': 1} (mode 에 없는 항목은 ValueError)
+        burst: 한 번에 몰아서 보낼 수 있는 요청 수
+        '''
+        self.mode = mode
+        self.bucket = TokenBucket(rate or self.RATE[mode], burst)
+
+        tr_ids = Domestic.TRAIDING_ID[mode]
+        tr_rate = {**self.TR_RATE[mode], **(tr_rate or {})}
+        unknown = sorted(set(tr_rate) - set(tr_ids))
+        if unknown:
+            raise ValueError(f'{mode} 모드에 없는 TRAIDING_ID 항목입니다: {unknown} (가능: {sorted(tr_ids)})')
+        self.tr_buckets = {tr_ids[key]: TokenBucket(rate, burst) for key, rate in tr_rate.items()}
+        self.priority_ids = {tr_ids[key] for key in self.PRIORITY if key in tr_ids}
+
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.seq = 0
+        self.stats = {}
+        self.thread = None
+
+    def _priority(self, tr_id:str) -> int:
+        # 토큰, hashkey (tr_id 없음) 는 주문 경로이므로 주문과 같이 처리
+        if tr_id is None or tr_id in self.priority_ids:
+            return 0
+        return 1
+
+    def _enqueue(self, tr_id:str, wake) -> None:
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='RateLimiter', daemon=True)
+                self.thread.start()
+            self.seq += 1
+            self.waiting.append((self._priority(tr_id), self.seq, tr_id, time.monotonic(), wake))
+            self.cond.notify()
+
+    def _run(self):
+        with self.cond:
+            while True:
+                if not self.waiting:
+                    self.cond.wait()
+                    continue
+
+                now = time.monotonic()
+                delay = self.bucket.delay(now)
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+
+                # 우선순위 순서로, TR 제한에 걸리지 않은 첫 요청을 내보냄
+                chosen = None
+                delay = None
+                for waiter in sorted(self.waiting):
+                    tr_bucket = self.tr_buckets.get(waiter[2])
+                    tr_delay = tr_bucket.delay(now) if tr_bucket else 0
+                    if tr_delay <= 0:
+                        chosen = waiter
+                        break
+                    delay = tr_delay if delay is None else min(delay, tr_delay)
+
+                if chosen is None:
+                    self.cond.wait(delay)
+                    continue
+
+                self.waiting.remove(chosen)
+                self.bucket.consume(now)
+                if chosen[2] in self.tr_buckets:
+                    self.tr_buckets[chosen[2]].consume(now)
+
+                waited = now - chosen[3]
+                stat = self.stats.setdefault(chosen[2] or 'auth', {'count': 0, 'wait': 0.0, 'max_wait': 0.0})
+                stat['count'] += 1
+                stat['wait'] += waited
+                stat['max_wait'] = max(stat['max_wait'], waited)
+
+                chosen[4](waited)
+
+    def acquire(self, tr_id:str=None) -> float:
+        '''
+        요청을 보낼 수 있을 때까지 대기
+        return: 대기열에서 기다린 시간 (초)
+        '''
+        done = threading.Event()
+        result = []
+
+        def wake(waited):
+            result.append(waited)
+            done.set()
+
+        self._enqueue(tr_id, wake)
+        done.wait()
+        return result[0]
+
+    async def acquire_async(self, tr_id:str=None) -> float:
+        '''
+        acquire 의 asyncio 버전
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
 
-from datetime import datetime, time as dt_time
+        def wake(waited):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(waited))
+
+        self._enqueue(tr_id, wake)
+        return await future
+
+    def report(self) -> dict:
+        '''
+        TR 별 요청 수, 평균/최대 대기시간 (초)
+        '''
+        with self.cond:
+            return {
+                tr_id: {
+                    'count': stat['count'],
+                    'avg_wait': stat['wait'] / stat['count'],
+                    'max_wait': stat['max_wait'],
+                    'queued': sum(1 for w in self.waiting if (w[2] or 'auth') == tr_id),
+                }
+                for tr_id, stat in self.stats.items()
+            }
+
+class Metrics:
+    '''
+    요청 계측 (TR 별 단계별 소요시간 histogram, rt_cd/msg_cd 응답 수, 예외 수)
+
+    단계: queue(속도 제한 대기) connect(새 연결 TCP + TLS) ttfb(요청 전송 ~ 응답 헤더)
+          read(응답 본문) parse(json) total(전체), sign(주문 토큰 + hashkey 준비)
+    이벤트: retry(재시도) hedge(중복 요청) hedge_win(중복 요청이 먼저 응답) circuit_open(차단)
+    snapshot() 으로 dict, prometheus() 로 Prometheus text 형식 확인 (serve 로 /metrics 제공)
+    '''
+
+    # histogram 구간 상한 (초)
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets:tuple=None) -> None:
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.lock = threading.Lock()
+        self.histograms = {} # (tr, 단계) -> [구간별 수, 합, 최대]
+        self.responses = {} # (tr, rt_cd, msg_cd) -> 수
+        self.errors = {} # (tr, 예외) -> 수
+        self.events = {} # (tr, 이벤트) -> 수
+        self.server = None
+
+    def _observe(self, tr:str, phase:str, seconds:float) -> None:
+        histogram = self.histograms.get((tr, phase))
+        if histogram is None:
+            histogram = self.histograms[(tr, phase)] = [[0] * (len(self.buckets) + 1), 0.0, 0.0]
+        histogram[0][bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[1] += seconds
+        histogram[2] = max(histogram[2], seconds)
+
+    def observe(self, tr:str, phase:str, seconds:float) -> None:
+        with self.lock:
+            self._observe(tr, phase, seconds)
+
+    def record(self, tr:str, timings:dict, res_json:dict=None, error:str=None) -> None:
+        '''
+        요청 1건 기록
+        tr: tr_id (토큰, hashkey 등 tr_id 가 없으면 경로)
+        timings: {단계: 초}
+        error: 예외 이름 (응답을 받지 못한 경우)
+        '''
+        with self.lock:
+            for phase, seconds in timings.items():
+                self._observe(tr, phase, seconds)
+            if error is not None:
+                self.errors[(tr, error)] = self.errors.get((tr, error), 0) + 1
+            elif isinstance(res_json, dict):
+                key = (tr, res_json.get('rt_cd', ''), res_json.get('msg_cd', ''))
+                self.responses[key] = self.responses.get(key, 0) + 1
+
+    def count(self, tr:str, event:str) -> None:
+        with self.lock:
+            self.events[(tr, event)] = self.events.get((tr, event), 0) + 1
+
+    def quantile(self, tr:str, phase:str, q:float, min_count:int=1) -> float:
+        '''
+        단계 소요시간 q 분위수 (초, 구간 안에서 선형 보간 근사)
+        기록이 min_count 보다 적으면 None
+        '''
+        with self.lock:
+            histogram = self.histograms.get((tr, phase))
+            if histogram is None or sum(histogram[0]) < min_count:
+                return None
+            return self._quantile(histogram[0], q, histogram[2])
+
+    @contextmanager
+    def timer(self, tr:str, phase:str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(tr, phase, time.perf_counter() - start)
+
+    def _quantile(self, counts:list, q:float, maximum:float) -> float:
+        # 구간 안에서 선형 보간 (마지막 구간 상한은 최대값), 최대값을 넘지 않음
+        target = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= target:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else maximum
+                return min(lower + (upper - lower) * (target - seen) / count, maximum)
+            seen += count
+        return maximum
+
+    def snapshot(self) -> dict:
+        '''
+        {'latency': {tr: {단계: count, avg, p50, p99, max}}, 'responses': [...], 'errors': [...], 'events': [...]}
+        p50, p99 는 quantile 과 같은 구간 내 선형 보간 근사값 (초)
+        '''
+        with self.lock:
+            latency = {}
+            for (tr, phase), (counts, total, maximum) in self.histograms.items():
+                count = sum(counts)
+                latency.setdefault(tr, {})[phase] = {
+                    'count': count,
+                    'avg': total / count,
+                    'p50': self._quantile(counts, 0.5, maximum),
+                    'p99': self._quantile(counts, 0.99, maximum),
+                    'max': maximum,
+                }
+            return {
+                'latency': latency,
+                'responses': [{'tr': tr, 'rt_cd': rt_cd, 'msg_cd': msg_cd, 'count': count}
+                              for (tr, rt_cd, msg_cd), count in self.responses.items()],
+                'errors': [{'tr': tr, 'error': error, 'count': count} for (tr, error), count in self.errors.items()],
+                'events': [{'tr': tr, 'event': event, 'count': count} for (tr, event), count in self.events.items()],
+            }
+
+    def prometheus(self) -> str:
+        '''
+        Prometheus text exposition
+        '''
+        lines = [
+            '# HELP kis_request_seconds KIS API 요청 단계별 소요시간',
+            '# TYPE kis_request_seconds histogram',
+        ]
+        with self.lock:
+            for (tr, phase), (counts, total, _) in sorted(self.histograms.items()):
+                labels = f'tr="{tr}",phase="{phase}"'
+                seen = 0
+                for bound, count in zip(self.buckets, counts):
+                    seen += count
+                    lines.append(f'kis_request_seconds_bucket{{{labels},le="{bound}"}} {seen}')
+                seen += counts[-1]
+                lines.append(f'kis_request_seconds_bucket{{{labels},le="+Inf"}} {seen}')
+                lines.append(f'kis_request_seconds_sum{{{labels}}} {total}')
+                lines.append(f'kis_request_seconds_count{{{labels}}} {seen}')
+
+            lines += ['# HELP kis_responses_total KIS API 응답 수 (rt_cd, msg_cd)', '# TYPE kis_responses_total counter']
+            for (tr, rt_cd, msg_cd), count in sorted(self.responses.items()):
+                lines.append(f'kis_responses_total{{tr="{tr}",rt_cd="{rt_cd}",msg_cd="{msg_cd}"}} {count}')
+
+            lines += ['# HELP kis_request_errors_total KIS API 요청 예외 수', '# TYPE kis_request_errors_total counter']
+            for (tr, error), count in sorted(self.errors.items()):
+                lines.append(f'kis_request_errors_total{{tr="{tr}",error="{error}"}} {count}')
+
+            lines += ['# HELP kis_request_events_total KIS API 재시도, 중복 요청, 차단 수', '# TYPE kis_request_events_total counter']
+            for (tr, event), count in sorted(self.events.items()):
+                lines.append(f'kis_request_events_total{{tr="{tr}",event="{event}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port:int=9100, host:str='127.0.0.1'):
+        '''
+        /metrics (Prometheus text) HTTP 서버 시작 (daemon 스레드)
+        '''
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                data = metrics.prometheus().encode()
+                self.send_response(200 if self.path == '/metrics' else 404)
+                self.send_header('content-type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('content-length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, name='Metrics', daemon=True).start()
+        return self.server
+
+class KISError(Exception):
+    '''
+    분류된 요청 실패
+
+    kind: connect - 연결 실패 (요청 전송 전)
+          timeout - 응답 시간 초과
+          network - 요청 전송 후 연결 끊김
+          server - 서버 오류 (502, 503, 504, EGW00500, json 이 아닌 응답)
+          rate - 초당 거래건수 초과 (EGW00201, 처리 전에 거부)
+          circuit - 경로 차단중 (CircuitBreaker, 요청하지 않음)
+    sent: 서버가 요청을 처리했을 수 있는지 (True 인 주문을 다시 보내면 중복 주문 위험)
+    res_json: 응답을 받은 경우 응답 json
+    '''
+
+    def __init__(self, kind:str, message:str, sent:bool=True, res_json:dict=None) -> None:
+        super().__init__(f'{kind}: {message}')
+        self.kind = kind
+        self.sent = sent
+        self.res_json = res_json
+
+class RetryPolicy:
+    '''
+    재시도 (지수 backoff + full jitter)
+
+    조회, 토큰, hashkey 는 일시적인 오류 (connect, timeout, network, server, rate) 를 재시도
+    주문, 정정/취소 (POST /uapi/...) 는 서버가 처리하지 않은 것이 확실한 오류 (connect, rate) 만 재시도
+    '''
+
+    RETRYABLE = ('connect', 'timeout', 'network', 'server', 'rate')
+    # 처리 전에 거부된 응답 (초당 거래건수 초과)
+    RATE_ERRORS = ('EGW00201',)
+    # 일시적인 서버 오류 응답 (EGW00500 은 fake_kis 오류 주입)
+    SERVER_ERRORS = ('EGW00500',)
+    SERVER_STATUS = (502, 503, 504)
+
+    def __init__(self, attempts:int=3, base:float=0.05, cap:float=1.0, seed:int=None) -> None:
+        '''
+        attempts: 최대 요청 횟수 (1 이면 재시도 없음)
+        base, cap: n 번째 재시도 대기 = uniform(0, min(cap, base * 2^n)) 초
+        '''
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def idempotent(method:str, path:str) -> bool:
+        # 주문 API 는 모두 POST /uapi/... (hashkey 제외), 조회는 GET
+        return method == 'GET' or not path.startswith('/uapi/') or path == '/uapi/hashkey'
+
+    def classify(self, status:int, res_json) -> KISError:
+        '''
+        응답 분류 -> 재시도할 오류 (정상, 업무 오류, 토큰 오류는 None - 호출한 쪽에서 rt_cd 확인)
+        '''
+        msg_cd = res_json.get('msg_cd', '') if isinstance(res_json, dict) else ''
+        if msg_cd in self.RATE_ERRORS:
+            return KISError('rate', f"{msg_cd} {res_json.get('msg1', '')}", sent=False, res_json=res_json)
+        if msg_cd in self.SERVER_ERRORS or status in self.SERVER_STATUS:
+            return KISError('server', f'{status} {msg_cd}', res_json=res_json)
+        return None
+
+    def should_retry(self, error:KISError, idempotent:bool, attempt:int) -> bool:
+        '''
+        attempt: 지금까지 요청 횟수
+        '''
+        if attempt >= self.attempts or error.kind not in self.RETRYABLE:
+            return False
+        return idempotent or not error.sent
+
+    def backoff(self, attempt:int) -> float:
+        return self.random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    '''
+    경로별 차단
+    연속 failures 번 실패 (connect, timeout, network, server) 하면 reset 초 동안 요청하지 않고 바로 실패,
+    이후 1건만 시험 요청해서 성공하면 복구 (실패하면 다시 reset 초 차단)
+    '''
+
+    FAILURES = ('connect', 'timeout', 'network', 'server')
+
+    def __init__(self, failures:int=5, reset:float=5.0) -> None:
+        self.failures = failures
+        self.reset = reset
+        self.lock = threading.Lock()
+        self.paths = {} # 경로 -> {'failures', 'opened', 'trial'}
+
+    def allow(self, path:str) -> bool:
+        with self.lock:
+            state = self.paths.get(path)
+            if state is None or state['opened'] is None:
+                return True
+            if state['trial'] or time.monotonic() - state['opened'] < self.reset:
+                return False
+            state['trial'] = True
+            return True
+
+    def success(self, path:str) -> None:
+        with self.lock:
+            self.paths.pop(path, None)
+
+    def failure(self, path:str, error:KISError) -> bool:
+        '''
+        실패 기록 -> 이번 실패로 차단되었는지
+        '''
+        if error.kind == 'circuit':
+            return False
+        if error.kind not in self.FAILURES:
+            # 서버가 응답한 경우 (rate 등) 는 정상으로 봄
+            self.success(path)
+            return False
+
+        with self.lock:
+            state = self.paths.setdefault(path, {'failures': 0, 'opened': None, 'trial': False})
+            state['failures'] += 1
+            if state['trial'] or (state['opened'] is None and state['failures'] >= self.failures):
+                state['opened'] = time.monotonic()
+                state['trial'] = False
+                return True
+            return False
+
+    def report(self) -> dict:
+        with self.lock:
+            return {path: {'failures': state['failures'], 'open': state['opened'] is not None}
+                    for path, state in self.paths.items()}
+
+# 현재 스레드의 요청에서 새 연결 (TCP + TLS handshake) 에 쓴 시간
+_connect_time = threading.local()
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_time.seconds = getattr(_connect_time, 'seconds', 0.0) + time.perf_counter() - start
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_time.seconds = getattr(_connect_time, 'seconds', 0.0) + time.perf_counter() - start
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    # 연결 시간 측정용 connection class 사용
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+
+class KISTransport:
+    '''
+    HTTP 연결관리 (keep-alive 세션 풀)
+    실패는 KISError 로 분류해서 재시도 (RetryPolicy), 경로별 차단 (CircuitBreaker)
+    조회 (GET) 는 hedge 설정시 응답이 TR 의 p95 보다 늦으면 같은 요청을 한 번 더 보내고 먼저 온 응답 사용
+    '''
+
+    # 중복 요청 기준이 되는 TR 별 최소 기록 수
+    HEDGE_MIN_COUNT = 20
+
+    def __init__(self, domain:str, pool_size:int=4, timeout:float=5.0, limiter:RateLimiter=None,
+                 metrics:Metrics=None, retry:RetryPolicy=None, breaker:CircuitBreaker=None,
+                 hedge:float=None, hedge_min:float=0.01, hedge_ratio:float=0.1) -> None:
+        '''
+        domain: API 도메인
+        pool_size: 유지할 연결 수
+        timeout: 요청별 기본 timeout (초)
+        limiter: 요청 속도 제한 (없으면 제한 없음)
+        metrics: 요청 계측 (기본 새 Metrics)
+        retry: 재시도 정책 (기본 RetryPolicy())
+        breaker: 경로별 차단 (기본 CircuitBreaker())
+        hedge: 중복 요청 기준 분위수 (ex. 0.95, 기본 사용하지 않음)
+        hedge_min: 중복 요청 전 최소 대기 (초)
+        hedge_ratio: 중복 요청 비율 상한 (조회 요청 수 대비, 서버가 전체적으로 느릴 때 부하를 키우지 않도록)
+        '''
+        self.domain = domain
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.limiter = limiter
+        self.metrics = metrics or Metrics()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min = hedge_min
+        self.hedge_ratio = hedge_ratio
+        self.hedge_tokens = 1.0
+        self.hedge_lock = threading.Lock()
+        self.hedge_executor = None
+
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method:str, path:str, timeout:float=None, **kwargs) -> requests.Response:
+        '''
+        요청 전송, 응답 json 은 Response.res_json
+        재시도하지 않는 오류 응답 (업무 오류, 재시도 횟수 초과) 은 그대로 반환, 응답이 없으면 KISError
+        '''
+        tr = (kwargs.get('headers') or {}).get('tr_id') or path
+        idempotent = self.retry.idempotent(method, path)
+        attempt = 0
+        while True:
+            attempt += 1
+            r = None
+            try:
+                if not self.breaker.allow(path):
+                    raise KISError('circuit', path, sent=False)
+                if self.hedge is not None and method == 'GET':
+                    r = self._hedged(tr, method, path, timeout, kwargs)
+                else:
+                    r = self._request(method, path, timeout, **kwargs)
+                error = self.retry.classify(r.status_code, r.res_json)
+            except KISError as e:
+                error = e
+
+            if error is None:
+                self.breaker.success(path)
+                return r
+            if self.breaker.failure(path, error):
+                self.metrics.count(tr, 'circuit_open')
+
+            if not self.retry.should_retry(error, idempotent, attempt):
+                if r is not None:
+                    return r
+                raise error
+            self.metrics.count(tr, 'retry')
+            time.sleep(self.retry.backoff(attempt))
+
+    @staticmethod
+    def _classify(e:Exception) -> KISError:
+        # requests 예외 분류 (분류할 수 없으면 None)
+        reason = getattr(e.args[0], 'reason', None) if e.args else None
+        if isinstance(e, requests.ConnectTimeout) or isinstance(reason, NewConnectionError):
+            return KISError('connect', str(e), sent=False)
+        if isinstance(e, requests.Timeout):
+            return KISError('timeout', str(e))
+        if isinstance(e, requests.ConnectionError):
+            return KISError('network', str(e))
+        if isinstance(e, ValueError):
+            return KISError('server', f'json 이 아닌 응답: {e}')
+        return None
+
+    def _hedge_delay(self, tr:str) -> float:
+        # 중복 요청까지 대기 (기록이 적거나 중복 요청 비율을 넘으면 None)
+        delay = self.metrics.quantile(tr, 'total', self.hedge, self.HEDGE_MIN_COUNT)
+        with self.hedge_lock:
+            self.hedge_tokens = min(self.hedge_tokens + self.hedge_ratio, 10.0)
+            if delay is None or self.hedge_tokens < 1:
+                return None
+        return max(delay, self.hedge_min)
+
+    def _hedged(self, tr:str, method:str, path:str, timeout:float, kwargs:dict) -> requests.Response:
+        '''
+        조회 요청, 응답이 p(hedge) 보다 늦으면 같은 요청을 한 번 더 보내고 먼저 성공한 응답 반환
+        '''
+        delay = self._hedge_delay(tr)
+        if delay is None:
+            return self._request(method, path, timeout, **kwargs)
+
+        if self.hedge_executor is None:
+            self.hedge_executor = ThreadPoolExecutor(max_workers=self.pool_size * 2, thread_name_prefix='KISHedge')
+
+        first = self.hedge_executor.submit(self._request, method, path, timeout, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        with self.hedge_lock:
+            if self.hedge_tokens < 1:
+                return first.result()
+            self.hedge_tokens -= 1
+        self.metrics.count(tr, 'hedge')
+        second = self.hedge_executor.submit(self._request, method, path, timeout, **kwargs)
+
+        futures = [first, second]
+        for future in as_completed(futures):
+            if future.exception() is None and self.retry.classify(future.result().status_code, future.result().res_json) is None:
+                if future is second:
+                    self.metrics.count(tr, 'hedge_win')
+                return future.result()
+        # 둘 다 실패하면 먼저 보낸 요청 결과로 재시도 여부 판단
+        return first.result()
+
+    def _request(self, method:str, path:str, timeout:float=None, **kwargs) -> requests.Response:
+        # 요청 1회 (속도 제한 대기, 계측)
+        tr_id = (kwargs.get('headers') or {}).get('tr_id')
+        start = time.perf_counter()
+        queue_wait = 0.0
+        if self.limiter is not None:
+            queue_wait = self.limiter.acquire(tr_id)
+
+        _connect_time.seconds = 0.0
+        sent = time.perf_counter()
+        try:
+            r = self.session.request(method, self.domain + path, timeout=timeout or self.timeout, **kwargs)
+            received = time.perf_counter()
+            res_json = r.json()
+        except Exception as e:
+            self.metrics.record(tr_id or path, {'queue': queue_wait, 'total': time.perf_counter() - start}, error=type(e).__name__)
+            error = self._classify(e)
+            if error is None:
+                raise
+            raise error from e
+        parsed = time.perf_counter()
+
+        # Response.elapsed = 요청 전송 ~ 응답 헤더 (새 연결이면 연결 시간 포함)
+        connect = _connect_time.seconds
+        elapsed = r.elapsed.total_seconds()
+        self.metrics.record(tr_id or path, {
+            'queue': queue_wait,
+            'connect': connect,
+            'ttfb': max(elapsed - connect, 0.0),
+            'read': max(received - sent - elapsed, 0.0),
+            'parse': parsed - received,
+            'total': parsed - start,
+        }, res_json)
+
+        # 속도 제한 대기열에서 기다린 시간 (초)
+        r.queue_wait = queue_wait
+        r.res_json = res_json
+        return r
+
+    def get(self, path:str, params:dict=None, headers:dict=None, timeout:float=None) -> requests.Response:
+        return self.request('GET', path, params=params, headers=headers, timeout=timeout)
+
+    def post(self, path:str, headers:dict=None, data:str=None, timeout:float=None) -> requests.Response:
+        return self.request('POST', path, headers=headers, data=data, timeout=timeout)
+
+    def warmup(self, connections:int=None) -> int:
+        '''
+        연결 미리 열기 (TCP + TLS handshake 선처리)
+        connections: 열어둘 연결 수 (기본 pool_size)
+        '''
+        n = min(connections or self.pool_size, self.pool_size)
+
+        def _open(_):
+            try:
+                self.session.head(self.domain, timeout=self.timeout)
+                return True
+            except requests.RequestException:
+                return False
 
-import pandas as pd
+        # 동시에 열어야 풀에 여러 개의 연결이 남음
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            return sum(executor.map(_open, range(n)))
+
+    def close(self):
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False)
+        self.session.close()
 
 class KISTrade:
     '''
     한국투자증권 API
     '''
 
-    def __init__(self, appkey:str, appsecret:str, account:str, mode:str='s') -> None:
+    def __init__(self, appkey:str, appsecret:str, account:str, mode:str='s',
+                 pool_size:int=4, timeout:float=5.0, transport:KISTransport=None,
+                 limiter:RateLimiter=None) -> None:
         '''
         account: 주식계좌번호 00000000-00
         mode: real(r), simulate(s)
+        pool_size: 유지할 HTTP 연결 수
+        timeout: 요청별 기본 timeout (초)
+        transport: get/post/warmup, metrics 를 제공하는 전송 계층 (기본 KISTransport, 응답 json 은 Response.res_json)
+        limiter: 요청 속도 제한 (기본 RateLimiter(mode), 같은 앱키를 쓰는 클라이언트끼리 공유)
         '''
         self.appkey = appkey
         self.appsecret = appsecret
@@ -28,6 +740,22 @@ class KISTrade:
             # 모의
             self.mode = 's'
             self.domain = 'https://openapivts.koreainvestment.com:29443'
+
+        self.limiter = limiter or RateLimiter(self.mode)
+        self.transport = transport or KISTransport(self.domain, pool_size, timeout, self.limiter)
+
+    def warmup(self, connections:int=None) -> int:
+        '''
+        API 서버 연결 미리 열기
+        '''
+        return self.transport.warmup(connections)
+
+    @property
+    def metrics(self) -> Metrics:
+        '''
+        요청 계측 (transport 의 Metrics)
+        '''
+        return self.transport.metrics
     
     def getConfigs(self):
         return {
@@ -41,46 +769,250 @@ class KISTrade:
             'ACNT_PRDT_CD': self.account.split('-')[1], # 계좌번호 (뒤 2자리)
         }
 
+try:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+except ImportError:
+    # windows
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class TokenCache:
+    '''
+    토큰 파일 캐시 (앱키 + 모드 별, 같은 PC 의 모든 프로세스가 공유)
+    '''
+
+    def __init__(self, appkey:str, mode:str, directory:str=None) -> None:
+        '''
+        directory: 캐시 저장 위치 (기본 ~/.kis)
+        '''
+        directory = directory or os.path.join(os.path.expanduser('~'), '.kis')
+        os.makedirs(directory, exist_ok=True)
+
+        # 파일명에 앱키가 드러나지 않도록
+        name = hashlib.sha256(f'{appkey}:{mode}'.encode()).hexdigest()[:16]
+        self.path = os.path.join(directory, f'token_{name}.json')
+        self.lock_path = self.path + '.lock'
+        # flock 은 프로세스간 잠금, 같은 프로세스의 스레드는 threading.Lock 으로
+        self.thread_lock = threading.Lock()
+
+    @contextmanager
+    def lock(self):
+        with self.thread_lock:
+            with open(self.lock_path, 'a+') as f:
+                _lock_file(f)
+                try:
+                    yield
+                finally:
+                    _unlock_file(f)
+
+    def load(self) -> dict:
+        '''
+        저장된 토큰 (없거나 깨진 경우 None)
+        '''
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            return {
+                'access_token': cached['access_token'],
+                'token_expired_in': datetime.strptime(cached['token_expired_in'], '%Y-%m-%d %H:%M:%S'),
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, access_token:str, token_expired_in:datetime) -> None:
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'access_token': access_token,
+                'token_expired_in': token_expired_in.strftime('%Y-%m-%d %H:%M:%S'),
+            }, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 class KISAuth:
     '''
     인증관리
     '''
 
-    def __init__(self, kis:KISTrade) -> None:
+    HASHKEY_MODES = ('always', 'cache', 'skip')
+    # 백그라운드 갱신 실패시 재시도 간격 (초)
+    REFRESH_RETRY = 60
+
+    def __init__(self, kis:KISTrade, hashkey_mode:str='cache', hashkey_cache_size:int=256,
+                 token_cache:TokenCache=None) -> None:
+        '''
+        token_cache: 토큰 파일 캐시 (프로세스간 공유, 없으면 메모리에만 보관)
+        hashkey_mode: always - 주문마다 hashkey 발급
+                      cache - 같은 body 의 hashkey 재사용 (LRU, prepareHashKey 로 미리 발급 가능)
+                      skip - hashkey 생략 (API 선택값)
+        hashkey_cache_size: 보관할 hashkey 수
+        '''
+        assert hashkey_mode in self.HASHKEY_MODES, f'hashkey_mode는 {self.HASHKEY_MODES} 중 하나입니다.'
+
         self.kis = kis
         self.access_token = ''
+        self.token_cache = token_cache
+        self.refresher = None
+        self.refresher_stop = threading.Event()
+
+        self.hashkey_mode = hashkey_mode
+        self.hashkey_cache_size = hashkey_cache_size
+        self.hashkey_cache = OrderedDict()
+        self.hashkey_lock = threading.Lock()
+        self.executor = None
         
+    def tokenValid(self) -> bool:
+        return bool(self.access_token) and datetime.now() < self.token_expired_in
+
+    def setToken(self, res_json:dict) -> str:
+        '''
+        /oauth2/tokenP 응답 저장 (sync, async 공용)
+        '''
+        self.access_token = 'Bearer ' + res_json['access_token']
+        self.token_expired_in = datetime.strptime(res_json['access_token_token_expired'], '%Y-%m-%d %H:%M:%S')
+
+        return self.access_token
+
+    def issueToken(self) -> str:
+        '''
+        /oauth2/tokenP 토큰 발급
+        '''
+        data = {
+            'grant_type': 'client_credentials',
+            **self.kis.getConfigs(),
+        }
+        res_json = self.kis.transport.post('/oauth2/tokenP', data=json.dumps(data)).res_json
+        if 'access_token' not in res_json:
+            raise ValueError(res_json)
+
+        return self.setToken(res_json)
+
+    def loadToken(self, before:timedelta=timedelta(0)) -> bool:
+        '''
+        파일 캐시의 토큰 사용 (만료 before 전까지 유효한 경우)
+        '''
+        cached = self.token_cache.load()
+        if cached is None or datetime.now() >= cached['token_expired_in'] - before:
+            return False
+
+        self.access_token = cached['access_token']
+        self.token_expired_in = cached['token_expired_in']
+        return True
+
     def getToken(self) -> str:
         try:
-            if self.access_token and datetime.now() < self.token_expired_in:
+            if self.tokenValid():
                 return self.access_token
 
-            URL = self.kis.domain + '/oauth2/tokenP'
-            data = {
-                'grant_type': 'client_credentials',
-                **self.kis.getConfigs(),
-            }
-            res_json = requests.post(URL, data=json.dumps(data)).json()
+            if self.token_cache is None:
+                return self.issueToken()
 
-            self.access_token = 'Bearer ' + res_json['access_token']
-            self.token_expired_in = datetime.strptime(res_json['access_token_token_expired'], '%Y-%m-%d %H:%M:%S')
+            # 다른 프로세스가 발급중이면 기다렸다가 그 토큰 사용
+            with self.token_cache.lock():
+                if self.loadToken():
+                    return self.access_token
 
-            return self.access_token
+                self.issueToken()
+                self.token_cache.save(self.access_token, self.token_expired_in)
+                return self.access_token
 
         except:
             # error 발생
             print('############### 에러발생 ###############')
-            print(res_json)
+            import traceback
+            traceback.print_exc()
+            return ''
+
+    def refreshToken(self, before:timedelta=timedelta(0)) -> str:
+        '''
+        토큰 재발급 (다른 프로세스가 먼저 갱신했으면 그 토큰 사용)
+        '''
+        try:
+            if self.token_cache is None:
+                return self.issueToken()
+
+            with self.token_cache.lock():
+                if self.loadToken(before) and self.access_token:
+                    return self.access_token
+
+                self.issueToken()
+                self.token_cache.save(self.access_token, self.token_expired_in)
+                return self.access_token
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
             return ''
 
+    def invalidateToken(self, token:str) -> None:
+        '''
+        서버가 거부한 토큰 폐기 (메모리, 파일 캐시)
+        '''
+        if self.access_token == token:
+            self.access_token = ''
+
+        if self.token_cache is not None:
+            with self.token_cache.lock():
+                cached = self.token_cache.load()
+                if cached is not None and cached['access_token'] == token:
+                    self.token_cache.clear()
+
+    def startRefresher(self, before:timedelta=timedelta(hours=1)) -> threading.Thread:
+        '''
+        만료 before 전에 백그라운드에서 토큰 갱신 (주문이 토큰 발급을 기다리지 않도록)
+        '''
+        def _run():
+            while True:
+                if not self.tokenValid():
+                    self.getToken()
+                elif datetime.now() >= self.token_expired_in - before:
+                    self.refreshToken(before)
+
+                wait = 0
+                if self.tokenValid():
+                    wait = (self.token_expired_in - before - datetime.now()).total_seconds()
+
+                if self.refresher_stop.wait(max(wait, self.REFRESH_RETRY)):
+                    return
+
+        if self.refresher is None or not self.refresher.is_alive():
+            self.refresher_stop.clear()
+            self.refresher = threading.Thread(target=_run, name='KISAuthRefresher', daemon=True)
+            self.refresher.start()
+        return self.refresher
+
+    def stopRefresher(self) -> None:
+        self.refresher_stop.set()
+
     def getHashKey(self, body:dict) -> str:
+        # 요청이 실패하면 응답이 없음 (except 에서 NameError 방지)
+        res_json = None
         try:
-            URL = self.kis.domain + '/uapi/hashkey'
             headers = {
                 # 'content-type':'application/json; charset=utf-8',
                 **self.kis.getConfigs(),
             }
-            res_json = requests.post(URL, headers=headers, data=json.dumps(body)).json()
+            res_json = self.kis.transport.post('/uapi/hashkey', headers=headers, data=json.dumps(body)).res_json
             self.hash = res_json['HASH']
 
             return self.hash
@@ -90,39 +1022,464 @@ class KISAuth:
             print(res_json)
             return ''
 
+    @staticmethod
+    def bodyDigest(body:dict) -> str:
+        # 요청에 실리는 json 그대로 digest (body 생성 순서가 고정되어 있어 같은 주문은 같은 값)
+        return hashlib.sha256(json.dumps(body).encode()).hexdigest()
+
+    def cachedHashKey(self, body:dict) -> str:
+        '''
+        보관중인 hashkey (없으면 None)
+        '''
+        digest = self.bodyDigest(body)
+        with self.hashkey_lock:
+            hashkey = self.hashkey_cache.get(digest)
+            if hashkey is not None:
+                self.hashkey_cache.move_to_end(digest)
+            return hashkey
+
+    def storeHashKey(self, body:dict, hashkey:str) -> None:
+        if not hashkey:
+            return
+        digest = self.bodyDigest(body)
+        with self.hashkey_lock:
+            self.hashkey_cache[digest] = hashkey
+            self.hashkey_cache.move_to_end(digest)
+            while len(self.hashkey_cache) > self.hashkey_cache_size:
+                self.hashkey_cache.popitem(last=False)
+
+    def needHashKey(self, body:dict) -> bool:
+        '''
+        주문 전에 hashkey 발급 요청이 필요한지
+        '''
+        if self.hashkey_mode == 'skip':
+            return False
+        if self.hashkey_mode == 'cache':
+            return self.cachedHashKey(body) is None
+        return True
+
+    def signBody(self, body:dict) -> str:
+        '''
+        주문 body 의 hashkey (hashkey_mode 적용, skip 일 경우 None)
+        발급 실패시 RuntimeError (hashkey 없이 주문하지 않음)
+        '''
+        if self.hashkey_mode == 'skip':
+            return None
+
+        if self.hashkey_mode == 'cache':
+            hashkey = self.cachedHashKey(body)
+            if hashkey is not None:
+                return hashkey
+
+        hashkey = self.getHashKey(body)
+        if not hashkey:
+            raise RuntimeError('hashkey 발급 실패')
+        if self.hashkey_mode == 'cache':
+            self.storeHashKey(body, hashkey)
+        return hashkey
+
+    def prepareHashKey(self, body:dict) -> str:
+        '''
+        주문 전에 미리 hashkey 발급 (cache 모드에서 주문시 재사용)
+        '''
+        return self.signBody(body)
+
+    def getTokenAndHashKey(self, body:dict) -> tuple:
+        '''
+        토큰, hashkey 를 동시에 준비
+        둘 다 보관중이면 요청 없이 반환
+        '''
+        if self.tokenValid() or not self.needHashKey(body):
+            return self.getToken(), self.signBody(body)
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='KISAuth')
+
+        token = self.executor.submit(self.getToken)
+        hashkey = self.executor.submit(self.signBody, body)
+        return token.result(), hashkey.result()
+
 class StockInfo:
     '''
     주식 종목코드 관리
+    종목정보는 칼럼별 캐시로 저장하고, 거래일이 바뀌면 원본이 바뀐 경우에만 다시 받음 (ETag, Last-Modified)
+    다시 받으면 이전 캐시를 보관하고 변경 내역(신규 상장, 상장 폐지, 거래정지 등)을 changes 에 기록
     '''
 
-    def __init__(self) -> None:
-        pass
+    # 시장 -> (캐시 이름, 파서 모듈, 파서 함수)
+    MARKETS = {
+        'KOSPI': ('kospi_code', 'kis_kospi_code_mst', 'parse_kospi_master'),
+        'KOSDAQ': ('kosdaq_code', 'kis_kosdaq_code_mst', 'parse_kosdaq_master'),
+    }
+
+    def __init__(self, cache_dir:str='.', urls:dict=None) -> None:
+        '''
+        cache_dir: 종목정보 캐시 저장 위치
+        urls: 시장별 마스터파일 주소 (기본 stocks_info.kis_download.MASTER_URLS)
+        '''
+        self.cache_dir = cache_dir
+        self.urls = urls or {}
+        # 시장 -> 마지막으로 다시 받았을 때 변경 내역 (kis_download.diff_master)
+        self.changes = {}
+
+    def _path(self, market:str) -> str:
+        return os.path.join(self.cache_dir, self.MARKETS[market][0] + '.cache')
 
-    def kospi(self) -> pd.DataFrame:
+    def refresh(self, market:str) -> dict:
+        '''
+        마스터파일이 바뀐 경우에만 다시 받아서 캐시 교체
+        return: 이전 캐시와 변경 내역 (바뀌지 않았으면 None, 처음 받은 경우 빈 내역)
+        '''
+        import importlib
+        from stocks_info import kis_cache, kis_download
+        from stocks_info.kis_symbol import MARKET_COLUMNS
+
+        path = self._path(market)
+        meta = kis_cache.read_meta(path)
+        validators = meta.get('http') if meta else None
+
+        url = self.urls.get(market, kis_download.MASTER_URLS[market])
+        data, validators = kis_download.fetch_master(url, validators)
+        if data is None:
+            kis_cache.touch(path)
+            return None
+
+        _, module, parser = self.MARKETS[market]
+        df = getattr(importlib.import_module(f'stocks_info.{module}'), parser)(data)
+        kis_cache.save_columns(df, path, extra={'http': validators}, keep_previous=True)
+
+        columns = MARKET_COLUMNS[market]
+        previous = kis_cache.previous_path(path)
+        if meta is None or kis_cache.read_meta(previous) is None:
+            changes = {'listed': [], 'delisted': [], 'changed': []}
+        else:
+            changes = kis_download.diff_master(kis_cache.load_columns(previous, columns), df, columns[0], columns)
+        self.changes[market] = changes
+        return changes
+
+    def load(self, market:str, columns:list=None) -> 'pd.DataFrame':
+        '''
+        시장별 주식정보
+        columns: 불러올 칼럼 (기본 전체)
+        '''
+        from stocks_info import kis_cache
+        path = self._path(market)
+        if not kis_cache.is_fresh(path):
+            try:
+                self.refresh(market)
+            except Exception as e:
+                # 받지 못하면 이전 캐시 사용
+                if kis_cache.read_meta(path) is None:
+                    raise
+                print(f'{market} 종목정보 갱신 실패, 이전 캐시 사용: {e}')
+        return kis_cache.load_columns(path, columns)
+
+    def kospi(self, columns:list=None) -> 'pd.DataFrame':
         '''
         코스피 주식정보
+        columns: 불러올 칼럼 (기본 전체)
         '''
-        if os.path.exists('./kospi_code.xlsx'):
-            return pd.read_excel('./kospi_code.xlsx')
-        
-        from stocks_info import kis_kospi_code_mst
-        kis_kospi_code_mst.kospi_master_download()
-        df = kis_kospi_code_mst.get_kospi_master_dataframe()
-        df.to_excel('kospi_code.xlsx',index=False)
-        return df
+        return self.load('KOSPI', columns)
 
-    def kosdaq(self) -> pd.DataFrame:
+    def kosdaq(self, columns:list=None) -> 'pd.DataFrame':
         '''
         코스닥 주식정보
+        columns: 불러올 칼럼 (기본 전체)
         '''
-        if os.path.exists('./kosdaq_code.xlsx'):
-            return pd.read_excel('./kosdaq_code.xlsx')
+        return self.load('KOSDAQ', columns)
 
-        from stocks_info import kis_kosdaq_code_mst
-        kis_kosdaq_code_mst.kosdaq_master_download()
-        df = kis_kosdaq_code_mst.get_kosdaq_master_dataframe()
-        df.to_excel('kosdaq_code.xlsx',index=False)
-        return df
+class ResponseCache:
+    '''
+    조회 응답 캐시 (TTL, LRU)
+    계좌에 주문이 들어가면 해당 계좌의 캐시는 무효화
+    '''
+
+    # 조회 종류별 유효시간 (초)
+    TTL = {
+        'able': 1.0, # 매수 가능 조회
+        'a': 2.0, # 주식 잔고 조회
+        'changable': 1.0, # 정정취소가능 주문 조회
+    }
+
+    def __init__(self, ttl:dict=None, maxsize:int=1024) -> None:
+        '''
+        ttl: 조회 종류별 유효시간 (초) ex) {'able': 0.5}
+        maxsize: 보관할 응답 수
+        '''
+        self.ttl = {**self.TTL, **(ttl or {})}
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        # 계좌별 세대 번호 - 무효화시 증가, 이전 세대 항목은 조회되지 않고 LRU 로 밀려남
+        self.generation = {}
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def _key(self, name:str, account:str, params:tuple, generation:int) -> tuple:
+        return (account, generation, name, params)
+
+    def _count(self, name:str, result:str) -> None:
+        counter = self.counters.setdefault(name, {'hit': 0, 'miss': 0})
+        counter[result] += 1
+
+    def get(self, name:str, account:str, params:tuple=()) -> tuple:
+        '''
+        return: (hit 여부, 응답, 세대 번호)
+        miss 이면 세대 번호를 put 에 넘김 (조회하는 동안 주문으로 무효화되면 저장하지 않음)
+        '''
+        with self.lock:
+            generation = self.generation.get(account, 0)
+            key = self._key(name, account, params, generation)
+            item = self.items.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self.items[key]
+                self._count(name, 'miss')
+                return False, None, generation
+
+            self.items.move_to_end(key)
+            self._count(name, 'hit')
+            return True, item[1], generation
+
+    def put(self, name:str, account:str, value, generation:int, params:tuple=()) -> None:
+        '''
+        generation: get 에서 받은 세대 번호 (그 사이 무효화되었으면 주문 전 응답이므로 버림)
+        '''
+        ttl = self.ttl.get(name, 0)
+        if ttl <= 0:
+            return
+
+        with self.lock:
+            if generation != self.generation.get(account, 0):
+                return
+            key = self._key(name, account, params, generation)
+            self.items[key] = (time.monotonic() + ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def invalidate(self, account:str) -> None:
+        with self.lock:
+            self.generation[account] = self.generation.get(account, 0) + 1
+
+    def stats(self) -> dict:
+        '''
+        조회 종류별 hit, miss 수와 hit 비율
+        '''
+        with self.lock:
+            return {
+                name: {**counter, 'hit_rate': counter['hit'] / ((counter['hit'] + counter['miss']) or 1)}
+                for name, counter in self.counters.items()
+            }
+
+class OrderBook:
+    '''
+    미체결 주문, 보유 잔고 (메모리)
+    주문 접수시 바로 갱신하고 조회 API 와는 가끔 맞춰봄 (reconcile, 바뀐 항목만 수정)
+
+    주문: {'org_id', 'order_id', 'stock_id', 'order_type'(b, s), 'quantity', 'price', 'filled', 'remaining'}
+    잔고: {'stock_id', 'quantity', 'avg_price'}
+    '''
+
+    def __init__(self, journal=None) -> None:
+        '''
+        journal: 체결을 기록할 주문 journal (journal.OrderJournal)
+        '''
+        self.orders = {} # 주문번호 -> 주문
+        self.positions = {} # 종목코드 -> 잔고
+        self.journal = journal
+        self.lock = threading.RLock()
+
+    ######################################## 주문 접수
+
+    def on_order(self, receipt:dict, order_type:str) -> dict:
+        '''
+        order_stock 접수 -> 미체결 주문 추가
+        '''
+        quantity = int(receipt['ORD_QTY'])
+        order = {
+            'org_id': receipt['org_number'],
+            'order_id': receipt['order_number'],
+            'stock_id': receipt['PDNO'],
+            'order_type': order_type,
+            'quantity': quantity,
+            'price': int(receipt['ORD_UNPR']),
+            'filled': 0,
+            'remaining': quantity,
+        }
+        with self.lock:
+            self.orders[order['order_id']] = order
+        return order
+
+    def on_change(self, receipt:dict) -> dict:
+        '''
+        order_change, order_cancle 접수
+        정정: 원주문 잔량(또는 정정수량)이 새 주문번호로 이동, 취소: 원주문 잔량 차감
+        '''
+        with self.lock:
+            origin = self.orders.get(receipt['ORGN_ODNO'])
+            if origin is None:
+                # 모르는 주문 - 다음 reconcile 에서 반영
+                return None
+
+            moved = origin['remaining'] if receipt['QTY_ALL_ORD_YN'] == 'Y' else min(int(receipt['ORD_QTY']), origin['remaining'])
+            origin['remaining'] -= moved
+            origin['quantity'] -= moved
+            if origin['remaining'] <= 0:
+                del self.orders[origin['order_id']]
+
+            if receipt['RVSE_CNCL_DVSN_CD'] == '02':
+                return None
+
+            order = {
+                **origin,
+                'org_id': receipt['org_number'],
+                'order_id': receipt['order_number'],
+                'quantity': moved,
+                'price': int(receipt['ORD_UNPR']),
+                'filled': 0,
+                'remaining': moved,
+            }
+            self.orders[order['order_id']] = order
+            return order
+
+    def on_fill(self, order_id:str, quantity:int, price:float) -> None:
+        '''
+        체결 반영 (체결통보 등), 미체결 잔량과 잔고 갱신
+        잔량을 넘는 체결 (중복, 과다 통보) 은 잔량만큼만 반영
+        '''
+        with self.lock:
+            order, quantity = self._fill_order(order_id, quantity)
+            if not quantity:
+                return
+
+            if self.journal is not None:
+                self.journal.fill(order_id, quantity, price)
+            self._apply_position(order['stock_id'], quantity if order['order_type'] == 'b' else -quantity, price)
+
+    def _fill_order(self, order_id:str, quantity:int) -> tuple:
+        # 미체결 잔량 차감 (잔량이 없으면 삭제) -> (주문, 반영한 수량), 모르는 주문은 (None, 0)
+        order = self.orders.get(order_id)
+        if order is None:
+            return None, 0
+
+        quantity = max(min(quantity, order['remaining']), 0)
+        order['filled'] += quantity
+        order['remaining'] -= quantity
+        if order['remaining'] <= 0:
+            del self.orders[order_id]
+        return order, quantity
+
+    def _apply_position(self, stock_id:str, quantity:int, price:float) -> None:
+        position = self.positions.get(stock_id)
+        if position is None:
+            position = self.positions[stock_id] = {'stock_id': stock_id, 'quantity': 0, 'avg_price': 0.0}
+
+        held = position['quantity'] + quantity
+        if quantity > 0 and held > 0:
+            # 매수만 평균단가 변경
+            position['avg_price'] = (position['avg_price'] * position['quantity'] + price * quantity) / held
+        position['quantity'] = held
+        if held <= 0:
+            del self.positions[stock_id]
+
+    def restore(self, events:list) -> None:
+        '''
+        주문 journal 기록으로 미체결 주문 복원 (OrderJournal.replay 의 events)
+        잔고는 전날 보유분이 journal 에 없으므로 복원하지 않음 (reconcile_positions 로 맞춤)
+        '''
+        with self.lock:
+            for event in events:
+                if event[0] == 'fill':
+                    self._fill_order(event[1], event[2])
+                elif event[1] == 'c':
+                    self.on_change(event[2])
+                else:
+                    self.on_order(event[2], event[1])
+
+    ######################################## 조회
+
+    def open_orders(self, stock_id:str=None) -> list:
+        with self.lock:
+            return [dict(o) for o in self.orders.values() if stock_id is None or o['stock_id'] == stock_id]
+
+    def position(self, stock_id:str) -> int:
+        '''
+        보유수량 (없으면 0)
+        '''
+        position = self.positions.get(stock_id)
+        return 0 if position is None else position['quantity']
+
+    def holdings(self) -> dict:
+        '''
+        종목코드 -> 보유수량
+        '''
+        with self.lock:
+            return {stock_id: p['quantity'] for stock_id, p in self.positions.items()}
+
+    ######################################## 조회 API 와 맞추기
+
+    @staticmethod
+    def _diff(current:dict, fetched:dict, fields:tuple) -> dict:
+        '''
+        current 를 fetched 기준으로 수정 (바뀐 항목만), 변경 내역 반환
+        '''
+        diff = {'added': [], 'removed': [], 'changed': []}
+        for key in list(current):
+            if key not in fetched:
+                diff['removed'].append(current.pop(key))
+
+        for key, new in fetched.items():
+            old = current.get(key)
+            if old is None:
+                current[key] = new
+                diff['added'].append(new)
+                continue
+
+            changes = {f: (old[f], new[f]) for f in fields if old[f] != new[f]}
+            if changes:
+                old.update({f: new[f] for f in changes})
+                diff['changed'].append({**old, 'changes': changes})
+        return diff
+
+    def reconcile_orders(self, rows:list) -> dict:
+        '''
+        정정취소가능 주문 조회 결과 (Domestic.iter_changable) 로 미체결 주문 맞추기
+        '''
+        fetched = {}
+        for row in rows:
+            quantity, remaining = row['quantity'], row['change_quantity']
+            fetched[row['order_id']] = {
+                'org_id': row['org_id'],
+                'order_id': row['order_id'],
+                'stock_id': row['stock_id'],
+                'order_type': 'b' if row['buy_or_sell'] else 's',
+                'quantity': quantity,
+                'price': row['price'],
+                'filled': quantity - remaining,
+                'remaining': remaining,
+            }
+
+        with self.lock:
+            return self._diff(self.orders, fetched, ('quantity', 'price', 'filled', 'remaining'))
+
+    def reconcile_positions(self, rows:list) -> dict:
+        '''
+        주식잔고조회 결과 (Domestic.iter_asset) 로 잔고 맞추기
+        '''
+        fetched = {}
+        for row in rows:
+            quantity = row['holding_quantity']
+            if quantity <= 0:
+                # 당일 전량 매도 종목도 조회됨
+                continue
+            fetched[row['stock_number']] = {
+                'stock_id': row['stock_number'],
+                'quantity': quantity,
+                'avg_price': float(row['avg_price']),
+            }
+
+        with self.lock:
+            return self._diff(self.positions, fetched, ('quantity', 'avg_price'))
 
 class Domestic:
     '''
@@ -136,6 +1493,7 @@ class Domestic:
             'c': 'TTTC0803U', # 정정 취소
             'a': 'TTTC8434R', # 주식 잔고 조회
             'able': 'TTTC8908R', # 매수 가능 조회
+            'changable': 'TTTC8036R', # 정정취소가능 주문 조회
         },
         's': { # 모의
             'b': 'VTTC0802U', # 매수
@@ -146,13 +1504,361 @@ class Domestic:
         }
     }
 
-    def __init__(self, kis:KISTrade, auth:KISAuth) -> None:
+    # 연속조회 최대 페이지 수
+    MAX_PAGES = 100
+
+    # 토큰 오류 (유효하지 않은 token, 기간이 만료된 token)
+    TOKEN_ERRORS = ('EGW00121', 'EGW00123')
+
+    PATH = {
+        'order': '/uapi/domestic-stock/v1/trading/order-cash',
+        'rvsecncl': '/uapi/domestic-stock/v1/trading/order-rvsecncl',
+        'changable': '/uapi/domestic-stock/v1/trading/inquire-psbl-rvsecncl',
+        'asset': '/uapi/domestic-stock/v1/trading/inquire-balance',
+        'able': '/uapi/domestic-stock/v1/trading/inquire-psbl-order',
+    }
+
+    def __init__(self, kis:KISTrade, auth:KISAuth, symbols=None, cache:ResponseCache=None, journal=None) -> None:
+        '''
+        symbols: 종목 검색 인덱스 (stocks_info.kis_symbol.SymbolIndex), 있으면 주문 전에 종목코드 확인
+        cache: 조회 응답 캐시 (order_able, order_asset, order_changable), 반환값은 수정하지 말 것
+        journal: 주문 journal (journal.OrderJournal), 있으면 주문 전송 전에 기록하고 재시작시 recover 로 복원
+        '''
         self.kis = kis
         self.auth = auth
-        # 정정취소가능 주문 조회, 상태 관리
-        self.order_list = []
+        self.symbols = symbols
+        self.cache = cache
+        self.journal = journal
+        self.executor = None
+        self.order_executor = None
+        # 정정취소가능 주문, 잔고 상태 관리
+        self.book = OrderBook(journal)
+
+    ######################################## 요청 생성 / 응답 정제
+    # sync, async 클라이언트가 같이 사용
+
+    def _headers(self, tr_id:str, token:str, hashkey:str=None) -> dict:
+        headers = {
+            'authorization': token,
+            'tr_id': tr_id,
+            **self.kis.getConfigs(),
+        }
+        if hashkey is not None:
+            headers['hashkey'] = hashkey
+        return headers
 
-    def order_stock(self, stock_id:str, quantity:int, order_division:str='01', price:int=0, order_type='b'):
+    def _stock_body(self, stock_id:str, quantity:int, order_division:str, price:int) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'PDNO': stock_id, # 종목코드 (6자리)
+            'ORD_DVSN': order_division, # 주문구분
+            'ORD_QTY': str(quantity).zfill(2), # 주문수량
+            'ORD_UNPR': str(price)# 주문단가
+        }
+
+    def _change_body(self, org_id:str, order_id:str, quantity:int, price:int, order_division:str) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'KRX_FWDG_ORD_ORGNO': org_id,
+            'ORGN_ODNO': order_id,
+            'RVSE_CNCL_DVSN_CD': '01',
+
+            'ORD_DVSN': order_division,
+            'ORD_QTY': str(quantity),
+            'ORD_UNPR': str(price),
+            'QTY_ALL_ORD_YN': 'Y' if quantity == 0 else 'N', # Y, N
+        }
+
+    def _cancle_body(self, org_id:str, order_id:str, quantity:int) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'KRX_FWDG_ORD_ORGNO': org_id,
+            'ORGN_ODNO': order_id,
+            'RVSE_CNCL_DVSN_CD': '02',
+
+            'ORD_DVSN': '00',
+            'ORD_QTY': str(quantity),
+            'ORD_UNPR': '0',
+            'QTY_ALL_ORD_YN': 'Y' if quantity == 0 else 'N', # Y, N
+        }
+
+    def _changable_params(self) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'CTX_AREA_FK100': '',
+            'CTX_AREA_NK100': '',
+            'INQR_DVSN_1': '0',
+            'INQR_DVSN_2': '0',
+        }
+
+    def _asset_params(self) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'AFHR_FLPR_YN': 'N',
+            'OFL_YN': '',
+            'INQR_DVSN': '02', # 종목별 조회
+            'UNPR_DVSN': '01',
+            'FUND_STTL_ICLD_YN': 'N',
+            'FNCG_AMT_AUTO_RDPT_YN': 'N',
+            'PRCS_DVSN': '00',
+            'CTX_AREA_FK100': '',
+            'CTX_AREA_NK100': ''
+        }
+
+    def _able_params(self, stock_id:str, target_price:int) -> dict:
+        return {
+            **self.kis.getAccount(),
+            'PDNO': stock_id,
+            'ORD_UNPR': str(target_price),
+            'ORD_DVSN': '00',
+            'CMA_EVLU_AMT_ICLD_YN': 'N',
+            'OVRS_ICLD_YN': 'N',
+        }
+
+    def _send(self, method:str, path:str, headers:dict, params:dict=None, body:dict=None) -> dict:
+        '''
+        요청 전송
+        서버가 토큰을 거부하면 (만료, 폐기) 토큰을 재발급해서 1회 재요청
+        '''
+        for retry in (False, True):
+            if method == 'GET':
+                r = self.kis.transport.get(path, params=params, headers=headers)
+            else:
+                r = self.kis.transport.post(path, headers=headers, data=json.dumps(body))
+            res_json = r.res_json
+            # 연속조회 여부 (F, M: 다음 페이지 있음 / D, E: 마지막 페이지)
+            res_json['tr_cont'] = r.headers.get('tr_cont', '')
+
+            if retry or res_json.get('msg_cd') not in self.TOKEN_ERRORS:
+                return res_json
+
+            self.auth.invalidateToken(headers['authorization'])
+            headers = {**headers, 'authorization': self.auth.getToken()}
+
+    def _pages(self, path:str, tr_id:str, params:dict, rows):
+        '''
+        연속조회 (CTX_AREA_FK100, CTX_AREA_NK100) 응답을 행 단위로 반환하는 generator
+        현재 페이지를 넘겨주는 동안 다음 페이지를 미리 요청
+        rows: 응답 -> 행 목록
+        '''
+        def fetch(params, tr_cont):
+            headers = self._headers(tr_id, self.auth.getToken())
+            headers['tr_cont'] = tr_cont
+            return self._send('GET', path, headers, params=params)
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='Domestic')
+
+        future = self.executor.submit(fetch, params, '')
+        for _ in range(self.MAX_PAGES):
+            res_json = future.result()
+            if not self._is_success(res_json):
+                raise RuntimeError(f"{res_json['msg_cd']} {res_json['msg1']}")
+
+            future = None
+            if res_json['tr_cont'] in ('F', 'M'):
+                params = {
+                    **params,
+                    'CTX_AREA_FK100': res_json['ctx_area_fk100'],
+                    'CTX_AREA_NK100': res_json['ctx_area_nk100'],
+                }
+                future = self.executor.submit(fetch, params, 'N')
+
+            yield from rows(res_json)
+
+            if future is None:
+                return
+
+        print(f'연속조회 {self.MAX_PAGES} 페이지 초과')
+
+    def _cache_get(self, name:str, *params) -> tuple:
+        # (hit 여부, 응답, 세대 번호)
+        if self.cache is None:
+            return False, None, None
+        return self.cache.get(name, self.kis.account, params)
+
+    def _cache_put(self, name:str, value, generation:int, *params) -> None:
+        if self.cache is not None:
+            self.cache.put(name, self.kis.account, value, generation, params)
+
+    def _cache_invalidate(self) -> None:
+        # 주문이 들어가면 잔고, 매수가능금액, 미체결이 바뀜
+        if self.cache is not None:
+            self.cache.invalidate(self.kis.account)
+
+    def _record(self, res_json:dict, body:dict, order_type:str, entry:int=None) -> dict:
+        '''
+        주문 접수 -> 캐시 무효화, journal 기록, 주문 상태 갱신, 접수 결과 반환
+        entry: 주문 journal id (_intent)
+        '''
+        self._cache_invalidate()
+        receipt = self._receipt(res_json, body)
+        if entry is not None:
+            self.journal.receipt(entry, receipt)
+        if order_type == 'c':
+            self.book.on_change(receipt)
+        else:
+            self.book.on_order(receipt, order_type)
+        return receipt
+
+    def _intent(self, order_type:str, body:dict, tag:str=None) -> int:
+        # 주문 전송 전 journal 기록 (fsync 까지 대기), journal 이 없으면 None
+        if self.journal is None:
+            return None
+        return self.journal.intent(order_type, body, tag)
+
+    def _basket_intents(self, legs:list, tag:str=None) -> dict:
+        # 여러 주문 전송 전 journal 기록 (fsync 한 번) -> {순번: 주문 journal id}
+        if self.journal is None:
+            return {}
+        entries = self.journal.intents([(order_type, body) for _, order_type, body in legs], tag)
+        return {leg[0]: entry for leg, entry in zip(legs, entries)}
+
+    def _reject(self, entry:int, res_json:dict) -> None:
+        if entry is not None:
+            self.journal.reject(entry, res_json['msg_cd'], res_json['msg1'])
+
+    def _resolve(self, unresolved:list, rows:list) -> dict:
+        '''
+        전송 결과를 모르는 주문 (journal intent) 을 정정취소가능 주문 조회 결과 (rows) 와 맞춤
+        종목, 매수/매도, 수량, 가격이 같고 self.book 에 없는 주문을 접수된 주문으로 보고 journal, self.book 에 반영
+        rows 가 None 이면 (모의투자, 조회 실패) 확인하지 않음
+        '''
+        result = {'matched': [], 'unresolved': unresolved}
+        if rows is None or not unresolved:
+            return result
+
+        with self.book.lock:
+            candidates = [row for row in rows if row['order_id'] not in self.book.orders]
+        result['unresolved'] = []
+        for intent in unresolved:
+            order_type, body = intent['order_type'], intent['body']
+            row = None
+            if order_type != 'c':
+                row = next((row for row in candidates if row['stock_id'] == body['PDNO']
+                            and row['buy_or_sell'] == (order_type == 'b') and row['quantity'] == int(body['ORD_QTY'])
+                            and row['price'] == int(body['ORD_UNPR'])), None)
+            if row is None:
+                # 전량 체결, 미접수, 정정/취소는 구분할 수 없음 - reconcile_book 으로 맞춤 (다음 재시작에도 unresolved)
+                if intent.get('status') != 'unmatched':
+                    self.journal.resolve(intent['seq'], 'unmatched')
+                result['unresolved'].append(intent)
+                continue
+
+            candidates.remove(row)
+            receipt = Receipt(True, row['org_id'], row['order_id'], datetime.strptime(row['order_date'], '%H%M%S'), body)
+            self.journal.receipt(intent['seq'], receipt)
+            events = [('order', order_type, receipt)]
+            filled = row['quantity'] - row['change_quantity']
+            if filled:
+                self.journal.fill(row['order_id'], filled, row['price'])
+                events.append(('fill', row['order_id'], filled, row['price']))
+            self.book.restore(events)
+            result['matched'].append(receipt)
+        return result
+
+    def _order_headers(self, tr_id:str, body:dict) -> dict:
+        # 주문 전 토큰 + hashkey 준비 시간 (sign 단계) 기록
+        with self.kis.metrics.timer(tr_id, 'sign'):
+            return self._headers(tr_id, *self.auth.getTokenAndHashKey(body))
+
+    def _basket_legs(self, orders:list) -> tuple:
+        '''
+        여러 종목 주문 확인 -> ([(순번, order_type, body)], [실패])
+        '''
+        legs, failures = [], []
+        for index, (stock_id, quantity, order_type, order_division, price) in enumerate(orders):
+            try:
+                assert len(stock_id) == 6, '주식 종목코드는 6자리입니다.'
+                assert order_type in ('b', 's'), 'order_type 은 buy(b), sell(s) 중 하나입니다.'
+                if order_division != '01':
+                    assert price != 0, '시장가가 아닐 경우 price는 필수값입니다.'
+                assert self._check_symbol(stock_id), '주문할 수 없는 종목입니다. (거래정지, 정리매매)'
+            except AssertionError as e:
+                failures.append(self._basket_failure(index, stock_id, order_type, '', str(e)))
+                continue
+            legs.append((index, order_type, self._stock_body(stock_id, quantity, order_division, price)))
+        return legs, failures
+
+    def _basket_signed(self, legs:list, hashkeys:list, failures:list) -> tuple:
+        '''
+        hashkey 발급에 실패한 주문은 보내지 않고 failures 에 추가 -> (보낼 legs, {순번: hashkey})
+        hashkeys: legs 순서대로 hashkey 또는 예외
+        '''
+        signed = {}
+        for (index, order_type, body), hashkey in zip(legs, hashkeys):
+            if isinstance(hashkey, Exception):
+                failures.append(self._basket_failure(index, body['PDNO'], order_type, type(hashkey).__name__, str(hashkey)))
+            else:
+                signed[index] = hashkey
+        return [leg for leg in legs if leg[0] in signed], signed
+
+    def _sign_leg(self, leg:tuple):
+        # 주문 하나의 hashkey (실패시 예외를 반환, _basket_signed 참고)
+        try:
+            return self.auth.signBody(leg[2])
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _basket_failure(index:int, stock_id:str, order_type:str, msg_cd:str, msg1:str) -> dict:
+        return {'index': index, 'stock_id': stock_id, 'order_type': order_type, 'msg_cd': msg_cd, 'msg1': msg1}
+
+    @staticmethod
+    def _basket_groups(legs:list, sell_first:bool) -> list:
+        # 매도 먼저 접수 (매도 대금으로 매수), 그룹 안에서는 동시에 주문
+        if not sell_first:
+            return [legs]
+        return [group for group in ([leg for leg in legs if leg[1] == 's'], [leg for leg in legs if leg[1] == 'b']) if group]
+
+    def _check_symbol(self, stock_id:str) -> bool:
+        '''
+        요청 전에 종목코드, 거래정지/정리매매 확인 (symbols 가 없으면 확인하지 않음)
+        '''
+        if self.symbols is None:
+            return True
+        assert stock_id in self.symbols, f'{stock_id}: 존재하지 않는 종목코드입니다.'
+        if not self.symbols.is_tradable(stock_id):
+            print(f'{stock_id}: 주문할 수 없는 종목입니다. (거래정지, 정리매매)')
+            return False
+        return True
+
+    @staticmethod
+    def _is_success(res_json:dict) -> bool:
+        if not res_json['rt_cd'] == '0':
+            print(res_json['msg_cd'])
+            print(res_json['msg1'])
+            return False
+        return True
+
+    @staticmethod
+    def _receipt(res_json:dict, body:dict) -> Receipt:
+        return Receipt.from_api(res_json, body)
+
+    @staticmethod
+    def _changable_rows(res_json:dict) -> list:
+        return [OpenOrder.from_api(l) for l in res_json['output']]
+
+    @staticmethod
+    def _asset_rows(res_json:dict) -> list:
+        return [Position.from_api(l) for l in res_json['output1']]
+
+    @staticmethod
+    def _able_result(res_json:dict) -> BuyingPower:
+        return BuyingPower.from_api(res_json['output'])
+
+    ######################################## 주문
+
+    def prepare_order(self, stock_id:str, quantity:int, order_division:str='01', price:int=0) -> dict:
+        '''
+        주문 body 를 미리 만들고 hashkey 발급 (ex. 손절가 매도 주문 대기)
+        같은 인자로 order_stock 을 호출하면 hashkey 요청 없이 주문
+        '''
+        body = self._stock_body(stock_id, quantity, order_division, price)
+        self.auth.prepareHashKey(body)
+        return body
+
+    def order_stock(self, stock_id:str, quantity:int, order_division:str='01', price:int=0, order_type='b', tag:str=None):
         '''
         주식 주문
         # 필수값
@@ -163,49 +1869,26 @@ class Domestic:
             order_division - 주문구분 00-지정가, 01-시장가, 05-장전 시간외, 06-장후 시간외, 07-시간외 단일가
             price: 가격 (시장가 외 필수)
             order_type: buy(b), sell(s)
+            tag: journal 에 남길 이름 (재시작 후 journal.fired(tag) 로 이미 주문했는지 확인)
         '''
 
         assert len(stock_id) == 6, '주식 종목코드는 6자리입니다.'
         if order_division != '01':
             assert price != 0, '시장가가 아닐 경우 price는 필수값입니다.'
+        if not self._check_symbol(stock_id):
+            return False
 
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/order-cash'
-
-            body = {
-                **self.kis.getAccount(),
-                'PDNO': stock_id, # 종목코드 (6자리)
-                'ORD_DVSN': order_division, # 주문구분
-                'ORD_QTY': str(quantity).zfill(2), # 주문수량
-                'ORD_UNPR': str(price)# 주문단가
-            }
+            body = self._stock_body(stock_id, quantity, order_division, price)
+            headers = self._order_headers(self.TRAIDING_ID[self.kis.mode][order_type], body)
+            entry = self._intent(order_type, body, tag)
 
-            headers = {
-                # 'content-type': 'application/json; charset=utf-8',
-                'authorization': self.auth.getToken(),
-                'tr_id': self.TRAIDING_ID[self.kis.mode][order_type],
-                'hashkey': self.auth.getHashKey(body),
-                **self.kis.getConfigs(),
-            }
-
-            r = requests.post(URL, headers=headers, data=json.dumps(body))
-            
-            res_json = r.json()
-            # print(res_json)
-            if not res_json['rt_cd'] == '0':
-                print(res_json['msg_cd'])
-                print(res_json['msg1'])
+            res_json = self._send('POST', self.PATH['order'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
                 return False
 
-            order_receipt = {
-                'status':res_json['rt_cd'] == '0',
-                'org_number': res_json['output']['KRX_FWDG_ORD_ORGNO'],
-                'order_number': res_json['output']['ODNO'],
-                'order_date': datetime.strptime(res_json['output']['ORD_TMD'], '%H%M%S'),
-                **body
-            }
-
-            return order_receipt
+            return self._record(res_json, body, order_type, entry)
 
         except:
             # error 발생
@@ -214,7 +1897,69 @@ class Domestic:
             traceback.print_exc()
 
             return False
+
+    def order_basket(self, orders:list, sell_first:bool=True, tag:str=None) -> dict:
+        '''
+        여러 종목 주문 (리밸런싱)
+        토큰, 모든 body 의 hashkey 를 먼저 준비하고 속도 제한 안에서 동시에 주문
+
+        orders: [(stock_id, quantity, order_type, order_division, price), ...] (order_stock 인자 참고)
+        sell_first: 매도 주문 접수가 모두 끝난 뒤 매수 주문 (예수금이 부족한 경우)
+        tag: journal 에 남길 이름 (모든 주문에 같은 tag)
+
+        return: {
+            'receipts': 주문 순서대로 접수 결과 (실패 None),
+            'failures': [{'index', 'stock_id', 'order_type', 'msg_cd', 'msg1'}, ...],
+        }
+        '''
+        legs, failures = self._basket_legs(orders)
+        receipts = [None] * len(orders)
+        if not legs:
+            return {'receipts': receipts, 'failures': failures}
+
+        if self.order_executor is None:
+            workers = getattr(self.kis.transport, 'pool_size', 4)
+            self.order_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='DomesticOrder')
+
+        with self.kis.metrics.timer('basket', 'sign'):
+            token = self.auth.getToken()
+            hashkeys = list(self.order_executor.map(self._sign_leg, legs))
+        legs, hashkeys = self._basket_signed(legs, hashkeys, failures)
+        entries = self._basket_intents(legs, tag)
+
+        def submit(leg, hashkey):
+            index, order_type, body = leg
+            headers = self._headers(self.TRAIDING_ID[self.kis.mode][order_type], token, hashkey)
+            try:
+                res_json = self._send('POST', self.PATH['order'], headers, body=body)
+            except Exception as e:
+                return index, None, self._basket_failure(index, body['PDNO'], order_type, type(e).__name__, str(e))
+            if not self._is_success(res_json):
+                self._reject(entries.get(index), res_json)
+                return index, None, self._basket_failure(index, body['PDNO'], order_type, res_json['msg_cd'], res_json['msg1'])
+            return index, self._record(res_json, body, order_type, entries.get(index)), None
+
+        with self.kis.metrics.timer('basket', 'total'):
+            for group in self._basket_groups(legs, sell_first):
+                futures = [self.order_executor.submit(submit, leg, hashkeys[leg[0]]) for leg in group]
+                for future in futures:
+                    index, receipt, failure = future.result()
+                    receipts[index] = receipt
+                    if failure is not None:
+                        failures.append(failure)
+
+        failures.sort(key=lambda failure: failure['index'])
+        return {'receipts': receipts, 'failures': failures}
         
+    def iter_changable(self):
+        '''
+        정정취소가능 주문 조회 - 전체 페이지를 행 단위로 반환 (모의투자 미지원)
+        '''
+        assert self.kis.mode == 'r', '정정취소가능 주문 조회는 실전투자만 지원합니다.'
+
+        return self._pages(self.PATH['changable'], self.TRAIDING_ID[self.kis.mode]['changable'],
+                           self._changable_params(), self._changable_rows)
+
     def order_changable(self):
         '''
         정정취소가능 주문 조회 (모의투자 미지원)
@@ -222,47 +1967,12 @@ class Domestic:
         assert self.kis.mode == 'r', '정정취소가능 주문 조회는 실전투자만 지원합니다.'
 
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/inquire-psbl-rvsecncl'
-            
+            hit, result, generation = self._cache_get('changable')
+            if hit:
+                return result
 
-            headers = {
-                'authorization': self.auth.getToken(),
-                'tr_id': 'TTTC8036R',
-                **self.kis.getConfigs(),
-            }
-            params = {
-                **self.kis.getAccount(),
-                'CTX_AREA_FK100': '',
-                'CTX_AREA_NK100': '',
-                'INQR_DVSN_1': '0',
-                'INQR_DVSN_2': '0',
-            }
-
-            r = requests.get(URL, params=params, headers=headers)
-
-            res_json = r.json()
-
-            if not res_json['rt_cd'] == '0':
-                print(res_json['msg_cd'])
-                print(res_json['msg1'])
-                return []
-
-            has_next = 'ctx_area_fk100' in res_json
-
-            result = [{
-                'org_id': l['ord_gno_brno'],
-                'order_id': l['odno'],
-                'original_id': l['orgn_odno'],
-                'order_name': l['ord_dvsn_name'],
-                'stock_id': l['pdno'],
-                'stock_name': l['prdt_name'],
-                'quantity': l['ord_qty'],
-                'price': l['ord_unpr'],
-                'order_date': l['ord_tmd'],
-                'change_quantity': l['psbl_qty'],
-                'buy_or_sell': l['sll_buy_dvsn_cd'] == '02', # buy, sell
-            } for l in res_json['output']]
-            
+            result = Records(OpenOrder, self.iter_changable())
+            self._cache_put('changable', result, generation)
             return result
 
         except:
@@ -273,118 +1983,82 @@ class Domestic:
 
             return []
     
-    def order_change(self, org_id: str, order_id: str):
+    def order_change(self, org_id: str, order_id: str, quantity:int=0, price:int=0, order_division:str='00'):
         '''
         주문 정정
 
         org_id - 한국투자증권 시스템에서 지정된 영업점코드
         order_id - 한국투자증권 시스템에서 채번된 주문번호
+        quantity - 정정수량 (0일 경우 잔량전부)
+        price - 정정단가
+        order_division - 주문구분 00-지정가, 01-시장가
         '''
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/order-rvsecncl'
-            body = {
-                **self.kis.getAccount(),
-                'KRX_FWDG_ORD_ORGNO': org_id,
-                'ORGN_ODNO': order_id,
-                'RVSE_CNCL_DVSN_CD': '01',
-
-                'ORD_DVSN': '',
-                'ORD_QTY': '',
-                'ORD_UNPR': '',
-                'QTY_ALL_ORD_YN': '', # Y, N
-
-            }
-            headers = {
-                'authorization': self.auth.getToken(),
-                'tr_id': self.TRAIDING_ID[self.kis.mode]['c'],
-                'hashkey': self.auth.getHashKey(body),
-                **self.kis.getConfigs(),
-            }
+            body = self._change_body(org_id, order_id, quantity, price, order_division)
+            headers = self._order_headers(self.TRAIDING_ID[self.kis.mode]['c'], body)
+            entry = self._intent('c', body)
 
+            res_json = self._send('POST', self.PATH['rvsecncl'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
+                return False
 
-            return
+            return self._record(res_json, body, 'c', entry)
 
         except:
             # error 발생
             print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
             return False
 
-    def order_cancle(self, org_id: str, order_id: str):
+    def order_cancle(self, org_id: str, order_id: str, quantity:int=0):
         '''
         주문 취소
 
         org_id - 한국투자증권 시스템에서 지정된 영업점코드
         order_id - 한국투자증권 시스템에서 채번된 주문번호
+        quantity - 취소수량 (0일 경우 잔량전부)
         '''
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/order-rvsecncl'
-            body = {
-                **self.kis.getAccount(),
-                'KRX_FWDG_ORD_ORGNO': org_id,
-                'ORGN_ODNO': order_id,
-                'RVSE_CNCL_DVSN_CD': '02',
-
-                'ORD_QTY': '',
-                'QTY_ALL_ORD_YN': '', # Y, N
-            }
-            headers = {
-                    'authorization': self.auth.getToken(),
-                    'tr_id': self.TRAIDING_ID[self.kis.mode]['c'],
-                    'hashkey': self.auth.getHashKey(body),
-                    **self.kis.getConfigs(),
-            }
-            
-            return
+            body = self._cancle_body(org_id, order_id, quantity)
+            headers = self._order_headers(self.TRAIDING_ID[self.kis.mode]['c'], body)
+            entry = self._intent('c', body)
+
+            res_json = self._send('POST', self.PATH['rvsecncl'], headers, body=body)
+            if not self._is_success(res_json):
+                self._reject(entry, res_json)
+                return False
+
+            return self._record(res_json, body, 'c', entry)
             
         except:
             # error 발생
             print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
             return False
     
+    def iter_asset(self):
+        '''
+        주식잔고조회 - 전체 페이지를 행 단위로 반환
+        '''
+        return self._pages(self.PATH['asset'], self.TRAIDING_ID[self.kis.mode]['a'],
+                           self._asset_params(), self._asset_rows)
+
     def order_asset(self):
         '''
         주식잔고조회
         '''
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/inquire-balance'
-            params = {
-                **self.kis.getAccount(),
-                'AFHR_FLPR_YN': 'N',
-                'OFL_YN': '',
-                'INQR_DVSN': '02', # 종목별 조회
-                'UNPR_DVSN': '01',
-                'FUND_STTL_ICLD_YN': 'N',
-                'FNCG_AMT_AUTO_RDPT_YN': 'N',
-                'PRCS_DVSN': '00',
-                'CTX_AREA_FK100': '',
-                'CTX_AREA_NK100': ''
-            }
-            headers = {
-                **self.kis.getConfigs(),
-                'authorization': self.auth.getToken(),
-                'tr_id': self.TRAIDING_ID[self.kis.mode]['a'],
-            }
-            r = requests.get(URL, params=params, headers=headers, )
-            res_json = r.json()
-            if not res_json['rt_cd'] == '0':
-                print(res_json['msg_cd'])
-                print(res_json['msg1'])
-                return []
-            
-            has_next = 'ctx_area_fk100' in res_json
-
-            result = [{
-                'stock_number': l['pdno'],
-                'stock_name': l['prdt_name'],
-                'holding_quantity': l['hldg_qty'],
-                'avg_price': l['pchs_avg_pric'],
-                'purchase_amount': l['pchs_amt'],
-                'eval_amount': l['evlu_amt']
-            } for l in res_json['output1']]
-            
-            if has_next:
-                print('이어서 조회')
-            
+            hit, result, generation = self._cache_get('a')
+            if hit:
+                return result
+
+            result = Records(Position, self.iter_asset())
+            self._cache_put('a', result, generation)
             return result
             
         except:
@@ -400,34 +2074,19 @@ class Domestic:
         매수가능조회
         '''
         try:
-            URL = self.kis.domain + '/uapi/domestic-stock/v1/trading/inquire-psbl-order'
-            params = {
-                **self.kis.getAccount(),
-                'PDNO': stock_id,
-                'ORD_UNPR': str(target_price),
-                'ORD_DVSN': '00',
-                'CMA_EVLU_AMT_ICLD_YN': 'N',
-                'OVRS_ICLD_YN': 'N',
-            }
-            headers = {
-                **self.kis.getConfigs(),
-                'authorization': self.auth.getToken(),
-                'tr_id': self.TRAIDING_ID[self.kis.mode]['able'],
-            }
+            hit, result, generation = self._cache_get('able', stock_id, int(target_price))
+            if hit:
+                return result
 
-            r = requests.get(URL, params=params, headers=headers)
-            res_json = r.json()
+            params = self._able_params(stock_id, target_price)
+            headers = self._headers(self.TRAIDING_ID[self.kis.mode]['able'], self.auth.getToken())
 
-            if not res_json['rt_cd'] == '0':
-                print(res_json['msg_cd'])
-                print(res_json['msg1'])
+            res_json = self._send('GET', self.PATH['able'], headers, params=params)
+            if not self._is_success(res_json):
                 return False
 
-            result = {
-                'max_amount': res_json['output']['max_buy_amt'],
-                'max_quantity': res_json['output']['max_buy_qty'],
-            }
-
+            result = self._able_result(res_json)
+            self._cache_put('able', result, generation, stock_id, int(target_price))
             return result
 
         except:
@@ -438,6 +2097,46 @@ class Domestic:
 
             return False
 
+    def recover(self) -> dict:
+        '''
+        재시작시 주문 journal 로 미체결 주문 (self.book) 복원
+        접수 결과가 기록되지 않은 주문 (전송 중 종료) 만 정정취소가능 주문 조회로 확인 (실전투자, 전체 재조회 없음)
+        잔고는 reconcile_book 에서 맞춤
+
+        return: {'matched': 접수가 확인된 주문 [Receipt], 'unresolved': 확인하지 못한 주문 [intent 기록]}
+        '''
+        assert self.journal is not None, '주문 journal 이 없습니다.'
+
+        state = self.journal.replay()
+        self.book.restore(state['events'])
+
+        rows = None
+        if state['unresolved'] and self.kis.mode == 'r':
+            try:
+                rows = list(self.iter_changable())
+            except Exception as e:
+                print(f'정정취소가능 주문 조회 실패: {e}')
+        return self._resolve(state['unresolved'], rows)
+
+    def reconcile_book(self) -> dict:
+        '''
+        조회 API 로 주문 상태 (self.book) 맞추기 - 바뀐 항목만 수정 (ex. engine.every(60, domestic.reconcile_book))
+        정정취소가능 주문 조회는 실전투자만 지원 (모의투자는 잔고만 맞춤)
+        '''
+        try:
+            diff = {'positions': self.book.reconcile_positions(self.iter_asset())}
+            if self.kis.mode == 'r':
+                diff['orders'] = self.book.reconcile_orders(self.iter_changable())
+            return diff
+
+        except:
+            # error 발생
+            print('############### 에러발생 ###############')
+            import traceback
+            traceback.print_exc()
+
+            return {}
+
 marketTime = {
     'open'  : { 'hour': 8, 'minute':30 },
     'close' : { 'hour':15, 'minute':30 }
@@ -449,77 +2148,170 @@ def marketOpen():
         return True
     return False
 
-import time
-
 def my_print(*msg):
     print(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), *msg)
 
+class StartupProfile:
+    '''
+    시작 단계별 소요시간 (동시에 진행되는 단계는 시작, 끝 시각으로 확인)
+
+    ex)
+        profile = StartupProfile()
+        with profile.phase('configs'):
+            ...
+        profile.ready()
+        print(profile.report())
+    '''
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.phases = {} # 단계 -> (시작, 끝) 초
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name:str):
+        start = time.perf_counter() - self.start
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = (start, time.perf_counter() - self.start)
+
+    def ready(self) -> float:
+        '''
+        주문 가능 시점 기록, 시작부터 걸린 시간 (초)
+        '''
+        elapsed = time.perf_counter() - self.start
+        with self.lock:
+            self.phases['ready'] = (elapsed, elapsed)
+        return elapsed
+
+    def report(self) -> str:
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1])
+        return '\n'.join(f'{name:10s} {start * 1000:9.1f} ~ {end * 1000:9.1f} ms  ({(end - start) * 1000:8.1f} ms)'
+                         for name, (start, end) in phases)
+
+def bootstrap(kis:KISTrade, auth:KISAuth, stock_info:StockInfo=None, profile:StartupProfile=None) -> dict:
+    '''
+    시작 준비 - 종목정보 (코스피, 코스닥) 다운로드/파싱, 토큰 발급, 연결 예열을 동시에 진행
+    (처음 사용할 때 받으면 첫 주문이 늦어짐)
+
+    return: {'KOSPI': DataFrame, 'KOSDAQ': DataFrame} (SymbolIndex 입력)
+    '''
+    stock_info = stock_info or StockInfo()
+    profile = profile or StartupProfile()
+
+    def run(name, fn):
+        with profile.phase(name):
+            return fn()
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix='bootstrap') as executor:
+        kospi = executor.submit(run, 'kospi', stock_info.kospi)
+        kosdaq = executor.submit(run, 'kosdaq', stock_info.kosdaq)
+        token = executor.submit(run, 'token', auth.getToken)
+        warmup = executor.submit(run, 'warmup', kis.warmup)
+
+        # 토큰, 연결은 실패해도 주문시 다시 시도
+        for future in (token, warmup):
+            try:
+                future.result()
+            except Exception as e:
+                print(f'시작 준비 실패: {e}')
+
+        return {'KOSPI': kospi.result(), 'KOSDAQ': kosdaq.result()}
+
 if __name__ == '__main__':
     
+    profile = StartupProfile()
+
     my_print('한국투자증권 계정 확인')
-    configs = {l.split('=', 1)[0]:l.split('=', 1)[1].rstrip() for l in open('configs', 'r', encoding='utf-8').readlines()}
-    kis = KISTrade(configs['APPKey'], configs['APPSecret'], configs['saccount'])
-    
-    my_print('주식정보 설정')
-    # 사용할 수 있는 종목, 사용할 칼럼만 남기기 -> 데이터 확인 필요
-    stock_info = StockInfo()
-    kospi = stock_info.kospi()
-    # if type(kospi) == pd.DataFrame:
-    #     print(kospi.head(1))
-    
-    kosdaq = stock_info.kosdaq()
-    # if type(kosdaq) == pd.DataFrame:
-    #     print(kosdaq.head(1))
-    
-    my_print('인증정보 생성')
-    auth = KISAuth(kis)
-    domestic = Domestic(kis, auth)
+    with profile.phase('configs'):
+        configs = {l.split('=', 1)[0]:l.split('=', 1)[1].rstrip() for l in open('configs', 'r', encoding='utf-8').readlines()}
+        kis = KISTrade(configs['APPKey'], configs['APPSecret'], configs['saccount'])
+        auth = KISAuth(kis, token_cache=TokenCache(kis.appkey, kis.mode))
 
-    from collections import deque
-    signals = deque([])
+    my_print('시작 준비 (주식정보, 인증정보, 연결 예열)')
+    # 사용할 수 있는 종목, 사용할 칼럼만 남기기 -> 데이터 확인 필요
+    masters = bootstrap(kis, auth, StockInfo(), profile)
+    # if type(masters['KOSPI']) == pd.DataFrame:
+    #     print(masters['KOSPI'].head(1))
+
+    from stocks_info.kis_symbol import SymbolIndex
+    with profile.phase('symbols'):
+        symbols = SymbolIndex(masters)
+
+    auth.startRefresher()
+    # 주문 journal (journal/orders-YYYYMMDD.log) - 재시작시 오늘 주문 복원
+    from journal import OrderJournal
+    journal = OrderJournal()
+    domestic = Domestic(kis, auth, symbols, journal=journal)
+    with profile.phase('recover'):
+        recovered = domestic.recover()
+    if recovered['unresolved']:
+        my_print('접수 여부를 확인하지 못한 주문', recovered['unresolved'])
+    # 요청 계측 http://127.0.0.1:9100/metrics
+    kis.metrics.serve(9100)
+
+    from runtime import SignalQueue
+    # 실시간 체결통보, 교차 signal 이 들어오면 Engine 이 바로 처리
+    signals = SignalQueue()
     # signal_type -> time, price, 
-    check_point = True
-    asset_check = True
 
-    while True:
-        try:
-            # 주식장 오픈 체크
-            is_open = marketOpen()
+    my_print('실시간 시세 연결')
+    from realtime import RealtimeClient
+    realtime = RealtimeClient(kis, configs.get('HTSID'), signals=signals, book=domestic.book)
+    realtime.subscribe('price', '005930')
+    if configs.get('HTSID'):
+        realtime.subscribe('notice')
+    realtime.start()
 
-            # 장이 열려있는 시간일 경우
-            if is_open:
+    profile.ready()
+    my_print('시작 준비 완료\n' + profile.report())
 
-                #################### 매수 매도 Signal 체크
-                # Signal 체크 (구매 조건 - 로직 들어가는 부분)
+    # 보조지표 (거래정지, 정리매매 제외 전 종목) - 교차 발생시 signals 에 추가
+    from indicators import IndicatorEngine
+    indicators = IndicatorEngine(symbols.select(block=SymbolIndex.HALTED | SymbolIndex.LIQUIDATION),
+                                 crossovers=[('sma5', 'sma20')], signals=signals)
 
-                # # 매수 1회
-                # if check_point:
-                #     my_print(domestic.order_stock('005930', 1))
-                #     check_point=False
+    from runtime import Engine, Strategy
 
-                # # 10분마다 잔고조회 (1회만)
-                # if datetime.now().minute%10 == 0:
-                #     if asset_check:
-                #         my_print(domestic.order_asset())
-                #         asset_check = False
-                # else:
-                #     asset_check = True
+    class MainStrategy(Strategy):
+        def __init__(self) -> None:
+            self.check_point = True
 
-                my_print(domestic.order_able('005930', 58200))
+        def on_tick(self, engine, now):
+            #################### 매수 매도 Signal 체크
+            # Signal 체크 (구매 조건 - 로직 들어가는 부분)
+            indicators.feed(realtime.rings)
 
-                # 실전만 제공
-                # my_print(domestic.order_changable())
+            # # 매수 1회 (재시작해도 journal 에 남은 tag 로 다시 주문하지 않음)
+            # if self.check_point and not journal.fired('005930-buy-once'):
+            #     my_print(domestic.order_stock('005930', 1, tag='005930-buy-once'))
+            #     self.check_point=False
 
-                # # 매도 - 시그널이 왔을 때 처리 방법, 주식잔고에 있어야함
-                # if check_point:
-                #     my_print(domestic.order_stock('005930', 1, order_type='s'))
-                #     check_point=False
+            my_print(domestic.order_able('005930', 58200))
 
-                #################### 주문 체크
+            # 실전만 제공
+            # my_print(domestic.order_changable())
 
-        except:
-            import traceback
-            my_print('########## 에러 발생 ##########')
-            traceback.print_exc()
+            #################### 주문 체크
+
+        def on_signal(self, engine, signal):
+            # # 골든크로스 매수
+            # if signal['type'] == 'cross' and signal['direction'] == 'up':
+            #     my_print(domestic.order_stock(signal['stock_id'], 1))
+
+            # # 매도 - 시그널이 왔을 때 처리 방법, 주식잔고에 있어야함
+            # my_print(domestic.order_stock('005930', 1, order_type='s'))
+            pass
+
+    engine = Engine(signals=signals)
+    engine.add_strategy(MainStrategy())
+
+    # # 10분마다 잔고조회
+    # engine.every(600, lambda: my_print(domestic.order_asset()))
+    # 미체결, 잔고 맞추기 (전략에서는 domestic.book.holdings(), domestic.book.open_orders() 사용)
+    engine.every(60, domestic.reconcile_book)
 
-        time.sleep(0.5)
+    engine.run()